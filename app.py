@@ -6,24 +6,181 @@ Flask backend for generating PowerPoint presentations from JSON data.
 import os
 import json
 import tempfile
-import uuid
-from flask import Flask, render_template, request, send_file, jsonify
-
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
-from pptx.enum.shapes import MSO_SHAPE
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, nullcontext
+from threading import Lock
+from time import perf_counter
+from typing import Optional
+from flask import Flask, Response, g, render_template, request, jsonify, url_for
+from werkzeug.wsgi import FileWrapper
 
 # Import utilities from existing generate_ppt module
 from generate_ppt import (
-    SlideBuilder, SlideColors, SlideLayout, FontSettings,
-    clean_chemistry_text, parse_meta_info, get_original_question_number,
+    configure_text_cache, text_cache_stats, write_presentation, BACKENDS, SLIDE_STYLES,
+    BoundedCache, Compression, SlideCacheOverlay, seed_slide_cache, template_cache,
     COLORS, LAYOUT, FONTS
 )
+from ingest import iter_questions, QuestionValidationError
+from question_types import QuestionTable
+from result_cache import ResultCache, content_key
+from jobs import JobManager
+from bank_registry import BankRegistry, keywords
+from formula_images import FormulaRenderer, FormulaSettings, formulas_available
+from batch import BatchInputError, read_zip_inputs, stream_batch
+from memory_budget import (
+    DEFAULT_COST_MODELS, MemoryBudget, OverBudget, estimate_cost, load_cost_models, template_overhead
+)
+from metrics import (
+    Counter, Gauge, Histogram, Registry,
+    begin_request, end_request, server_timing_header, stage
+)
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['TEXT_CACHE_SIZE'] = int(os.environ.get('TEXT_CACHE_SIZE', 4096))
+app.config['SPOOL_MAX_SIZE'] = 8 * 1024 * 1024  # decks above this spill to disk
+app.config['RESULT_CACHE_DIR'] = os.environ.get(
+    'RESULT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pptgen-results')
+)
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+app.config['JOBS_DIR'] = os.environ.get(
+    'JOBS_DIR', os.path.join(tempfile.gettempdir(), 'pptgen-jobs')
+)
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 0)) or None  # None: one per CPU
+app.config['JOB_TTL'] = int(os.environ.get('JOB_TTL', 3600))  # seconds a finished job is kept
+app.config['SLIDE_CACHE_SIZE'] = int(os.environ.get('SLIDE_CACHE_SIZE', 4096))  # rendered slides kept for rebuilds
+app.config['BUILD_WORKERS'] = int(os.environ.get('BUILD_WORKERS', 1))  # >1 renders /generate slides in parallel
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))  # decks built at once per batch
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') != '0'  # Server-Timing and /metrics
+app.config['BANKS_DIR'] = os.environ.get(
+    'BANKS_DIR', os.path.join(tempfile.gettempdir(), 'pptgen-banks')
+)
+app.config['BANK_QUERY_LIMIT'] = 50  # questions listed per /banks/<name>/questions response
+app.config['FORMULA_IMAGES'] = os.environ.get('FORMULA_IMAGES', '')  # "png"/"svg": complex formulas as images
+app.config['FORMULA_CACHE_DIR'] = os.environ.get(
+    'FORMULA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pptgen-formulas')
+)
+app.config['FORMULA_WORKERS'] = int(os.environ.get('FORMULA_WORKERS', 0)) or None  # None: one per CPU
+app.config['SLIDE_STYLE'] = os.environ.get('SLIDE_STYLE', 'inline')  # "master": styling on a slide layout
+app.config['DECK_COMPRESS_LEVEL'] = int(os.environ.get('DECK_COMPRESS_LEVEL', 6))  # 0: store only, e.g. on a LAN
+app.config['DECK_COMPRESS_THREADS'] = int(os.environ.get('DECK_COMPRESS_THREADS', 1))  # >1 deflates parts in parallel
+app.config['PPT_TEMPLATE'] = os.environ.get('PPT_TEMPLATE') or None  # slide-less .pptx decks are built on
+# Under asgi.py: /generate builds run at once, and requests waiting for one before the rest get 429
+app.config['BUILD_CONCURRENCY'] = int(os.environ.get('BUILD_CONCURRENCY', 0)) or os.cpu_count() or 1
+app.config['BUILD_QUEUE_SIZE'] = int(os.environ.get('BUILD_QUEUE_SIZE', 16))
+# Estimated memory all in-process builds may hold at once; 0 disables the budget
+app.config['MEMORY_BUDGET'] = int(os.environ.get('MEMORY_BUDGET_MB', 1024)) * 1024 * 1024
+app.config['MEMORY_BUDGET_WAIT'] = float(os.environ.get('MEMORY_BUDGET_WAIT', 30))  # seconds before 503
+app.config['MEMORY_COST_FILE'] = os.environ.get('MEMORY_COST_FILE', '')  # from python -m memory_budget
+
+PPTX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+SEND_CHUNK_SIZE = 64 * 1024
+
+configure_text_cache(app.config['TEXT_CACHE_SIZE'])
+result_cache = ResultCache(app.config['RESULT_CACHE_DIR'], app.config['RESULT_CACHE_MAX_BYTES'])
+slide_cache = BoundedCache(app.config['SLIDE_CACHE_SIZE'])
+job_manager = JobManager(app.config['JOBS_DIR'], app.config['JOB_WORKERS'], app.config['JOB_TTL'])
+bank_registry = BankRegistry(app.config['BANKS_DIR'])
+memory_budget = MemoryBudget(app.config['MEMORY_BUDGET'], app.config['MEMORY_BUDGET_WAIT'])
+cost_models = (
+    load_cost_models(app.config['MEMORY_COST_FILE']) if app.config['MEMORY_COST_FILE'] else DEFAULT_COST_MODELS
+)
+
+formula_renderer = None
+if app.config['FORMULA_IMAGES']:
+    if not formulas_available():
+        raise RuntimeError('FORMULA_IMAGES needs matplotlib (pip install matplotlib)')
+    formula_renderer = FormulaRenderer(
+        app.config['FORMULA_CACHE_DIR'],
+        FormulaSettings(app.config['FORMULA_IMAGES'], COLORS.text),
+        app.config['FORMULA_WORKERS']
+    )
+if app.config['SLIDE_STYLE'] not in SLIDE_STYLES:
+    raise RuntimeError(f'SLIDE_STYLE must be one of: {", ".join(SLIDE_STYLES)}')
+# Everything besides the questions that a deck's content depends on
+DECK_STYLE = (COLORS, LAYOUT, FONTS) + ((formula_renderer.settings,) if formula_renderer else ())
+if app.config['SLIDE_STYLE'] != 'inline':
+    DECK_STYLE += (app.config['SLIDE_STYLE'],)
+if not 0 <= app.config['DECK_COMPRESS_LEVEL'] <= 9:
+    raise RuntimeError('DECK_COMPRESS_LEVEL must be 0-9')
+if app.config['PPT_TEMPLATE'] and not os.path.isfile(app.config['PPT_TEMPLATE']):
+    raise RuntimeError(f"PPT_TEMPLATE {app.config['PPT_TEMPLATE']} doesn't exist")
+# Memory every presentation a build holds takes for PPT_TEMPLATE, beyond the default's
+template_memory = template_overhead(app.config['PPT_TEMPLATE'])
+# Compression changes a deck's bytes but not its content, so isn't part of DECK_STYLE
+deck_compression = Compression(app.config['DECK_COMPRESS_LEVEL'], app.config['DECK_COMPRESS_THREADS'])
+
+metrics_registry = Registry()
+REQUESTS = metrics_registry.register(Counter(
+    'pptgen_requests_total', 'HTTP requests handled.', ['endpoint', 'status']
+))
+ERRORS = metrics_registry.register(Counter(
+    'pptgen_errors_total', 'Requests answered with an error status.', ['endpoint', 'kind']
+))
+REQUEST_SECONDS = metrics_registry.register(Histogram(
+    'pptgen_request_duration_seconds', 'Time to produce a response, excluding the body transfer.', ['endpoint']
+))
+STAGE_SECONDS = metrics_registry.register(Histogram(
+    'pptgen_stage_duration_seconds', 'Time per request spent in each generation stage.', ['stage']
+))
+SLIDES = metrics_registry.register(Counter('pptgen_slides_total', 'Slides built by /generate.'))
+OUTPUT_BYTES = metrics_registry.register(Counter('pptgen_output_bytes_total', 'Bytes of .pptx decks sent.'))
+MEMORY_REJECTED = metrics_registry.register(Counter(
+    'pptgen_memory_rejected_total', 'Builds turned away by the memory budget.', ['reason']
+))
+metrics_registry.register(Gauge(
+    'pptgen_memory_budget_bytes', 'Estimated build memory allowed at once (0: unlimited).',
+    lambda: memory_budget.limit
+))
+metrics_registry.register(Gauge(
+    'pptgen_memory_reserved_bytes', 'Estimated memory of the builds running now.',
+    lambda: memory_budget.stats().reserved
+))
+metrics_registry.register(Gauge(
+    'pptgen_memory_waiting_builds', 'Builds waiting for room in the memory budget.',
+    lambda: memory_budget.stats().waiting
+))
+
+
+@app.before_request
+def start_request_metrics():
+    """Start the stage timers for this request."""
+    if app.config['METRICS_ENABLED'] and request.endpoint != 'metrics':
+        g.metrics_token = begin_request()
+        g.request_start = perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Report stage timings in Server-Timing and fold them into /metrics."""
+    token = g.pop('metrics_token', None)
+    if token is None:
+        return response
+    timings = end_request(token)
+    timings['total'] = perf_counter() - g.request_start
+    endpoint = request.endpoint or 'unknown'
+    
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    if response.status_code >= 400:
+        ERRORS.inc(endpoint=endpoint, kind='server' if response.status_code >= 500 else 'client')
+    REQUEST_SECONDS.observe(timings['total'], endpoint=endpoint)
+    for name, seconds in timings.items():
+        if name != 'total':
+            STAGE_SECONDS.observe(seconds, stage=name)
+    if response.mimetype == PPTX_MIMETYPE and response.content_length:
+        OUTPUT_BYTES.inc(response.content_length)
+    
+    response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
+
+
+@app.teardown_request
+def discard_request_metrics(exc):
+    """Stop the stage timers if the request ended without a response hook."""
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        end_request(token)
 
 
 @app.route('/')
@@ -42,70 +199,530 @@ def generate_ppt():
         {"q": "Question text...", "meta": "Year | Marks"},
         ...
     ]
+    
+    Optional form field ``backend``: "pptx" (default) or "stream".
+    Optional file ``previousDeck``: an earlier deck from this endpoint;
+    its unchanged slides are reused instead of re-rendered.
     """
     try:
-        # Check if file was uploaded
-        if 'jsonFile' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
+        with stage('upload'):
+            file, backend, error = uploaded_json()
+        if error is not None:
+            return error
         
-        file = request.files['jsonFile']
+        # Parse once into a compact table, then hash the normalized questions:
+        # the same questions and styling are answered from the result cache
+        # (or with 304) without a rebuild
+        try:
+            with stage('parse'):
+                questions = QuestionTable(iter_questions(file.stream))
+        except INGEST_ERRORS as e:
+            return ingest_error(e)
+        if not questions:
+            return jsonify({'error': 'JSON array is empty'}), 400
+        with stage('hash'):
+            key = content_key(questions, *deck_style())
         
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
+        cached = cached_deck_response(key)
+        if cached is not None:
+            return cached
         
-        if not file.filename.endswith('.json'):
-            return jsonify({'error': 'Please upload a JSON file'}), 400
+        # Reuse the slides of the previous version of the deck, for this
+        # build only: its hashes are the uploader's word, not ours
+        slides = slide_cache
+        previous = request.files.get('previousDeck')
+        if previous is not None and previous.filename:
+            slides = SlideCacheOverlay(slide_cache, app.config['SLIDE_CACHE_SIZE'])
+            try:
+                seed_slide_cache(previous.stream, slides.seeded)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid previous deck: {str(e)}'}), 400
         
-        # Parse JSON content
-        try:
-            content = file.read().decode('utf-8')
-            questions_data = json.loads(content)
-        except json.JSONDecodeError as e:
-            return jsonify({'error': f'Invalid JSON format: {str(e)}'}), 400
-        except UnicodeDecodeError:
-            return jsonify({'error': 'File encoding error. Please use UTF-8 encoded JSON.'}), 400
+        return built_deck_response(questions, key, backend, slides)
         
-        # Validate JSON structure
-        if not isinstance(questions_data, list):
-            return jsonify({'error': 'JSON must be an array of question objects'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/generate/batch', methods=['POST'])
+def generate_batch():
+    """
+    Generate one deck per uploaded JSON file and return them as a zip.
+    
+    Accepts several ``jsonFile`` uploads, or a single .zip of JSON files.
+    Decks are built concurrently and streamed into the zip as they finish;
+    report.json in the zip records each file's outcome, so a bad file
+    doesn't fail the batch.
+    
+    Optional form field ``backend``: "pptx" (default) or "stream".
+    """
+    try:
+        files = [f for f in request.files.getlist('jsonFile') if f.filename]
+        if not files:
+            return jsonify({'error': 'No file uploaded'}), 400
         
-        if len(questions_data) == 0:
-            return jsonify({'error': 'JSON array is empty'}), 400
+        backend = request.form.get('backend', 'pptx')
+        if backend not in BACKENDS:
+            return jsonify({'error': f'Unknown backend "{backend}". Use one of: {", ".join(BACKENDS)}'}), 400
         
-        for i, item in enumerate(questions_data):
-            if not isinstance(item, dict):
-                return jsonify({'error': f'Item {i+1} is not a valid object'}), 400
-            if 'q' not in item:
-                return jsonify({'error': f'Item {i+1} is missing required "q" field'}), 400
+        # Inputs are read up front: the upload is gone once the response streams
+        if len(files) == 1 and files[0].filename.lower().endswith('.zip'):
+            try:
+                inputs = read_zip_inputs(files[0].stream)
+            except BatchInputError as e:
+                return jsonify({'error': str(e)}), 400
+            if not inputs:
+                return jsonify({'error': 'Zip contains no JSON files'}), 400
+        else:
+            inputs = [(f.filename, f.read()) for f in files]
         
-        # Generate PowerPoint
-        prs = Presentation()
-        builder = SlideBuilder(prs)
+        workers = app.config['BATCH_WORKERS']
+        response = Response(
+            stream_batch(
+                inputs, batch_pool(), workers, backend, app.config['SLIDE_STYLE'], deck_compression,
+                app.config['PPT_TEMPLATE'], worker_formula_settings(), app.config['FORMULA_CACHE_DIR']
+            ),
+            mimetype='application/zip'
+        )
+        response.headers.set('Content-Disposition', 'attachment', filename='Generated_Presentations.zip')
+        return response
         
-        for question in questions_data:
-            # Ensure meta exists with default
-            if 'meta' not in question:
-                question['meta'] = ''
-            builder.create_slide(question)
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a deck build on the background worker pool.
+    
+    Takes the same upload as /generate. The file is validated before the
+    job is accepted; the response (202) carries the job id and its URLs.
+    """
+    try:
+        file, backend, error = uploaded_json()
+        if error is not None:
+            return error
         
-        # Save to temporary file
-        temp_dir = tempfile.gettempdir()
-        filename = f"presentation_{uuid.uuid4().hex[:8]}.pptx"
-        filepath = os.path.join(temp_dir, filename)
-        prs.save(filepath)
+        try:
+            total = sum(1 for _ in iter_questions(file.stream))
+        except INGEST_ERRORS as e:
+            return ingest_error(e)
+        if total == 0:
+            return jsonify({'error': 'JSON array is empty'}), 400
         
-        # Return the file
-        return send_file(
-            filepath,
-            mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
-            as_attachment=True,
-            download_name='Generated_Presentation.pptx'
+        file.stream.seek(0)
+        job_id = job_manager.submit(
+            file.stream, total, backend, app.config['SLIDE_STYLE'], deck_compression,
+            app.config['PPT_TEMPLATE'], worker_formula_settings(), app.config['FORMULA_CACHE_DIR']
         )
+        status_url = url_for('job_status', job_id=job_id)
+        response = jsonify({
+            'id': job_id,
+            'status': 'queued',
+            'total': total,
+            'status_url': status_url,
+            'result_url': url_for('job_result', job_id=job_id)
+        })
+        response.headers['Location'] = status_url
+        return response, 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report a job's status (queued/running/done/failed) and slides built so far."""
+    info = job_manager.status(job_id)
+    if info is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(info)
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Download a finished job's deck."""
+    path = job_manager.result_path(job_id)
+    if path is None:
+        info = job_manager.status(job_id)
+        if info is None:
+            return jsonify({'error': 'Unknown or expired job'}), 404
+        if info['status'] == 'failed':
+            return jsonify({'error': info['error']}), 500
+        return jsonify({'error': 'Job is not finished', **info}), 409
+    try:
+        deck = open(path, 'rb')
+    except FileNotFoundError:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    deck.seek(0, os.SEEK_END)
+    return send_deck(deck)
+
+
+@app.route('/banks', methods=['GET'])
+def list_banks():
+    """List the names of the stored question banks."""
+    return jsonify({'banks': bank_registry.names()})
+
+
+@app.route('/banks/<name>', methods=['PUT'])
+def upload_bank(name):
+    """
+    Store or replace a named question bank from a JSON upload (same format
+    as /generate). A replaced bank is re-indexed incrementally: unchanged
+    questions are not analyzed again.
+    """
+    try:
+        if not bank_registry.valid_name(name):
+            return jsonify({'error': 'Bank names are 1-64 letters, digits, "-" or "_"'}), 400
+        file, _, error = uploaded_json()
+        if error is not None:
+            return error
+        try:
+            with stage('index'):
+                stats = bank_registry.put(name, iter_questions(file.stream))
+        except INGEST_ERRORS as e:
+            return ingest_error(e)
+        return jsonify({'name': name, **asdict(stats)})
         
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 
+@app.route('/banks/<name>', methods=['GET'])
+def bank_summary(name):
+    """Describe a bank: question count and the years and marks it can be queried by."""
+    index = bank_registry.get(name)
+    if index is None:
+        return jsonify({'error': 'Unknown bank'}), 404
+    return jsonify({'name': name, **index.summary()})
+
+
+@app.route('/banks/<name>', methods=['DELETE'])
+def delete_bank(name):
+    """Remove a stored bank."""
+    if not bank_registry.delete(name):
+        return jsonify({'error': 'Unknown bank'}), 404
+    return Response(status=204)
+
+
+@app.route('/banks/<name>/questions', methods=['GET'])
+def query_bank(name):
+    """
+    List the questions of a bank matching a query.
+    
+    Query parameters (all optional, combined with AND):
+        year   one or more years, e.g. year=2019&year=2020 or year=2019,2020
+        marks  one or more mark values, e.g. marks=5
+        q      keywords that must all appear in the question text
+        limit  questions to return (total is always reported)
+    """
+    index, positions, error = bank_query(name)
+    if error is not None:
+        return error
+    try:
+        limit = int(request.args.get('limit', app.config['BANK_QUERY_LIMIT']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    shown = positions[:max(limit, 0)]
+    return jsonify({
+        'total': len(positions),
+        'positions': list(shown),
+        'questions': index.questions(shown)
+    })
+
+
+@app.route('/banks/<name>/generate', methods=['GET', 'POST'])
+def generate_from_bank(name):
+    """
+    Generate a deck from the questions of a stored bank matching a query
+    (same parameters as /banks/<name>/questions, plus ``backend``), without
+    uploading the bank again.
+    """
+    try:
+        index, positions, error = bank_query(name)
+        if error is not None:
+            return error
+        if not positions:
+            return jsonify({'error': 'No questions match the query'}), 404
+        backend = request.values.get('backend', 'pptx')
+        if backend not in BACKENDS:
+            return jsonify({'error': f'Unknown backend "{backend}". Use one of: {", ".join(BACKENDS)}'}), 400
+        
+        with stage('parse'):
+            questions = QuestionTable(index.questions(positions))
+        with stage('hash'):
+            key = content_key(questions, *deck_style())
+        cached = cached_deck_response(key)
+        if cached is not None:
+            return cached
+        return built_deck_response(questions, key, backend)
+        
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+def bank_query(name: str):
+    """
+    Run the year/marks/q query in the request's parameters against a bank.
+    
+    Returns:
+        (index, matching positions, None), or (None, None, error response)
+    """
+    index = bank_registry.get(name)
+    if index is None:
+        return None, None, (jsonify({'error': 'Unknown bank'}), 404)
+    try:
+        years, marks = (
+            [int(v) for value in request.values.getlist(field) for v in value.split(',') if v.strip()]
+            for field in ('year', 'marks')
+        )
+    except ValueError:
+        return None, None, (jsonify({'error': 'year and marks must be integers'}), 400)
+    text = request.values.get('q', '')
+    if text.strip() and not keywords(text):
+        return None, None, (jsonify({'error': 'q has no searchable words (only stopwords or punctuation)'}), 400)
+    with stage('query'):
+        positions = index.query(years, marks, text)
+    return index, positions, None
+
+
+def uploaded_json():
+    """
+    Check the request's uploaded JSON file and backend choice.
+    
+    Returns:
+        (file, backend, None) if valid, else (None, None, error response)
+    """
+    # Check if file was uploaded
+    if 'jsonFile' not in request.files:
+        return None, None, (jsonify({'error': 'No file uploaded'}), 400)
+    
+    file = request.files['jsonFile']
+    
+    if file.filename == '':
+        return None, None, (jsonify({'error': 'No file selected'}), 400)
+    
+    if not file.filename.endswith('.json'):
+        return None, None, (jsonify({'error': 'Please upload a JSON file'}), 400)
+    
+    # Optional rendering backend: python-pptx object model or direct OOXML stream
+    backend = request.form.get('backend', 'pptx')
+    if backend not in BACKENDS:
+        return None, None, (jsonify({'error': f'Unknown backend "{backend}". Use one of: {", ".join(BACKENDS)}'}), 400)
+    
+    return file, backend, None
+
+
+INGEST_ERRORS = (json.JSONDecodeError, UnicodeDecodeError, QuestionValidationError)
+
+
+def ingest_error(exc: Exception):
+    """Map a parsing/validation failure to a 400 error response."""
+    if isinstance(exc, json.JSONDecodeError):
+        return jsonify({'error': f'Invalid JSON format: {str(exc)}'}), 400
+    if isinstance(exc, UnicodeDecodeError):
+        return jsonify({'error': 'File encoding error. Please use UTF-8 encoded JSON.'}), 400
+    return jsonify({'error': str(exc)}), 400
+
+
+def worker_formula_settings() -> Optional[FormulaSettings]:
+    """
+    How job and batch workers render formulas: as /generate does, each
+    worker with a renderer of its own on the shared FORMULA_CACHE_DIR.
+    """
+    return formula_renderer.settings if formula_renderer is not None else None
+
+
+def deck_style() -> tuple:
+    """
+    DECK_STYLE plus the content hash of PPT_TEMPLATE, if set, so editing the
+    template invalidates decks built on it without a restart.
+    """
+    template = app.config['PPT_TEMPLATE']
+    return DECK_STYLE + (template_cache.digest(template),) if template else DECK_STYLE
+
+
+def cached_deck_response(key: str) -> Optional[Response]:
+    """A 304 or a result-cache hit for a content key, or None to build."""
+    if request.if_none_match.contains(key):
+        response = Response(status=304)
+        response.set_etag(key)
+        return response
+    
+    cached = result_cache.open(key)
+    if cached is not None:
+        cached.seek(0, os.SEEK_END)
+        return send_deck(cached, key)
+    return None
+
+
+# WSGI environ key of a callable returning a context manager that holds
+# one of the server's build slots (set by asgi.py; absent under plain WSGI)
+BUILD_SLOT_KEY = 'pptgen.build_slot'
+
+
+def build_slot():
+    """
+    The server's build slot for this request, held while the deck builds.
+    Taken only once the result cache has missed, so hits and 304s never
+    wait behind running builds.
+    """
+    slot = request.environ.get(BUILD_SLOT_KEY)
+    return slot() if slot is not None else nullcontext()
+
+
+def built_deck_response(questions: QuestionTable, key: str, backend: str, slides=None) -> Response:
+    """
+    Build a deck, store it in the result cache and send it; the build
+    first waits for a build slot, then for its estimated memory to fit in
+    the memory budget.
+    
+    A deck built with slides other than the shared slide cache's (seeded
+    from an upload) is only sent, not cached or tagged with the content key.
+    """
+    slides = slides if slides is not None else slide_cache
+    trusted = slides is slide_cache
+    # Serialize into memory, spilling to an anonymous temp file only
+    # for large decks; either way nothing outlives the request
+    deck = tempfile.SpooledTemporaryFile(max_size=app.config['SPOOL_MAX_SIZE'])
+    try:
+        with ExitStack() as reservation:
+            with stage('queue'):
+                reservation.enter_context(build_slot())
+            with stage('admit'):
+                reservation.enter_context(memory_budget.reserve(build_cost(questions, backend)))
+            build_deck(questions, deck, backend, slides)
+        if trusted:
+            deck.seek(0)
+            with stage('cache_store'):
+                result_cache.put(key, deck)
+            deck.seek(0, os.SEEK_END)  # put() is a no-op when the cache is off
+    except OverBudget as e:
+        deck.close()
+        return over_budget_error(e)
+    except Exception:
+        deck.close()
+        raise
+    return send_deck(deck, key if trusted else None)
+
+
+def build_cost(questions: QuestionTable, backend: str) -> int:
+    """Estimated peak memory of building a deck the way build_deck() does."""
+    return estimate_cost(
+        questions, backend, cost_models, app.config['SLIDE_STYLE'],
+        app.config['BUILD_WORKERS'], template_memory
+    )
+
+
+def over_budget_error(exc: OverBudget):
+    """413 for a deck that could never fit the memory budget, else 503 to retry later."""
+    if app.config['METRICS_ENABLED']:
+        MEMORY_REJECTED.inc(reason='too_large' if exc.retry_after is None else 'timeout')
+    if exc.retry_after is None:
+        return jsonify({'error': str(exc)}), 413
+    return jsonify({'error': str(exc)}), 503, {'Retry-After': str(exc.retry_after)}
+
+
+def build_deck(questions: QuestionTable, deck, backend: str, slides=None) -> None:
+    """
+    Build a deck from parsed questions into a writable binary stream,
+    reusing rendered slides from `slides` (default: the shared slide cache).
+    """
+    slides = slides if slides is not None else slide_cache
+    workers = app.config['BUILD_WORKERS']
+    slide_count = write_presentation(
+        questions, deck, backend=backend,
+        workers=workers, executor=build_pool() if workers > 1 else None,
+        slide_cache=slides, record_hashes=True, formulas=formula_renderer,
+        slide_style=app.config['SLIDE_STYLE'], compression=deck_compression,
+        template=app.config['PPT_TEMPLATE']
+    )
+    if app.config['METRICS_ENABLED']:
+        SLIDES.inc(slide_count)
+
+
+_build_pool = None
+_build_pool_lock = Lock()
+
+
+def build_pool() -> ProcessPoolExecutor:
+    """Process pool shared by parallel /generate builds, started on first use."""
+    global _build_pool
+    with _build_pool_lock:
+        if _build_pool is None:
+            # Parsed once here, so forked workers start with it
+            template_cache.warm(app.config['PPT_TEMPLATE'])
+            _build_pool = ProcessPoolExecutor(max_workers=app.config['BUILD_WORKERS'])
+        return _build_pool
+
+
+_batch_pool = None
+
+
+def batch_pool() -> ProcessPoolExecutor:
+    """Process pool shared by /generate/batch requests, started on first use."""
+    global _batch_pool
+    with _build_pool_lock:
+        if _batch_pool is None:
+            # Parsed once here, so forked workers start with it
+            template_cache.warm(app.config['PPT_TEMPLATE'])
+            _batch_pool = ProcessPoolExecutor(max_workers=app.config['BATCH_WORKERS'])
+        return _batch_pool
+
+
+def send_deck(deck, etag: Optional[str] = None) -> Response:
+    """
+    Stream a finished deck back as a download; the buffer is closed
+    (and any spilled temp file removed) when the response ends.
+    
+    Args:
+        deck: Binary file positioned at the end of the deck
+        etag: Content key to send as the ETag
+    """
+    size = deck.tell()
+    deck.seek(0)
+    response = Response(
+        FileWrapper(deck, SEND_CHUNK_SIZE),
+        mimetype=PPTX_MIMETYPE,
+        direct_passthrough=True
+    )
+    response.content_length = size
+    response.headers.set('Content-Disposition', 'attachment', filename='Generated_Presentation.pptx')
+    if etag is not None:
+        response.set_etag(etag)
+    response.call_on_close(deck.close)
+    return response
+
+
+@app.route('/stats/cache', methods=['GET'])
+def cache_stats():
+    """Report hit/miss/eviction counters for the text, slide, template and result caches."""
+    stats = dict(text_cache_stats())
+    stats['slide_fragments'] = slide_cache.stats()
+    stats['templates'] = template_cache.stats()
+    stats['generate_results'] = result_cache.stats()
+    return jsonify({
+        name: {**asdict(entry), 'hit_rate': round(entry.hit_rate, 4)}
+        for name, entry in stats.items()
+    })
+
+
+@app.route('/stats/memory', methods=['GET'])
+def memory_stats():
+    """Report the memory budget: bytes reserved by running builds, and admissions."""
+    stats = memory_budget.stats()
+    return jsonify({**asdict(stats), 'utilization': round(stats.utilization, 4)})
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose request, stage, slide and output counters in Prometheus format."""
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics_registry.render(), content_type=Registry.CONTENT_TYPE)
+
+
 if __name__ == '__main__':
     print("\n[*] JSON to PPT Generator")
     print("=" * 40)
@@ -0,0 +1,414 @@
+"""
+ASGI Entry Point
+Serves the Flask app (app.py) under an ASGI server for bursty traffic:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+    python asgi.py
+
+Request bodies are read on the event loop, so a slow upload holds no
+thread. The Flask app then handles the buffered request on a thread pool.
+Deck builds (POST /generate and /banks/<name>/generate) run
+BUILD_CONCURRENCY at a time and up to BUILD_QUEUE_SIZE more wait for a
+slot. A build request takes its place in that queue before its upload is
+read; beyond it, requests are answered at once with 429 and a Retry-After
+estimated from recent build times. The slot itself is only taken once
+the app has missed its result cache, so cached decks and 304s are never
+held up by running builds. Every route and response is otherwise exactly
+the Flask app's, which keeps working on its own.
+
+An ASGI server such as uvicorn is an optional dependency, needed only to
+run this module.
+"""
+
+import asyncio
+import json
+import math
+import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from time import perf_counter
+from typing import IO, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app import BUILD_SLOT_KEY, app as flask_app, metrics_registry
+from metrics import Counter
+
+# Requests that build a deck, and so go through the build limiter
+_BUILD_PATH = re.compile(r"^/(?:generate|banks/[^/]+/generate)$")
+# Threads running the Flask app and streaming responses, on top of one per
+# build slot and queue place (a queued build waits on its request thread)
+REQUEST_THREADS = 32
+# Weight of the latest build in the running mean used for Retry-After
+_BUILD_TIME_WEIGHT = 0.2
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+BUILDS_REJECTED = metrics_registry.register(Counter(
+    'pptgen_builds_rejected_total', 'Build requests turned away with 429 while the queue was full.'
+))
+
+
+class Overloaded(Exception):
+    """Every build slot is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server busy; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Disconnected(Exception):
+    """The client went away before its request body arrived."""
+
+
+class BuildLimiter:
+    """
+    Admission control for deck builds on the event loop.
+
+    At most `concurrency` builds run at once and at most `queue_size` more
+    wait for a slot, in arrival order; reserve() raises Overloaded beyond
+    that.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.running = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._mean_seconds: Optional[float] = None  # of recent builds
+
+    def full(self) -> bool:
+        """Whether a new build would be turned away right now."""
+        return self.running + self.waiting >= self.concurrency + self.queue_size
+
+    def retry_after(self) -> int:
+        """Seconds until the builds ahead of a new request have likely finished."""
+        mean = self._mean_seconds or 1.0
+        return max(1, math.ceil(mean * (self.waiting + 1) / self.concurrency))
+
+    def reserve(self) -> "BuildTicket":
+        """
+        Take a place in the build queue (call on the event loop; the check
+        and the count are one step, so concurrent requests can't overbook).
+
+        Raises:
+            Overloaded: If the wait queue is already full
+        """
+        if self.full():
+            raise Overloaded(self.retry_after())
+        self.waiting += 1
+        return BuildTicket(self)
+
+    def _record(self, seconds: float) -> None:
+        if self._mean_seconds is None:
+            self._mean_seconds = seconds
+        else:
+            self._mean_seconds += _BUILD_TIME_WEIGHT * (seconds - self._mean_seconds)
+
+
+class BuildTicket:
+    """
+    A request's place in the build queue, turned into a build slot by
+    start(). release() gives back whichever it holds; it is safe to call
+    more than once, or for a request that never built.
+    """
+
+    def __init__(self, limiter: BuildLimiter):
+        self._limiter = limiter
+        self._state = "waiting"  # then "running", then "released"
+        self._started = 0.0
+
+    async def start(self) -> None:
+        """Wait for a build slot, keeping the queue place meanwhile."""
+        if self._state != "waiting":
+            raise RuntimeError(f"Build ticket is {self._state}")
+        await self._limiter._slots.acquire()
+        if self._state != "waiting":  # released meanwhile: the request was abandoned
+            self._limiter._slots.release()
+            raise RuntimeError("Build ticket was released while waiting for a slot")
+        self._limiter.waiting -= 1
+        self._limiter.running += 1
+        self._state = "running"
+        self._started = perf_counter()
+
+    def release(self) -> None:
+        """Leave the queue, or free the slot and record the build's time."""
+        limiter = self._limiter
+        if self._state == "waiting":
+            limiter.waiting -= 1
+        elif self._state == "running":
+            limiter.running -= 1
+            limiter._slots.release()
+            limiter._record(perf_counter() - self._started)
+        self._state = "released"
+
+
+class AsgiApp:
+    """ASGI application running a WSGI app on thread pools, with bounded builds."""
+
+    def __init__(self, wsgi_app, concurrency: int, queue_size: int, max_body: Optional[int] = None):
+        """
+        Args:
+            wsgi_app: The Flask app
+            concurrency: Builds run at once
+            queue_size: Builds waiting for a slot before 429s
+            max_body: Largest request body accepted, in bytes (413 above it)
+        """
+        self.wsgi_app = wsgi_app
+        self.max_body = max_body
+        self.limiter = BuildLimiter(concurrency, queue_size)
+        self._request_executor = ThreadPoolExecutor(
+            REQUEST_THREADS + concurrency + queue_size, thread_name_prefix="request"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    def close(self) -> None:
+        """Stop the thread pool once running requests finish."""
+        self._request_executor.shutdown()
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        builds = scope["method"] in ("GET", "POST") and bool(_BUILD_PATH.match(scope["path"]))
+        ticket = None
+        if builds:
+            # Queue the build before its upload is read, turning it away
+            # unread when nothing could take it
+            try:
+                ticket = self.limiter.reserve()
+            except Overloaded as exc:
+                await self._reject(send, exc.retry_after)
+                return
+        try:
+            await self._handle(scope, receive, send, ticket)
+        finally:
+            if ticket is not None:
+                ticket.release()
+
+    async def _handle(
+        self, scope: Scope, receive: Receive, send: Send, ticket: Optional[BuildTicket]
+    ) -> None:
+        declared = _header(scope, b"content-length")
+        if self.max_body is not None and declared and declared.isdigit() and int(declared) > self.max_body:
+            await _send_error(send, 413, "Request body too large")
+            return
+        try:
+            body, length = await self._read_body(receive)
+        except _Disconnected:
+            return
+        if body is None:
+            await _send_error(send, 413, "Request body too large")
+            return
+
+        loop = asyncio.get_running_loop()
+        environ = _environ(scope, body, length)
+        if ticket is not None:
+            environ[BUILD_SLOT_KEY] = lambda: _slot(ticket, loop)
+        try:
+            response = await loop.run_in_executor(
+                self._request_executor, _call_wsgi, self.wsgi_app, environ
+            )
+            if ticket is not None:
+                ticket.release()  # the deck is built; sending it needs no slot
+            await self._send_response(send, response)
+        finally:
+            body.close()
+
+    async def _read_body(self, receive: Receive) -> Tuple[Optional[IO[bytes]], int]:
+        """
+        Buffer the request body as it arrives, spilling large ones to disk.
+
+        Returns:
+            (body file at its start, or None if it's over max_body; length)
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=flask_app.config['SPOOL_MAX_SIZE'])
+        length = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                raise _Disconnected()
+            chunk = message.get("body", b"")
+            length += len(chunk)
+            if self.max_body is not None and length > self.max_body:
+                body.close()
+                return None, length
+            body.write(chunk)
+            if not message.get("more_body", False):
+                break
+        body.seek(0)
+        return body, length
+
+    async def _send_response(self, send: Send, response: Tuple[str, List[Tuple[str, str]], Any]) -> None:
+        """Send a WSGI response, reading its body on the request threads."""
+        status, headers, app_iter = response
+        loop = asyncio.get_running_loop()
+        chunks = iter(app_iter)
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+            })
+            while True:
+                chunk = await loop.run_in_executor(self._request_executor, next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self._request_executor, close)
+
+    async def _reject(self, send: Send, retry_after: int) -> None:
+        if flask_app.config['METRICS_ENABLED']:
+            BUILDS_REJECTED.inc()
+        await _send_error(
+            send, 429, f"Server busy; retry in {retry_after}s",
+            ((b"retry-after", str(retry_after).encode()),)
+        )
+
+
+@contextmanager
+def _slot(ticket: BuildTicket, loop: asyncio.AbstractEventLoop):
+    """Hold a ticket's build slot from a request thread (see app.build_slot())."""
+    asyncio.run_coroutine_threadsafe(ticket.start(), loop).result()
+    try:
+        yield
+    finally:
+        loop.call_soon_threadsafe(ticket.release)
+
+
+def _call_wsgi(wsgi_app, environ: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]], Any]:
+    """Call a WSGI app (on a worker thread) up to the start of its response."""
+    started: List[Any] = []
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info is not None and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started[:] = [status, headers]
+
+    app_iter = wsgi_app(environ, start_response)
+    if not started:  # a generator app starts its response on the first chunk
+        chunks = iter(app_iter)
+        first = next(chunks, b"")
+        app_iter = _Prepended(first, chunks, app_iter)
+    return started[0], started[1], app_iter
+
+
+class _Prepended:
+    """A response body whose first chunk was read ahead, still closable."""
+
+    def __init__(self, first: bytes, rest, original):
+        self._chunks = iter((first,))
+        self._rest = rest
+        self._original = original
+
+    def __iter__(self):
+        yield from self._chunks
+        yield from self._rest
+
+    def close(self) -> None:
+        close = getattr(self._original, "close", None)
+        if close is not None:
+            close()
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _environ(scope: Scope, body: IO[bytes], length: int) -> Dict[str, Any]:
+    """The WSGI environ of an ASGI HTTP request whose body has been read."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(length),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").lower()
+        value = value.decode("latin-1")
+        if name == "content-length":
+            continue  # the body read decides it
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+            continue
+        key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _send_error(
+    send: Send, status: int, message: str, headers: Tuple[Tuple[bytes, bytes], ...] = ()
+) -> None:
+    """Send a JSON error in the Flask app's {"error": ...} shape."""
+    body = json.dumps({"error": message}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body, "more_body": False})
+
+
+app = AsgiApp(
+    flask_app,
+    flask_app.config['BUILD_CONCURRENCY'],
+    flask_app.config['BUILD_QUEUE_SIZE'],
+    flask_app.config['MAX_CONTENT_LENGTH']
+)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("asgi.py needs an ASGI server: pip install uvicorn")
+    print("\n[*] JSON to PPT Generator (ASGI)")
+    print("=" * 40)
+    print("Open http://localhost:8000 in your browser")
+    print("=" * 40 + "\n")
+    uvicorn.run(app, port=8000)
@@ -0,0 +1,323 @@
+"""
+Question Bank Registry
+Keeps named question banks on the server, compiled to memory-mapped files
+(see question_bank.py), with in-memory inverted indexes so a deck can be
+built from a query such as "all 2019 questions" or "5-mark questions about
+resistance" without uploading the bank again.
+
+Indexes:
+    year      every 4-digit year in the meta's year part ("Delhi 2019, AI 2018")
+    marks     the number in the meta's marks part ("5 Marks" -> 5)
+    keyword   lower-cased words of the cleaned question text
+
+Posting lists are sorted arrays of bank positions. A query intersects them
+rarest first by binary search, so its cost follows the rarest term rather
+than the bank size. Re-uploading a bank reuses the analysis of every
+question whose text and meta are unchanged, and keeps the postings of an
+unchanged leading run of questions as they are.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from concurrent.futures import Future
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from generate_ppt import clean_chemistry_text, parse_meta_info
+from question_bank import BANK_SUFFIX, QuestionBank, write_bank
+from question_types import QuestionData
+
+_BANK_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_YEAR_RE = re.compile(r"(?<!\d)(?:19|20)\d\d(?!\d)")
+_MARKS_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"\w+")
+# Too common in questions to narrow a search
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or that the
+    this to was were what which with write give state
+""".split())
+
+# (years, marks, keywords) of one question
+Features = Tuple[Tuple[int, ...], Optional[int], Tuple[str, ...]]
+
+
+def keywords(text: str) -> List[str]:
+    """Lower-cased indexable words of text, in order, without stopwords."""
+    return [
+        word for word in _WORD_RE.findall(text.lower())
+        if len(word) > 1 and word not in STOPWORDS
+    ]
+
+
+def analyze(question: QuestionData) -> Features:
+    """Extract the indexed years, marks and keywords of a question."""
+    year_text, marks_text = parse_meta_info(question['meta'])
+    years = tuple(sorted({int(year) for year in _YEAR_RE.findall(year_text)}))
+    marks = _MARKS_RE.search(marks_text)
+    words = tuple(dict.fromkeys(map(sys.intern, keywords(clean_chemistry_text(question['q'])))))
+    return years, int(marks.group(0)) if marks else None, words
+
+
+def _fingerprint(question: QuestionData) -> bytes:
+    item = json.dumps([question['q'], question['meta']], ensure_ascii=False)
+    return hashlib.blake2b(item.encode(), digest_size=16).digest()
+
+
+@dataclass(frozen=True)
+class IndexStats:
+    """How an index was built."""
+    questions: int
+    analyzed: int  # questions whose text was cleaned and tokenized
+    reused: int    # questions whose analysis was carried over from the last version
+    kept: int      # leading questions whose postings were kept as they were
+
+
+class BankIndex:
+    """Inverted indexes over one compiled bank."""
+
+    def __init__(self, bank: QuestionBank, previous: Optional["BankIndex"] = None):
+        """
+        Args:
+            bank: The mapped bank to index
+            previous: Index of the bank's last version, reused where unchanged
+        """
+        self.bank = bank
+        self.years: Dict[int, array] = {}
+        self.marks: Dict[int, array] = {}
+        self.words: Dict[str, array] = {}
+        self._fingerprints: List[bytes] = []
+        self._features: Dict[bytes, Features] = {}
+        self.stats = self._build(previous)
+
+    def _build(self, previous: Optional["BankIndex"]) -> IndexStats:
+        old_fingerprints = previous._fingerprints if previous is not None else []
+        old_features = previous._features if previous is not None else {}
+        kept = analyzed = reused = 0
+        in_prefix = True
+        for position, question in enumerate(self.bank):
+            fingerprint = _fingerprint(question)
+            self._fingerprints.append(fingerprint)
+            if in_prefix:
+                if position < len(old_fingerprints) and old_fingerprints[position] == fingerprint:
+                    self._features[fingerprint] = old_features[fingerprint]
+                    kept += 1
+                    continue
+                in_prefix = False
+                self._keep_postings(previous, kept)
+
+            features = self._features.get(fingerprint) or old_features.get(fingerprint)
+            if features is None:
+                features = analyze(question)
+                analyzed += 1
+            else:
+                reused += 1
+            self._features[fingerprint] = features
+            years, marks, words = features
+            for year in years:
+                self.years.setdefault(year, array("I")).append(position)
+            if marks is not None:
+                self.marks.setdefault(marks, array("I")).append(position)
+            for word in words:
+                self.words.setdefault(word, array("I")).append(position)
+        if in_prefix:
+            self._keep_postings(previous, kept)
+        return IndexStats(len(self._fingerprints), analyzed, reused, kept)
+
+    def _keep_postings(self, previous: Optional["BankIndex"], kept: int) -> None:
+        """Copy the previous version's postings for the unchanged first kept questions."""
+        if not kept:
+            return
+        for name in ("years", "marks", "words"):
+            postings = getattr(self, name)
+            for key, positions in getattr(previous, name).items():
+                cut = bisect_left(positions, kept)
+                if cut:
+                    postings[key] = positions[:cut]
+
+    def __len__(self) -> int:
+        return len(self.bank)
+
+    def query(
+        self,
+        years: Iterable[int] = (),
+        marks: Iterable[int] = (),
+        text: str = ""
+    ) -> Sequence[int]:
+        """
+        Positions of the questions matching every given criterion.
+
+        Args:
+            years: Match questions from any of these years
+            marks: Match questions worth any of these marks
+            text: Match questions containing every keyword of this text
+
+        Returns:
+            Ascending bank positions (every position if nothing is given;
+            none if text is given but has no indexable words)
+        """
+        words = list(dict.fromkeys(keywords(text)))
+        if text.strip() and not words:
+            return []
+        groups = []
+        for index, values in ((self.years, years), (self.marks, marks)):
+            values = list(values)
+            if values:
+                groups.append(_union([index.get(value, ()) for value in values]))
+        for word in words:
+            groups.append(self.words.get(word, ()))
+        if not groups:
+            return range(len(self))
+
+        groups.sort(key=len)
+        result = groups[0]
+        for postings in groups[1:]:
+            if not result:
+                break
+            result = [position for position in result if _contains(postings, position)]
+        return result
+
+    def questions(self, positions: Iterable[int]) -> List[QuestionData]:
+        """The questions at the given positions."""
+        return [self.bank[position] for position in positions]
+
+    def summary(self) -> Dict:
+        """Question count and the year and marks values available to query."""
+        return {
+            "questions": len(self),
+            "years": {year: len(positions) for year, positions in sorted(self.years.items())},
+            "marks": {marks: len(positions) for marks, positions in sorted(self.marks.items())},
+            "keywords": len(self.words),
+        }
+
+
+def _union(postings: List[Sequence[int]]) -> Sequence[int]:
+    if len(postings) == 1:
+        return postings[0]
+    merged = array("I")
+    for position in heapq.merge(*postings):
+        if not merged or merged[-1] != position:
+            merged.append(position)
+    return merged
+
+
+def _contains(postings: Sequence[int], position: int) -> bool:
+    index = bisect_left(postings, position)
+    return index < len(postings) and postings[index] == position
+
+
+class BankRegistry:
+    """Named, indexed banks stored as compiled files in one directory."""
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Where compiled banks are kept; existing ones are
+                indexed on first use
+        """
+        self.directory = directory
+        self._indexes: Dict[str, BankIndex] = {}
+        self._loading: Dict[str, Future] = {}  # name -> index being built from disk
+        self._lock = Lock()  # guards _indexes and _loading
+        self._write_lock = Lock()  # serializes uploads
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def valid_name(name: str) -> bool:
+        return bool(_BANK_NAME.match(name))
+
+    def names(self) -> List[str]:
+        """Names of the stored banks."""
+        return sorted(
+            entry.name[:-len(BANK_SUFFIX)] for entry in os.scandir(self.directory)
+            if entry.name.endswith(BANK_SUFFIX) and self.valid_name(entry.name[:-len(BANK_SUFFIX)])
+        )
+
+    def get(self, name: str) -> Optional[BankIndex]:
+        """
+        A bank's index, loading it from disk on first use; None if unknown.
+
+        The index is built outside the registry lock, so loading one large
+        bank doesn't hold up requests for the others; concurrent first
+        requests for the same bank wait for a single load.
+        """
+        if not self.valid_name(name):
+            return None
+        with self._lock:
+            index = self._indexes.get(name)
+            if index is not None:
+                return index
+            loading = self._loading.get(name)
+            if loading is None:
+                path = self._path(name)
+                if not os.path.exists(path):
+                    return None
+                loading = self._loading[name] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return loading.result()
+
+        try:
+            index = BankIndex(QuestionBank(path))
+        except FileNotFoundError:
+            index = None  # deleted meanwhile
+        except BaseException as exc:
+            with self._lock:
+                if self._loading.get(name) is loading:
+                    del self._loading[name]
+            loading.set_exception(exc)
+            raise
+        with self._lock:
+            # Unless put() or delete() replaced the bank while it loaded
+            if self._loading.get(name) is loading:
+                del self._loading[name]
+                if index is not None:
+                    self._indexes[name] = index
+        loading.set_result(index)
+        return index
+
+    def put(self, name: str, questions: Iterable[QuestionData]) -> IndexStats:
+        """
+        Store a new version of a bank and re-index it incrementally.
+
+        The stored file is replaced only once the questions are all written,
+        so a failed upload leaves the previous version in place. Requests
+        already reading the previous version keep their mapping of it.
+
+        Raises:
+            ValueError: For an invalid name
+        """
+        if not self.valid_name(name):
+            raise ValueError(f"Invalid bank name {name!r}")
+        with self._write_lock:
+            previous = self.get(name)
+            write_bank(questions, self._path(name))
+            index = BankIndex(QuestionBank(self._path(name)), previous)
+            with self._lock:
+                self._indexes[name] = index
+                self._loading.pop(name, None)
+        return index.stats
+
+    def delete(self, name: str) -> bool:
+        """Remove a bank; False if there was none."""
+        if not self.valid_name(name):
+            return False
+        with self._lock:
+            self._indexes.pop(name, None)
+            self._loading.pop(name, None)
+            try:
+                os.unlink(self._path(name))
+            except FileNotFoundError:
+                return False
+        return True
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name + BANK_SUFFIX)
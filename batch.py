@@ -0,0 +1,233 @@
+"""
+Batch Deck Building
+Builds one deck per uploaded JSON file on a process pool and streams the
+results back as a zip, entry by entry, in the order the decks finish.
+Every input is validated on its own: a bad file gets an error entry in the
+zip's report instead of failing the whole batch.
+"""
+
+import io
+import json
+import posixpath
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from itertools import chain
+from typing import IO, TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from formula_images import FormulaSettings
+    from generate_ppt import Compression
+
+REPORT_NAME = "report.json"
+# Ceiling on the total uncompressed size of an uploaded zip (zip bomb guard)
+MAX_ZIP_UNCOMPRESSED = 128 * 1024 * 1024
+
+BatchInput = Tuple[str, bytes]  # (file name, JSON bytes)
+# Windows drive prefix of a member name, e.g. "C:"
+_DRIVE = re.compile(r"^[A-Za-z]:")
+
+
+class BatchInputError(ValueError):
+    """Raised when an uploaded zip can't be read as a batch of JSON files."""
+
+
+def read_zip_inputs(stream: IO[bytes], max_uncompressed: int = MAX_ZIP_UNCOMPRESSED) -> List[BatchInput]:
+    """
+    Read the .json members of an uploaded zip.
+
+    Args:
+        stream: Seekable binary stream of the zip
+        max_uncompressed: Limit on the summed size of the .json members
+
+    Returns:
+        (member path, bytes) pairs in archive order
+
+    Raises:
+        BatchInputError: If the zip is unreadable or too large once unpacked
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as exc:
+        raise BatchInputError(f"Invalid zip file: {exc}") from None
+
+    with archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith(".json")
+            and not info.filename.startswith("__MACOSX/")
+        ]
+        if sum(info.file_size for info in members) > max_uncompressed:
+            raise BatchInputError("Zip contents are too large")
+        try:
+            return [(info.filename, archive.read(info)) for info in members]
+        except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as exc:
+            raise BatchInputError(f"Invalid zip file: {exc}") from None
+
+
+def deck_name(input_name: str, taken: set) -> str:
+    """
+    Name a deck after its input file, keeping any folder structure and
+    numbering duplicates ("a.pptx", "a (2).pptx"). The name is always a
+    relative path inside the archive: drive letters, absolute roots, "."
+    and ".." (zip-slip) are dropped.
+    """
+    path = posixpath.normpath(input_name.replace("\\", "/"))
+    parts = [part for part in path.split("/") if part not in ("", ".", "..")]
+    if parts and _DRIVE.match(parts[0]):
+        parts[0] = _DRIVE.sub("", parts[0])
+        parts = [part for part in parts if part]
+    stem = posixpath.splitext("/".join(parts))[0] or "deck"
+    name, n = f"{stem}.pptx", 1
+    while name in taken or name == REPORT_NAME:
+        n += 1
+        name = f"{stem} ({n}).pptx"
+    taken.add(name)
+    return name
+
+
+def build_item(
+    data: bytes,
+    backend: str,
+    slide_style: str = "inline",
+    compression: Optional["Compression"] = None,
+    template: Optional[str] = None,
+    formula_settings: Optional["FormulaSettings"] = None,
+    formula_cache_dir: Optional[str] = None
+) -> Tuple[bytes, int]:
+    """
+    Validate one JSON file and build its deck (runs in a worker process).
+
+    Returns:
+        (deck bytes, slide count)
+
+    Raises:
+        ValueError: On invalid JSON, encoding or questions, or an empty array
+    """
+    # Imported here so only worker processes pay for them
+    from formula_images import process_renderer
+    from generate_ppt import write_presentation
+    from ingest import iter_questions
+
+    deck = io.BytesIO()
+    questions = iter_questions(io.BytesIO(data))
+    first = next(questions, None)
+    if first is None:
+        raise ValueError("JSON array is empty")
+    slide_count = write_presentation(
+        chain([first], questions), deck, backend=backend,
+        slide_style=slide_style, compression=compression, template=template,
+        formulas=process_renderer(formula_cache_dir, formula_settings) if formula_settings else None
+    )
+    return deck.getvalue(), slide_count
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable stream that hands written bytes back on demand."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_batch(
+    inputs: Iterable[BatchInput],
+    executor: Executor,
+    max_in_flight: int,
+    backend: str = "pptx",
+    slide_style: str = "inline",
+    compression: Optional["Compression"] = None,
+    template: Optional[str] = None,
+    formula_settings: Optional["FormulaSettings"] = None,
+    formula_cache_dir: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Build every input's deck and yield a zip of them as bytes.
+
+    Decks are added as they finish, so the first arrive before the last are
+    built. A report.json listing each input's outcome, in input order,
+    closes the archive.
+
+    Args:
+        inputs: (file name, JSON bytes) pairs
+        executor: Process pool running build_item()
+        max_in_flight: Most inputs submitted to the pool at once
+        backend: Rendering backend for every deck
+        slide_style: Slide style for every deck
+        compression: Package compression of every deck
+        template: Path of the .pptx template every deck is built on
+        formula_settings: Render complex formulas as images with these
+            settings (None: as text), caching them in formula_cache_dir
+        formula_cache_dir: Formula image cache shared with the workers
+    """
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED)
+    report: Dict[int, Dict] = {}  # input index -> outcome
+    taken: set = set()
+    pending: Dict = {}
+    queue = deque(enumerate(inputs))
+
+    try:
+        while queue or pending:
+            while queue and len(pending) < max_in_flight:
+                index, (name, data) = queue.popleft()
+                if not name.lower().endswith(".json"):
+                    report[index] = {"file": name, "status": "error", "error": "Not a JSON file"}
+                    continue
+                future = executor.submit(
+                    build_item, data, backend, slide_style, compression, template,
+                    formula_settings, formula_cache_dir
+                )
+                pending[future] = (index, name)
+            if not pending:
+                continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, name = pending.pop(future)
+                try:
+                    deck, slide_count = future.result()
+                except ValueError as exc:
+                    report[index] = {"file": name, "status": "error", "error": _describe(exc)}
+                    continue
+                except Exception as exc:
+                    report[index] = {"file": name, "status": "error", "error": f"Server error: {exc}"}
+                    continue
+                output = deck_name(name, taken)
+                # Decks are already packaged at the chosen level; storing them saves CPU
+                archive.writestr(output, deck)
+                report[index] = {"file": name, "status": "ok", "deck": output, "slides": slide_count}
+                yield sink.drain()
+
+        archive.writestr(
+            REPORT_NAME,
+            json.dumps([report[i] for i in sorted(report)], indent=2, ensure_ascii=False),
+            compress_type=zipfile.ZIP_DEFLATED
+        )
+        archive.close()
+        yield sink.drain()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _describe(exc: Exception) -> str:
+    """Per-file error message, worded like /generate's error responses."""
+    if isinstance(exc, json.JSONDecodeError):
+        return f"Invalid JSON format: {exc}"
+    if isinstance(exc, UnicodeDecodeError):
+        return "File encoding error. Please use UTF-8 encoded JSON."
+    return str(exc)
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the PPT generator.
+Run each module from the repository root, e.g. ``python -m benchmarks.bench_text``.
+"""
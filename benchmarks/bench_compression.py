@@ -0,0 +1,68 @@
+"""
+Deck Compression Benchmark
+Size against time for each compression level and deflate thread count:
+saving an already built python-pptx deck, and a whole streamed build.
+
+Usage:
+    python -m benchmarks.bench_compression [--slides 5000] [--levels 0 1 6 9] [--threads 1 2 4]
+"""
+
+import argparse
+import io
+import itertools
+import os
+import time
+from typing import List
+
+from generate_ppt import Compression, QuestionData, SlideBuilder, write_presentation
+from ooxml_writer import save_presentation
+from pptx import Presentation
+from questions_data import questions_data
+
+
+def _questions(count: int) -> List[QuestionData]:
+    """Cycle the sample bank up to the requested number of questions."""
+    return list(itertools.islice(itertools.cycle(questions_data), count))
+
+
+def best_of(runs: int, build) -> float:
+    """Best wall-clock seconds of several calls."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        build()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--slides", type=int, default=5000)
+    parser.add_argument("--levels", type=int, nargs="+", default=[0, 1, 6, 9])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--runs", type=int, default=3, help="best of this many runs is reported")
+    args = parser.parse_args()
+
+    questions = _questions(args.slides)
+    prs = Presentation()
+    builder = SlideBuilder(prs, use_prototype=True)
+    for question in questions:
+        builder.create_slide(question)
+
+    print(f"{args.slides} slides, {os.cpu_count()} CPUs, best of {args.runs}")
+    print(f"{'level':>6} {'threads':>8} {'size KB':>9} {'save':>8} {'stream build':>13}")
+    for level in args.levels:
+        # Storing never deflates, so threads make no difference
+        for threads in args.threads if level else args.threads[:1]:
+            deck = io.BytesIO()
+            save_presentation(prs, deck, level, threads)
+            save = best_of(args.runs, lambda: save_presentation(prs, io.BytesIO(), level, threads))
+            stream = best_of(args.runs, lambda: write_presentation(
+                questions, io.BytesIO(), backend="stream", compression=Compression(level, threads)
+            ))
+            print(f"{level:>6} {threads:>8} {len(deck.getvalue()) / 1024:>9.0f} "
+                  f"{save:>7.2f}s {stream:>12.2f}s")
+
+
+if __name__ == "__main__":
+    main()
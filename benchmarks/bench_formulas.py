@@ -0,0 +1,71 @@
+"""
+Formula Image Benchmark
+Times building a deck with formulas rendered as images (needs matplotlib):
+cold, with formulas rendered in the building thread or on the render pool
+while slides are built, then warm from the on-disk cache and from memory.
+Also reports how many pictures share each media part.
+
+Usage:
+    python -m benchmarks.bench_formulas [--size 2000] [--distinct 200] [--workers 2]
+"""
+
+import argparse
+import io
+import tempfile
+import time
+import zipfile
+
+from benchmarks.synthetic import generate_questions
+from formula_images import FormulaRenderer, formulas_available
+from generate_ppt import write_presentation
+
+
+def build(questions, renderer) -> float:
+    """Seconds to build the deck into memory."""
+    start = time.perf_counter()
+    write_presentation(questions, io.BytesIO(), backend="stream", formulas=renderer)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=200,
+                        help="distinct extra fractions spread over the questions")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not formulas_available():
+        parser.error("formula rendering needs matplotlib")
+
+    questions = generate_questions(args.size, args.seed)
+    for index in range(0, args.size, max(1, args.size // args.distinct)):
+        number = index // max(1, args.size // args.distinct)
+        questions[index]["q"] += f" Hence find $E=\\frac{{{number + 1}}}{{{number + 2}}}$."
+
+    print(f"{'run':>22} {'seconds':>8} {'renders':>8}")
+    print(f"{'text only':>22} {build(questions, None):>8.2f} {'':>8}")
+    for label, workers in (("cold, inline", 0), (f"cold, {args.workers} workers", args.workers)):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            renderer = FormulaRenderer(cache_dir, workers=workers)
+            seconds = build(questions, renderer)
+            print(f"{label:>22} {seconds:>8.2f} {renderer.renders:>8}")
+            renderer.close()
+            if workers:
+                warm = FormulaRenderer(cache_dir, workers=workers)
+                print(f"{'warm, disk cache':>22} {build(questions, warm):>8.2f} {warm.renders:>8}")
+                print(f"{'warm, in memory':>22} {build(questions, warm):>8.2f} {warm.renders:>8}")
+                deck = io.BytesIO()
+                write_presentation(questions, deck, backend="stream", formulas=warm)
+                warm.close()
+    with zipfile.ZipFile(deck) as package:
+        media = sum(name.startswith("ppt/media/formula-") for name in package.namelist())
+        pictures = sum(
+            package.read(name).count(b"<p:pic>")
+            for name in package.namelist() if name.startswith("ppt/slides/slide")
+        )
+    print(f"{pictures} formula pictures share {media} media parts")
+
+
+if __name__ == "__main__":
+    main()
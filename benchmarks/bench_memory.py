@@ -0,0 +1,60 @@
+"""
+Question Memory Benchmark
+Compares the memory held by a parsed question bank as a list of
+QuestionData dicts with the same bank as a QuestionTable, measured with
+tracemalloc on seeded synthetic banks.
+
+Usage:
+    python -m benchmarks.bench_memory [--sizes 10000 100000]
+"""
+
+import argparse
+import gc
+import io
+import json
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from benchmarks.synthetic import generate_questions
+from ingest import iter_questions
+from question_types import QuestionTable
+
+
+def retained(load: Callable[[], object]) -> Tuple[int, int, float]:
+    """Bytes still allocated by load()'s result, peak bytes while loading, and seconds."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'questions':>10} {'layout':>7} {'held MB':>9} {'B/question':>11} {'peak MB':>9} {'load s':>7}")
+    for size in args.sizes:
+        upload = json.dumps(generate_questions(size, args.seed)).encode()
+        loaders = {
+            "dicts": lambda: list(iter_questions(io.BytesIO(upload))),
+            "table": lambda: QuestionTable(iter_questions(io.BytesIO(upload))),
+        }
+        held = {}
+        for name, load in loaders.items():
+            current, peak, elapsed = retained(load)
+            held[name] = current
+            print(f"{size:>10} {name:>7} {current / 2**20:>9.1f} {current / size:>11.0f} "
+                  f"{peak / 2**20:>9.1f} {elapsed:>7.2f}")
+        print(f"{'':>10} {'':>7} table holds {held['table'] / held['dicts']:.0%} of the dicts' memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Parallel Build Benchmark
+Measures end-to-end deck build time (render, merge, compress, write) as
+the number of worker processes grows.
+
+Usage:
+    python -m benchmarks.bench_parallel [--slides 20000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from generate_ppt import QuestionData, render_shard, write_presentation
+from questions_data import questions_data
+
+
+def _questions(count: int) -> List[QuestionData]:
+    """Cycle the sample bank up to the requested number of questions."""
+    return list(itertools.islice(itertools.cycle(questions_data), count))
+
+
+def build_seconds(questions: List[QuestionData], workers: int) -> float:
+    """Build the deck into memory and return wall-clock seconds."""
+    if workers == 1:
+        start = time.perf_counter()
+        write_presentation(questions, io.BytesIO(), backend="stream")
+        return time.perf_counter() - start
+    # Warm the pool outside the timing, as a long-running server would
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(render_shard, [questions[:1]] * workers))
+        start = time.perf_counter()
+        write_presentation(questions, io.BytesIO(), workers=workers, executor=executor)
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--slides", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    questions = _questions(args.slides)
+    print(f"{args.slides} slides, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'slides/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        seconds = build_seconds(questions, workers)
+        baseline = baseline or seconds
+        print(f"{workers:>8} {seconds:>9.2f} {args.slides / seconds:>10.0f} {baseline / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Slide Style Benchmark
+Compares "inline" slides, which repeat every shape's styling, with "master"
+slides, which fill placeholders of a styled layout: file size, slide XML
+size, python-pptx build and save time, and streamed build time.
+
+Usage:
+    python -m benchmarks.bench_slide_style [--slides 1000] [--runs 3]
+"""
+
+import argparse
+import io
+import itertools
+import time
+import zipfile
+from typing import List, Tuple
+
+from generate_ppt import SLIDE_STYLES, QuestionData, SlideBuilder, write_presentation
+from pptx import Presentation
+from questions_data import questions_data
+
+
+def _questions(count: int) -> List[QuestionData]:
+    """Cycle the sample bank up to the requested number of questions."""
+    return list(itertools.islice(itertools.cycle(questions_data), count))
+
+
+def pptx_seconds(questions: List[QuestionData], slide_style: str) -> Tuple[float, float, bytes]:
+    """Build with python-pptx, timing slide building and prs.save separately."""
+    prs = Presentation()
+    start = time.perf_counter()
+    builder = SlideBuilder(prs, use_prototype=True, slide_style=slide_style)
+    for question in questions:
+        builder.create_slide(question)
+    built = time.perf_counter()
+    deck = io.BytesIO()
+    prs.save(deck)
+    return built - start, time.perf_counter() - built, deck.getvalue()
+
+
+def stream_seconds(questions: List[QuestionData], slide_style: str) -> float:
+    """Build through the streaming writer."""
+    start = time.perf_counter()
+    write_presentation(questions, io.BytesIO(), backend="stream", slide_style=slide_style)
+    return time.perf_counter() - start
+
+
+def slide_xml_bytes(deck: bytes) -> int:
+    """Uncompressed size of every slide part."""
+    with zipfile.ZipFile(io.BytesIO(deck)) as package:
+        return sum(
+            info.file_size for info in package.infolist()
+            if info.filename.startswith("ppt/slides/slide")
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--slides", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3, help="best of this many runs is reported")
+    args = parser.parse_args()
+
+    questions = _questions(args.slides)
+    print(f"{args.slides} questions, best of {args.runs}")
+    print(f"{'style':>8} {'file KB':>8} {'slide XML KB':>13} {'pptx build':>11} "
+          f"{'pptx save':>10} {'stream':>8}")
+    for slide_style in SLIDE_STYLES:
+        runs = [pptx_seconds(questions, slide_style) for _ in range(args.runs)]
+        build = min(run[0] for run in runs)
+        save = min(run[1] for run in runs)
+        deck = runs[0][2]
+        stream = min(stream_seconds(questions, slide_style) for _ in range(args.runs))
+        print(f"{slide_style:>8} {len(deck) / 1024:>8.0f} {slide_xml_bytes(deck) / 1024:>13.0f} "
+              f"{build:>10.2f}s {save:>9.2f}s {stream:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Slide Building Benchmark
+Compares slides/sec of the property-by-property SlideBuilder path with
+prototype-slide cloning.
+
+Usage:
+    python -m benchmarks.bench_slides [--sizes 1000 10000]
+"""
+
+import argparse
+import itertools
+import time
+from typing import List
+
+from pptx import Presentation
+
+from generate_ppt import QuestionData, SlideBuilder
+from questions_data import questions_data
+
+
+def _questions(count: int) -> List[QuestionData]:
+    """Cycle the sample bank up to the requested number of questions."""
+    return list(itertools.islice(itertools.cycle(questions_data), count))
+
+
+def build_rate(questions: List[QuestionData], use_prototype: bool) -> float:
+    """Build every slide into a fresh deck and return slides per second."""
+    prs = Presentation()
+    builder = SlideBuilder(prs, use_prototype=use_prototype)
+    start = time.perf_counter()
+    for question in questions:
+        builder.create_slide(question)
+    return len(questions) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'slides':>8} {'standard/s':>12} {'prototype/s':>12} {'speedup':>8}")
+    for size in args.sizes:
+        questions = _questions(size)
+        standard = build_rate(questions, use_prototype=False)
+        prototype = build_rate(questions, use_prototype=True)
+        print(f"{size:>8} {standard:>12.0f} {prototype:>12.0f} {prototype / standard:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Text Cleaning Benchmark
+Compares the compiled single-pass LaTeX cleaner with the original
+multi-pass implementation on the sample question bank.
+
+Usage:
+    python -m benchmarks.bench_text [--repeat N]
+"""
+
+import argparse
+import re
+import time
+from typing import Callable, List, Optional
+
+from generate_ppt import LATEX_REPLACEMENTS, SUBSCRIPT_MAP, SUPERSCRIPT_MAP
+from generate_ppt import clean_chemistry_text, clean_many
+from generate_ppt import DEFAULT_TEXT_CACHE_SIZE, clear_text_cache, configure_text_cache
+from questions_data import questions_data
+
+
+def legacy_clean_chemistry_text(text: Optional[str]) -> str:
+    """Original implementation: one str.replace per symbol, then six re.sub passes."""
+    if not text:
+        return ""
+    text = re.sub(r"\\frac\{([^}]+)\}\{([^}]+)\}", lambda m: f"({m.group(1)}/{m.group(2)})", text)
+    for latex, unicode_char in LATEX_REPLACEMENTS.items():
+        text = text.replace(latex, unicode_char)
+    text = text.replace("$", "")
+    text = re.sub(r"\^\{([^}]+)\}", lambda m: m.group(1).translate(SUPERSCRIPT_MAP), text)
+    text = re.sub(r"\^([0-9])", lambda m: m.group(1).translate(SUPERSCRIPT_MAP), text)
+    text = re.sub(r"_\{([^}]+)\}", lambda m: m.group(1).translate(SUBSCRIPT_MAP), text)
+    text = re.sub(r"_([0-9])", lambda m: m.group(1).translate(SUBSCRIPT_MAP), text)
+    text = re.sub(r"\\([a-zA-Z]+)", r"\1", text)
+    text = text.replace("  ", " ")
+    return text.strip()
+
+
+def _time(func: Callable[[], object], repeat: int) -> float:
+    """Return the best wall-clock time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per case")
+    parser.add_argument("--scale", type=int, default=100, help="copies of the sample bank")
+    args = parser.parse_args()
+
+    texts: List[str] = [q["q"] for q in questions_data] * args.scale
+
+    # Outputs agree except where the old pass order shadowed a longer symbol
+    mismatches = sum(
+        1 for text in texts[:len(questions_data)]
+        if legacy_clean_chemistry_text(text) != clean_chemistry_text(text)
+    )
+
+    # Time the tokenizer itself, then the memoized path on a warm cache
+    configure_text_cache(0)
+    legacy = _time(lambda: [legacy_clean_chemistry_text(t) for t in texts], args.repeat)
+    single = _time(lambda: [clean_chemistry_text(t) for t in texts], args.repeat)
+    batch = _time(lambda: clean_many(texts), args.repeat)
+    configure_text_cache(DEFAULT_TEXT_CACHE_SIZE)
+    clear_text_cache()
+    cached = _time(lambda: clean_many(texts), args.repeat)
+
+    print(f"Texts: {len(texts)}  (output mismatches vs legacy: {mismatches})")
+    print(f"  legacy multi-pass : {legacy * 1000:8.1f} ms")
+    print(f"  single-pass       : {single * 1000:8.1f} ms  ({legacy / single:.2f}x)")
+    print(f"  clean_many        : {batch * 1000:8.1f} ms  ({legacy / batch:.2f}x)")
+    print(f"  clean_many cached : {cached * 1000:8.1f} ms  ({legacy / cached:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
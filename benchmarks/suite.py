@@ -0,0 +1,213 @@
+"""
+Benchmark Suite
+Times each stage of deck generation on seeded synthetic question banks,
+writes the results as JSON and optionally fails on regressions against a
+stored baseline.
+
+Stages:
+    clean_chemistry_text   LaTeX cleaning of every question (text caches off)
+    parse_meta_info        meta parsing of every question (text caches off)
+    create_slide           SlideBuilder.create_slide, property-by-property path
+    create_slide_prototype SlideBuilder.create_slide, prototype-cloning path
+    save                   prs.save of a finished deck
+    generate               POST /generate end to end via the Flask test client
+
+Slide stages are capped per stage (see STAGE_LIMITS) because the larger
+decks need minutes and gigabytes; raise the caps with --max-slides.
+
+Usage:
+    python -m benchmarks.suite [--sizes 100 1000 10000 100000] [--output results.json]
+    python -m benchmarks.suite --compare baseline.json [--tolerance 0.15]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from pptx import Presentation
+
+# The whole-deck result cache would answer repeated uploads without building
+os.environ.setdefault("RESULT_CACHE_MAX_BYTES", "0")
+
+from generate_ppt import (
+    DEFAULT_TEXT_CACHE_SIZE, QuestionData, SlideBuilder,
+    clean_chemistry_text, configure_text_cache, parse_meta_info
+)
+from benchmarks.synthetic import generate_questions
+from app import app, slide_cache  # after the environment override above
+
+SIZES = [100, 1000, 10000, 100000]
+# Largest size each stage runs at by default
+STAGE_LIMITS = {
+    "clean_chemistry_text": None,
+    "parse_meta_info": None,
+    "create_slide": 1000,  # python-pptx's add_slide is quadratic in deck size
+    "create_slide_prototype": 10000,
+    "save": 10000,
+    "generate": 10000,
+}
+# Stop repeating a measurement once this much time has been spent on it
+_TIME_BUDGET = 10.0
+
+
+def _best_time(setup: Callable[[], object], run: Callable[[object], object], repeat: int) -> float:
+    """Best wall-clock time of run(setup()) over several runs, in seconds."""
+    best = float("inf")
+    spent = 0.0
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent > _TIME_BUDGET:
+            break
+    return best
+
+
+def _build(questions: List[QuestionData], use_prototype: bool) -> Presentation:
+    prs = Presentation()
+    builder = SlideBuilder(prs, use_prototype=use_prototype)
+    for question in questions:
+        builder.create_slide(question)
+    return prs
+
+
+def _stage_runners(questions: List[QuestionData]) -> Dict[str, Callable[[int], float]]:
+    """Map each stage name to a function timing it with a given repeat count."""
+    app.config['MAX_CONTENT_LENGTH'] = None
+    client = app.test_client()
+    upload = json.dumps(questions).encode()
+
+    def post(_):
+        response = client.post('/generate', data={
+            'jsonFile': (io.BytesIO(upload), 'bench.json'),
+            'backend': 'stream',
+        })
+        response.close()
+        if response.status_code != 200:
+            raise RuntimeError(f"/generate returned {response.status_code}")
+
+    def build(use_prototype: bool):
+        return lambda _: _build(questions, use_prototype)
+
+    return {
+        "clean_chemistry_text": lambda repeat: _best_time(
+            lambda: None, lambda _: [clean_chemistry_text(q['q']) for q in questions], repeat),
+        "parse_meta_info": lambda repeat: _best_time(
+            lambda: None, lambda _: [parse_meta_info(q['meta']) for q in questions], repeat),
+        "create_slide": lambda repeat: _best_time(lambda: None, build(False), repeat),
+        "create_slide_prototype": lambda repeat: _best_time(lambda: None, build(True), repeat),
+        "save": lambda repeat: _best_time(
+            lambda: _build(questions, True), lambda prs: prs.save(io.BytesIO()), repeat),
+        # Each upload starts with a cold slide cache, like a first build
+        "generate": lambda repeat: _best_time(slide_cache.clear, post, repeat),
+    }
+
+
+def run_suite(
+    sizes: List[int],
+    stages: List[str],
+    repeat: int,
+    seed: int,
+    max_slides: Optional[int] = None
+) -> Dict:
+    """
+    Time every stage at every size within its limit.
+
+    Returns:
+        JSON-ready dict: {"environment": {...}, "results": {stage: {size: {...}}}}
+    """
+    configure_text_cache(0)
+    results: Dict[str, Dict[str, Dict[str, float]]] = {stage: {} for stage in stages}
+    try:
+        for size in sizes:
+            questions = generate_questions(size, seed)
+            runners = _stage_runners(questions)
+            for stage in stages:
+                limit = STAGE_LIMITS[stage] if max_slides is None or STAGE_LIMITS[stage] is None else max_slides
+                if limit is not None and size > limit:
+                    continue
+                seconds = runners[stage](repeat)
+                results[stage][str(size)] = {
+                    "seconds": seconds,
+                    "us_per_item": seconds / size * 1e6,
+                }
+                print(f"{stage:>24} {size:>8} {seconds:>10.3f}s {seconds / size * 1e6:>10.1f} us/item",
+                      file=sys.stderr)
+    finally:
+        configure_text_cache(DEFAULT_TEXT_CACHE_SIZE)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    List measurements slower than baseline by more than the tolerance.
+
+    Only stage/size pairs present in both runs are compared, by time per item.
+    """
+    regressions = []
+    for stage, by_size in current["results"].items():
+        for size, entry in by_size.items():
+            base = baseline.get("results", {}).get(stage, {}).get(size)
+            if base is None:
+                continue
+            ratio = entry["us_per_item"] / base["us_per_item"]
+            status = "REGRESSION" if ratio > 1 + tolerance else "ok"
+            print(f"{stage:>24} {size:>8} {ratio:>8.2f}x baseline  {status}")
+            if status != "ok":
+                regressions.append(f"{stage} @ {size}: {ratio:.2f}x baseline")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGE_LIMITS), default=list(STAGE_LIMITS))
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-slides", type=int, help="override the size cap of slide stages")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail if slower than this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed slowdown before failing, as a fraction (default 0.15)")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.stages, args.repeat, args.seed, args.max_slides)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    elif not args.compare:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
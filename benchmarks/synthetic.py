@@ -0,0 +1,93 @@
+"""
+Synthetic Question Bank
+Seeded generator of LaTeX-heavy questions in the shape of questions_data.py,
+for benchmarking at sizes beyond the sample bank.
+
+Usage:
+    python -m benchmarks.synthetic COUNT [--seed N] > questions.json
+"""
+
+import argparse
+import json
+import random
+import sys
+from typing import List
+
+from question_types import QuestionData
+
+_FORMULAS = [
+    "$H_{2}SO_{4}$", "$CaCO_{3}$", "$Fe^{3+}$", "$SO_{4}^{2-}$", "$NH_{4}^{+}$",
+    "$C_{6}H_{12}O_{6}$", "$Cu^{2+}$", "$H_2O$", "$CO_2$", "$Na_{2}CO_{3} \\cdot 10H_{2}O$",
+    "$\\Delta H$", "$\\Delta G^{\\circ}$", "$10^{-3}$ M", "$2.5 \\times 10^{5}$ Pa",
+    "$R_{1}$", "$V=\\frac{W}{Q}$", "$I=\\frac{Q}{t}$", "$\\lambda_{max}$", "$\\rho$",
+    "$\\alpha$-particles", "$\\theta = 30^{\\circ}$", "$\\sqrt{2}$", "$x^2 + y^2$",
+]
+_REACTIONS = [
+    "$Zn + CuSO_{4} \\rightarrow ZnSO_{4} + Cu$",
+    "$2H_{2} + O_{2} \\longrightarrow 2H_{2}O$",
+    "$N_{2} + 3H_{2} \\leftrightarrow 2NH_{3}$",
+    "$CaCO_{3} \\xrightarrow{\\Delta} CaO + CO_{2}$",
+    "$Fe_{2}O_{3} + 2Al \\rightarrow Al_{2}O_{3} + 2Fe$",
+]
+_STEMS = [
+    "Identify the oxidising agent in the reaction {r}.",
+    "Calculate the mass of {f} required to react completely with 25 g of {f2}.",
+    "Balance the following chemical equation: {r}",
+    "Why does {f} turn milky when passed through {f2}? Write the balanced equation.",
+    "State the law that relates {f} and {f2}. Give its S.I. unit.",
+    "A solution of {f} has pH $\\approx$ 4. Is it acidic or basic? Justify your answer.",
+    "Define the term \"{word}\" and give one example involving {f}.",
+    "Assertion (A): {f} is {word}.\nReason (R): {r}",
+]
+_WORDS = ["amphoteric", "displacement", "rancidity", "corrosion", "isomer", "catalyst", "electrolysis"]
+_OPTIONS = ["{f}", "{f2}", "only {f}", "both {f} and {f2}", "{r}", "none of these"]
+_METAS = [
+    "{y}", "{y} | {m} Marks", "Board Term 1, {y}", "{y}, AI {y2}", "Delhi {y} | {m} Mark",
+    "Foreign {y} | {m} Marks", "",
+]
+
+
+def generate_questions(count: int, seed: int = 0) -> List[QuestionData]:
+    """
+    Build a deterministic list of synthetic questions.
+
+    Roughly half are multiple choice; all mix formulas, reactions, fractions,
+    super/subscripts and Greek letters like the real bank.
+
+    Args:
+        count: Number of questions
+        seed: Random seed (same seed and count give the same questions)
+
+    Returns:
+        Question dictionaries with 'q' and 'meta' keys, numbered from 1
+    """
+    rng = random.Random(seed)
+    questions = []
+    for number in range(1, count + 1):
+        fill = {
+            "f": rng.choice(_FORMULAS),
+            "f2": rng.choice(_FORMULAS),
+            "r": rng.choice(_REACTIONS),
+            "word": rng.choice(_WORDS),
+        }
+        text = f"{number}. " + rng.choice(_STEMS).format(**fill)
+        if rng.random() < 0.5:
+            for label in "abcd":
+                fill["f"], fill["f2"] = rng.choice(_FORMULAS), rng.choice(_FORMULAS)
+                text += f"\n({label}) " + rng.choice(_OPTIONS).format(**fill)
+        year = rng.randint(2008, 2025)
+        meta = rng.choice(_METAS).format(y=year, y2=year - 1, m=rng.choice([1, 2, 3, 5]))
+        questions.append({"q": text, "meta": meta})
+    return questions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("count", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    json.dump(generate_questions(args.count, args.seed), sys.stdout, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Formula Images
+Renders LaTeX math segments to PNG (and optionally SVG) images offline,
+with matplotlib's mathtext, for formulas the Unicode text cleaner can only
+approximate (fractions, roots, arbitrary scripts).
+
+matplotlib is an optional dependency: it is imported only inside the
+rendering function, which runs on a process pool so slide building carries
+on while formulas render. Images are kept in a content-addressed on-disk
+cache, keyed by a hash of the formula and the render settings, so each
+distinct formula is rendered once across every deck and process:
+
+    CACHE_DIR/ab/abcdef....png    rendered image
+    CACHE_DIR/ab/abcdef....svg    vector version, if requested
+    CACHE_DIR/ab/abcdef....none   marker: mathtext can't parse the formula
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+# Bump when rendering changes so stale images are never reused
+FORMULA_FORMAT = "formula-v1"
+FORMULA_FORMATS = ("png", "svg")
+# Rendered images held in memory per renderer, most recently used kept
+MAX_LOADED_IMAGES = 1024
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_UNRENDERABLE = ".none"
+
+
+@dataclass(frozen=True)
+class FormulaSettings:
+    """How formulas are rendered; part of every image's cache key."""
+    format: str = "png"          # "png", or "svg" with a PNG fallback
+    color: Tuple[int, int, int] = (255, 255, 255)
+    points: int = 24             # font size rendered at; slides scale it
+    dpi: int = 300
+
+
+@dataclass(frozen=True)
+class FormulaImage:
+    """A rendered formula."""
+    key: str
+    png: bytes
+    svg: Optional[bytes]
+    width: float   # ems of the rendered font size
+    height: float
+
+    @property
+    def digest(self) -> str:
+        """Hash of the image content, shared by identical images."""
+        return hashlib.sha256(self.png).hexdigest()
+
+
+def formulas_available() -> bool:
+    """Whether matplotlib, needed to render formulas, is installed."""
+    import importlib.util
+
+    return importlib.util.find_spec("matplotlib") is not None
+
+
+def render_formula(latex: str, settings: FormulaSettings) -> Optional[Tuple[bytes, Optional[bytes]]]:
+    """
+    Render one formula with mathtext (runs in a worker process).
+
+    Args:
+        latex: Formula without its $ delimiters
+        settings: Output format, color and resolution
+
+    Returns:
+        (PNG bytes, SVG bytes or None), or None if mathtext can't parse it
+    """
+    import io
+
+    from matplotlib.figure import Figure
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.mathtext import MathTextParser
+
+    math = f"${latex}$"
+    prop = FontProperties(size=settings.points)
+    try:
+        width, height, depth, _, _ = MathTextParser("path").parse(math, dpi=72, prop=prop)
+    except ValueError:
+        return None
+    # As matplotlib.mathtext.math_to_image(), but on a transparent background
+    figure = Figure(figsize=(width / 72, height / 72))
+    color = "#%02x%02x%02x" % settings.color
+    figure.text(0, depth / height, math, fontproperties=prop, color=color)
+    outputs = []
+    for fmt in ("png", "svg") if settings.format == "svg" else ("png",):
+        buffer = io.BytesIO()
+        figure.savefig(buffer, dpi=settings.dpi, format=fmt, transparent=True)
+        outputs.append(buffer.getvalue())
+    return outputs[0], outputs[1] if len(outputs) > 1 else None
+
+
+def _png_size(png: bytes) -> Tuple[int, int]:
+    """Pixel width and height from a PNG's IHDR chunk."""
+    if png[:8] != _PNG_SIGNATURE:
+        raise ValueError("not a PNG image")
+    return struct.unpack(">II", png[16:24])
+
+
+class FormulaRenderer:
+    """
+    Cached, pooled formula rendering shared by every deck a process builds.
+
+    prefetch() queues formulas on the pool ahead of need; get() returns an
+    image from memory, the disk cache, a queued render or a new one. Safe
+    to use from several threads.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        settings: FormulaSettings = FormulaSettings(),
+        workers: Optional[int] = None,
+        executor: Optional["Executor"] = None
+    ):
+        """
+        Args:
+            cache_dir: Directory of the content-addressed image cache
+            settings: Render settings
+            workers: Render processes (default: one per CPU; 0 renders in
+                the calling thread)
+            executor: Pool to render on instead of starting one
+        """
+        if settings.format not in FORMULA_FORMATS:
+            raise ValueError(f"Unknown formula format {settings.format!r}; expected one of {FORMULA_FORMATS}")
+        self.cache_dir = cache_dir
+        self.settings = settings
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._executor = executor
+        self._own_executor = False
+        self._loaded: "OrderedDict[str, Optional[FormulaImage]]" = OrderedDict()
+        self._pending: Dict[str, "Future"] = {}
+        self._lock = threading.Lock()
+        self.renders = 0  # formulas rendered by this renderer (cache misses)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, latex: str) -> str:
+        """Cache key of a formula under these settings."""
+        return hashlib.sha256(repr((FORMULA_FORMAT, self.settings, latex)).encode()).hexdigest()
+
+    def prefetch(self, formulas: Iterable[str]) -> None:
+        """Start rendering formulas not already cached, without waiting."""
+        if not self.workers and self._executor is None:
+            return
+        for latex in formulas:
+            key = self.key(latex)
+            with self._lock:
+                if key in self._loaded or key in self._pending:
+                    continue
+            cached = self._cached(key)
+            if cached is not None:
+                self._remember(key, cached[0])
+                continue
+            with self._lock:
+                if key not in self._pending:
+                    self._pending[key] = self._pool().submit(render_formula, latex, self.settings)
+
+    def get(self, latex: str) -> Optional[FormulaImage]:
+        """
+        A formula's image, rendering it if it isn't cached.
+
+        Returns:
+            The image, or None if mathtext can't render the formula or the
+            render pool failed (the caller falls back to text; a pool
+            failure is not cached, so the formula is tried again next time)
+        """
+        key = self.key(latex)
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                return self._loaded[key]
+            future = self._pending.get(key)
+        if future is None:
+            cached = self._cached(key)
+            if cached is not None:
+                return self._remember(key, cached[0])
+            if not self.workers and self._executor is None:
+                rendered = render_formula(latex, self.settings)
+            else:
+                with self._lock:
+                    future = self._pending.get(key)
+                    if future is None:
+                        future = self._pending[key] = self._pool().submit(
+                            render_formula, latex, self.settings
+                        )
+        if future is not None:
+            try:
+                rendered = future.result()
+            except Exception:  # broken or shut-down pool, killed worker
+                return None
+            finally:
+                with self._lock:
+                    if self._pending.get(key) is future:
+                        del self._pending[key]
+        with self._lock:
+            if key in self._loaded:  # another thread stored the same render
+                return self._loaded[key]
+            self.renders += 1
+        image = self._store(key, rendered)
+        return self._remember(key, image)
+
+    def close(self) -> None:
+        """Shut down the render pool, if this renderer started it."""
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+            self._own_executor = False
+
+    def _pool(self) -> "Executor":
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._own_executor = True
+        return self._executor
+
+    def _remember(self, key: str, image: Optional[FormulaImage]) -> Optional[FormulaImage]:
+        with self._lock:
+            self._loaded[key] = image
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > MAX_LOADED_IMAGES:
+                self._loaded.popitem(last=False)
+        return image
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + suffix)
+
+    def _cached(self, key: str) -> Optional[Tuple[Optional[FormulaImage]]]:
+        """
+        Load an image from the disk cache.
+
+        Returns:
+            A 1-tuple of the image (None inside if the formula is known to be
+            unrenderable), or None on a cache miss
+        """
+        if os.path.exists(self._path(key, _UNRENDERABLE)):
+            return (None,)
+        try:
+            with open(self._path(key, ".png"), "rb") as f:
+                png = f.read()
+            svg = None
+            if self.settings.format == "svg":
+                with open(self._path(key, ".svg"), "rb") as f:
+                    svg = f.read()
+            return (self._image(key, png, svg),)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, rendered: Optional[Tuple[bytes, Optional[bytes]]]) -> Optional[FormulaImage]:
+        """Write a render to the disk cache and wrap it as an image."""
+        if rendered is None:
+            self._write(self._path(key, _UNRENDERABLE), b"")
+            return None
+        png, svg = rendered
+        if svg is not None:
+            self._write(self._path(key, ".svg"), svg)
+        self._write(self._path(key, ".png"), png)  # last: its presence marks the entry complete
+        return self._image(key, png, svg)
+
+    def _image(self, key: str, png: bytes, svg: Optional[bytes]) -> FormulaImage:
+        width, height = _png_size(png)
+        pixels_per_em = self.settings.dpi * self.settings.points / 72
+        return FormulaImage(key, png, svg, width / pixels_per_em, height / pixels_per_em)
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        """Write a cache file atomically; concurrent writers of one key agree on its content."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+# Renderers of this process by (cache directory, settings), see process_renderer()
+_process_renderers: Dict[Tuple[str, FormulaSettings], FormulaRenderer] = {}
+_process_renderers_lock = threading.Lock()
+
+
+def process_renderer(cache_dir: str, settings: FormulaSettings) -> FormulaRenderer:
+    """
+    This process's renderer for a cache directory and settings, rendering
+    in the calling thread (workers=0). Meant for deck builds that already
+    run on a pool worker (jobs, batches), which shouldn't start a render
+    pool of their own; reused by every build the worker runs.
+    """
+    with _process_renderers_lock:
+        renderer = _process_renderers.get((cache_dir, settings))
+        if renderer is None:
+            renderer = _process_renderers[cache_dir, settings] = FormulaRenderer(cache_dir, settings, workers=0)
+        return renderer
@@ -6,30 +6,95 @@ Author: Chemistry Teacher Assistant
 Date: 2025
 """
 
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from copy import deepcopy
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from functools import lru_cache, wraps
+from itertools import islice
+from typing import (
+    IO, TYPE_CHECKING, Any, Callable, Hashable, Iterable, Iterator, List, Dict, Optional, Tuple, Union
+)
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
 import re
+import threading
+import time
+from time import perf_counter
+
+from metrics import current_timings, stage
+from question_bank import BANK_SUFFIX, QuestionBank
+from question_types import QuestionData, QuestionRow, QuestionTable, question_number, split_meta
+from text_layout import EMU_PER_POINT, Flow, FlowFit, InlineBox, TextFit, TextFitter
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from pptx import Presentation
+    from formula_images import FormulaRenderer
+
+
+# =============================================================================
+# LAZY IMPORTS
+# =============================================================================
 
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
-from pptx.enum.shapes import MSO_SHAPE
+# python-pptx (with lxml) takes longer to import than the rest of the app
+# together, so its names are bound into this module on first use rather
+# than at import: text cleaning, the CLI's argument handling and web workers
+# that haven't built a deck yet never pay for it.
+_pptx_imported = False
+
+
+def _import_pptx() -> None:
+    """Import python-pptx and the OOXML writer; every slide-building entry point calls this."""
+    global _pptx_imported, Presentation, Inches, Pt, PP_ALIGN, RGBColor, MSO_SHAPE
+    global CT, RT, serialize_part_xml, Part, PackURI, parse_xml, SlidePart, etree
+    global CT_Picture, CT_Shape, CT_Slide, PP_PLACEHOLDER, nsdecls, qn
+    global StreamingPresentationWriter, save_presentation
+    if _pptx_imported:
+        return
+    from lxml import etree
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    from pptx.enum.text import PP_ALIGN
+    from pptx.dml.color import RGBColor
+    from pptx.enum.shapes import MSO_SHAPE, PP_PLACEHOLDER
+    from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+    from pptx.opc.oxml import serialize_part_xml
+    from pptx.opc.package import Part
+    from pptx.opc.packuri import PackURI
+    from pptx.oxml import parse_xml
+    from pptx.oxml.ns import nsdecls, qn
+    from pptx.oxml.shapes.autoshape import CT_Shape
+    from pptx.oxml.shapes.picture import CT_Picture
+    from pptx.oxml.slide import CT_Slide
+    from pptx.parts.slide import SlidePart
+    from ooxml_writer import StreamingPresentationWriter, save_presentation
+    _pptx_imported = True
 
 
 # =============================================================================
 # CONFIGURATION & CONSTANTS
 # =============================================================================
 
+# (r, g, b), converted to a python-pptx RGBColor (a tuple subclass) when applied
+Color = Tuple[int, int, int]
+
+
 @dataclass(frozen=True)
 class SlideColors:
     """Color scheme for presentation slides."""
-    background: RGBColor = RGBColor(0, 0, 0)
-    text: RGBColor = RGBColor(255, 255, 255)
-    year: RGBColor = RGBColor(0, 212, 255)      # Vibrant Cyan
-    marks: RGBColor = RGBColor(255, 179, 71)    # Golden Orange
-    accent_line: RGBColor = RGBColor(60, 60, 80)
-    question_badge: RGBColor = RGBColor(100, 100, 100)
+    background: Color = (0, 0, 0)
+    text: Color = (255, 255, 255)
+    year: Color = (0, 212, 255)      # Vibrant Cyan
+    marks: Color = (255, 179, 71)    # Golden Orange
+    accent_line: Color = (60, 60, 80)
+    question_badge: Color = (100, 100, 100)
 
 
 @dataclass(frozen=True)
@@ -52,6 +117,8 @@ class FontSettings:
     question_size: int = 18
     meta_size: int = 16
     badge_size: int = 12
+    min_question_size: int = 12  # long questions shrink to this, then continue
+    line_spacing: float = 1.2    # line height as a multiple of the font size
 
 
 # Default instances
@@ -59,6 +126,258 @@ COLORS = SlideColors()
 LAYOUT = SlideLayout()
 FONTS = FontSettings()
 
+# Default text box insets (EMU) that PowerPoint keeps clear of text
+_TEXT_INSET_X = 91440  # 0.1 inch left and right
+_TEXT_INSET_Y = 45720  # 0.05 inch top and bottom
+
+
+# =============================================================================
+# TEXT CACHE
+# =============================================================================
+
+DEFAULT_TEXT_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of a memoization cache's counters."""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class BoundedCache:
+    """Thread-safe LRU cache with hit/miss/eviction counters."""
+    
+    def __init__(self, maxsize: int = DEFAULT_TEXT_CACHE_SIZE):
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        
+        value = compute()
+        if self.maxsize <= 0:
+            return value
+        
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+        return value
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key (counting a hit or miss), else default."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value as the most recently used entry."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+    
+    def resize(self, maxsize: int) -> None:
+        """Change capacity, evicting least recently used entries if needed."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+    
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+    
+    def stats(self) -> CacheStats:
+        """Return a consistent snapshot of the counters."""
+        with self._lock:
+            return CacheStats(
+                self.hits, self.misses, self.evictions,
+                len(self._data), self.maxsize
+            )
+    
+    def _evict(self) -> None:
+        """Drop oldest entries beyond capacity (caller holds the lock)."""
+        while len(self._data) > max(self.maxsize, 0):
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+# One cache per memoized function, keyed by function name
+_TEXT_CACHES: Dict[str, BoundedCache] = {}
+
+
+def _memoized(func: Callable) -> Callable:
+    """Memoize a single-argument text function in a registered BoundedCache."""
+    cache = _TEXT_CACHES.setdefault(func.__name__, BoundedCache())
+    
+    @wraps(func)
+    def wrapper(text):
+        return cache.get_or_compute(text, lambda: func(text))
+    
+    wrapper.cache = cache
+    return wrapper
+
+
+def configure_text_cache(maxsize: int) -> None:
+    """
+    Set the capacity of every text cache.
+    
+    Args:
+        maxsize: Maximum entries per cached function (0 disables caching)
+    """
+    for cache in _TEXT_CACHES.values():
+        cache.resize(maxsize)
+
+
+def clear_text_cache() -> None:
+    """Empty every text cache and reset its counters."""
+    for cache in _TEXT_CACHES.values():
+        cache.clear()
+
+
+def text_cache_stats() -> Dict[str, CacheStats]:
+    """
+    Get counters for every text cache.
+    
+    Returns:
+        Mapping of function name to its cache statistics
+    """
+    return {name: cache.stats() for name, cache in _TEXT_CACHES.items()}
+
+
+# =============================================================================
+# TEMPLATE CACHE
+# =============================================================================
+
+# Distinct base templates kept parsed per process
+DEFAULT_TEMPLATE_CACHE_SIZE = 8
+# Slides are added on the template's 7th layout, "Blank" in python-pptx's own
+BLANK_LAYOUT_INDEX = 6
+
+
+class TemplateCache:
+    """
+    Parsed base presentations, loaded once per process and handed out as
+    isolated copies.
+    
+    Presentation() unzips and parses its template package on every call;
+    deep-copying one parsed earlier reads nothing and takes about half the
+    time. python-pptx's default template is keyed as None and a custom .pptx
+    template by the SHA-256 of its bytes, so an edited template is loaded
+    afresh even at the same path; a path is only re-hashed when its size or
+    mtime changes.
+    
+    Cached presentations are only ever copied, never built on, so the cache
+    can be warmed before forking worker processes, which then share it.
+    """
+    
+    def __init__(self, maxsize: int = DEFAULT_TEMPLATE_CACHE_SIZE):
+        self._templates = BoundedCache(maxsize)  # digest -> Presentation
+        self._digests: Dict[str, Tuple[Tuple[int, int], str]] = {}  # path -> ((size, mtime_ns), digest)
+        self._lock = threading.Lock()
+    
+    def presentation(self, template: Optional[str] = None) -> Presentation:
+        """
+        A private copy of a template to build a deck on.
+        
+        Args:
+            template: Path of a slide-less .pptx template, or None for the default
+        
+        Raises:
+            OSError: If the template can't be read
+            ValueError: If it has slides or too few layouts
+        """
+        _import_pptx()
+        digest, blob = self._identify(template)
+        base = self._templates.get_or_compute(digest, lambda: _parse_template(template, blob))
+        return deepcopy(base)
+    
+    def digest(self, template: Optional[str]) -> Optional[str]:
+        """Content hash identifying a template (None for the default one)."""
+        return self._identify(template)[0]
+    
+    def warm(self, *templates: Optional[str]) -> None:
+        """Parse templates now, e.g. before forking processes that build on them."""
+        _import_pptx()
+        for template in templates:
+            digest, blob = self._identify(template)
+            self._templates.get_or_compute(digest, lambda: _parse_template(template, blob))
+    
+    def stats(self) -> CacheStats:
+        """Hit/miss counters of the parsed templates."""
+        return self._templates.stats()
+    
+    def _identify(self, template: Optional[str]) -> Tuple[Optional[str], Optional[bytes]]:
+        """A template's digest, and its bytes if they had to be read for it."""
+        if template is None:
+            return None, None
+        stat = os.stat(template)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            known = self._digests.get(template)
+        if known is not None and known[0] == signature:
+            return known[1], None
+        with open(template, "rb") as f:
+            blob = f.read()
+        digest = hashlib.sha256(blob).hexdigest()
+        with self._lock:
+            self._digests[template] = (signature, digest)
+        return digest, blob
+
+
+def _parse_template(template: Optional[str], blob: Optional[bytes]) -> Presentation:
+    """Open a base template, from blob when it's already been read."""
+    if template is None:
+        return Presentation()
+    prs = Presentation(io.BytesIO(blob) if blob is not None else template)
+    # Checked on the XML: prs.slides and prs.slide_layouts would cache
+    # sub-elements that deepcopy() detaches from the copied tree
+    if prs.part._element.xpath("p:sldIdLst/p:sldId"):
+        raise ValueError(f"Template {template} has slides; use one with only masters and layouts")
+    layout_ids = []
+    master_ids = prs.part._element.xpath("p:sldMasterIdLst/p:sldMasterId")
+    if master_ids:
+        master_part = prs.part.related_part(master_ids[0].rId)
+        layout_ids = master_part._element.xpath("p:sldLayoutIdLst/p:sldLayoutId")
+    if len(layout_ids) <= BLANK_LAYOUT_INDEX:
+        raise ValueError(
+            f"Template {template} needs at least {BLANK_LAYOUT_INDEX + 1} slide layouts "
+            f"(slides use the {BLANK_LAYOUT_INDEX + 1}th, which should be blank)"
+        )
+    return prs
+
+
+# Shared by every deck built in this process
+template_cache = TemplateCache()
+
 
 # =============================================================================
 # TEXT PROCESSING UTILITIES
@@ -113,14 +432,71 @@ LATEX_REPLACEMENTS = {
 }
 
 
-def _replace_subscript(match: re.Match) -> str:
-    """Convert matched subscript pattern to Unicode subscript."""
-    return match.group(1).translate(SUBSCRIPT_MAP)
+# Symbols spelled as a bare command (\alpha) are resolved by name; the few
+# with other characters (\underline{\Delta}) are matched literally first
+_COMMAND_SYMBOLS = {
+    latex[1:]: unicode_char
+    for latex, unicode_char in LATEX_REPLACEMENTS.items()
+    if latex[1:].isalpha()
+}
+_LITERAL_SYMBOLS = "|".join(
+    re.escape(latex[1:])
+    for latex in sorted(LATEX_REPLACEMENTS, key=len, reverse=True)
+    if not latex[1:].isalpha()
+)
+_MAX_COMMAND_SYMBOL = max(map(len, _COMMAND_SYMBOLS))
+
+# Compiled once at import; every pass over question text reuses these
+_FRACTION_RE = re.compile(r"\\frac\{([^}]+)\}\{([^}]+)\}")
+_SUPERSCRIPT_RE = re.compile(r"\^\{([^}]+)\}|\^([0-9])")
+_SYMBOL_RE = re.compile(
+    rf"\\(?:(?P<symbol>{_LITERAL_SYMBOLS})|(?P<command>\$*[a-zA-Z]+))|\$"
+)
+
+# Single-pass tokenizer: symbols, $ delimiters, super/subscripts and
+# unknown commands in one left-to-right scan. A $ may sit between a marker
+# and its operand ("^$2$") since delimiters used to be stripped beforehand.
+# Every branch opens with a literal so the regex engine can skip plain text.
+_LATEX_TOKEN_RE = re.compile(
+    rf"\\(?:(?P<symbol>{_LITERAL_SYMBOLS})|(?P<command>\$*[a-zA-Z]+))"
+    r"|\$(?P<dollar>)"
+    r"|\^\$*(?:\{(?P<sup_group>[^}]+)\}|(?P<sup_char>[0-9]))"
+    # A closed ^{...} inside _{...} is a superscript, not the group's end
+    r"|_\$*(?:\{(?P<sub_group>(?:[^}^]|\^\{[^}]+\}|\^(?!\{[^}]+\}))+)\}|(?P<sub_char>[0-9]))"
+)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_command(name: str) -> str:
+    """
+    Resolve a LaTeX command name to its Unicode form.
+    
+    The longest known symbol that prefixes the name wins, matching plain
+    substring replacement (\\pmatrix -> ±atrix); unknown commands just lose
+    their backslash.
+    """
+    if name[0] == "$":
+        return name.lstrip("$")
+    for end in range(min(len(name), _MAX_COMMAND_SYMBOL), 1, -1):
+        unicode_char = _COMMAND_SYMBOLS.get(name[:end])
+        if unicode_char is not None:
+            return unicode_char + name[end:]
+    return name
+
+
+def _replace_symbol(match: re.Match) -> str:
+    """Convert matched LaTeX symbol, command or $ delimiter."""
+    kind = match.lastgroup
+    if kind == "symbol":
+        return LATEX_REPLACEMENTS["\\" + match.group(kind)]
+    if kind == "command":
+        return _resolve_command(match.group(kind))
+    return ""
 
 
 def _replace_superscript(match: re.Match) -> str:
     """Convert matched superscript pattern to Unicode superscript."""
-    return match.group(1).translate(SUPERSCRIPT_MAP)
+    return (match.group(1) or match.group(2)).translate(SUPERSCRIPT_MAP)
 
 
 def _replace_fraction(match: re.Match) -> str:
@@ -130,6 +506,30 @@ def _replace_fraction(match: re.Match) -> str:
     return f"({numerator}/{denominator})"
 
 
+def _replace_token(match: re.Match) -> str:
+    """Rewrite one token found by the single-pass tokenizer."""
+    kind = match.lastgroup
+    value = match.group(kind)
+    if kind == "command":
+        return _resolve_command(value)
+    if kind == "dollar":
+        return ""
+    if kind == "symbol":
+        return LATEX_REPLACEMENTS["\\" + value]
+    if kind == "sup_char":
+        return value.translate(SUPERSCRIPT_MAP)
+    if kind == "sub_char":
+        return value.translate(SUBSCRIPT_MAP)
+    # Braced groups see the same content the staged passes used to:
+    # symbols resolved first, superscripts before subscripts
+    value = _SYMBOL_RE.sub(_replace_symbol, value)
+    if kind == "sup_group":
+        return value.translate(SUPERSCRIPT_MAP)
+    value = _SUPERSCRIPT_RE.sub(_replace_superscript, value)
+    return value.translate(SUBSCRIPT_MAP)
+
+
+@_memoized
 def clean_chemistry_text(text: Optional[str]) -> str:
     """
     Convert LaTeX-style formatting to readable Unicode.
@@ -143,6 +543,10 @@ def clean_chemistry_text(text: Optional[str]) -> str:
         - Math operators
         - Dollar sign delimiters
     
+    All rules are compiled into a single tokenizer, so the text is
+    rewritten in one scan. Where symbols overlap the longest one wins.
+    Results are memoized; see configure_text_cache().
+    
     Args:
         text: Raw text potentially containing LaTeX formatting
         
@@ -153,29 +557,10 @@ def clean_chemistry_text(text: Optional[str]) -> str:
         return ""
     
     # Convert fractions first: \frac{a}{b} -> (a/b)
-    text = re.sub(r"\\frac\{([^}]+)\}\{([^}]+)\}", _replace_fraction, text)
-    
-    # Apply LaTeX symbol replacements
-    for latex, unicode_char in LATEX_REPLACEMENTS.items():
-        text = text.replace(latex, unicode_char)
-    
-    # Remove $ delimiters
-    text = text.replace("$", "")
-    
-    # Convert superscripts: ^{...} pattern
-    text = re.sub(r"\^\{([^}]+)\}", _replace_superscript, text)
-    
-    # Convert single character superscripts: ^2 pattern
-    text = re.sub(r"\^([0-9])", _replace_superscript, text)
-    
-    # Convert subscripts: _{...} pattern
-    text = re.sub(r"_\{([^}]+)\}", _replace_subscript, text)
-    
-    # Convert single character subscripts: _2 pattern
-    text = re.sub(r"_([0-9])", _replace_subscript, text)
+    if "\\frac" in text:
+        text = _FRACTION_RE.sub(_replace_fraction, text)
     
-    # Clean up remaining backslashes from unknown LaTeX commands
-    text = re.sub(r"\\([a-zA-Z]+)", r"\1", text)
+    text = _LATEX_TOKEN_RE.sub(_replace_token, text)
     
     # Clean up double spaces
     text = text.replace("  ", " ")
@@ -183,6 +568,67 @@ def clean_chemistry_text(text: Optional[str]) -> str:
     return text.strip()
 
 
+def clean_many(texts: Iterable[Optional[str]]) -> List[str]:
+    """
+    Clean a batch of texts with the compiled tokenizer.
+    
+    Args:
+        texts: Raw texts potentially containing LaTeX formatting
+        
+    Returns:
+        Cleaned texts, in input order
+    """
+    clean = clean_chemistry_text
+    return [clean(text) for text in texts]
+
+
+# Inline math segments, $...$ on one line
+_MATH_SEGMENT_RE = re.compile(r"\$([^$\n]+)\$")
+_LATEX_COMMAND_RE = re.compile(r"\\([a-zA-Z]+)")
+_SCRIPT_OPERAND_RE = re.compile(r"([\^_])\$*(?:\{([^{}]*)\}|(.?))")
+# Characters the Unicode maps actually raise or lower
+_SUPERSCRIPTABLE = frozenset(c for c in "0123456789()+-=xyzn" if c.translate(SUPERSCRIPT_MAP) != c)
+_SUBSCRIPTABLE = frozenset(c for c in "0123456789()+-=xyzn" if c.translate(SUBSCRIPT_MAP) != c)
+
+
+def formula_is_lossy(latex: str) -> bool:
+    """
+    Whether clean_chemistry_text() can only approximate a math segment.
+    
+    True for fractions, roots and other commands without a Unicode symbol,
+    scripts whose characters have no Unicode sub/superscript form, and any
+    other braces; these are the segments worth rendering as images.
+    
+    Args:
+        latex: Math segment without its $ delimiters
+    """
+    if any(name not in _COMMAND_SYMBOLS for name in _LATEX_COMMAND_RE.findall(latex)):
+        return True
+    for marker, group, char in _SCRIPT_OPERAND_RE.findall(latex):
+        scriptable = _SUPERSCRIPTABLE if marker == "^" else _SUBSCRIPTABLE
+        # Symbols in a group are kept as they are, so they don't count
+        operand = _LATEX_COMMAND_RE.sub("", group) if group else char
+        if not operand.strip() and not group:
+            return True
+        if any(c not in scriptable for c in operand if not c.isspace()):
+            return True
+    return "{" in _SCRIPT_OPERAND_RE.sub("", latex)
+
+
+def lossy_formulas(text: str) -> List[str]:
+    """The math segments of a text that formula_is_lossy(), in order."""
+    if "$" not in text:
+        return []
+    return [latex for latex in _MATH_SEGMENT_RE.findall(text) if formula_is_lossy(latex)]
+
+
+def _collapse_spaces(whitespace: str) -> str:
+    """Whitespace around a formula as cleaning would leave it: one space, or its line breaks."""
+    if "\n" in whitespace:
+        return "\n" * whitespace.count("\n")
+    return " " if whitespace else ""
+
+
 def reserialize_question(q_text: str, new_num: int) -> str:
     """
     Replace original question number with new sequential number.
@@ -208,6 +654,7 @@ def reserialize_question(q_text: str, new_num: int) -> str:
     return q_text
 
 
+@_memoized
 def get_original_question_number(q_text: str) -> str:
     """
     Extract original question number from question text.
@@ -218,11 +665,27 @@ def get_original_question_number(q_text: str) -> str:
     Returns:
         Original question number (e.g., "1", "12. (ii)", "84. (iii)")
     """
-    # Match question number with optional sub-part like "12. (ii)"
-    match = re.match(r'^(SQ)?\d+\.?\s*(\([ivx]+\))?', q_text)
-    return match.group(0).strip() if match else "?"
+    return question_number(q_text)
 
 
+def badge_text(original_q_num: str, page: int = 0, pages: int = 1) -> str:
+    """
+    Question badge label, numbering the slides of a split question.
+    
+    Args:
+        original_q_num: From get_original_question_number()
+        page: Zero-based slide of the question
+        pages: Slides the question spans
+        
+    Returns:
+        "Q12", or "Q12 (2/3)" for the second of three slides
+    """
+    if pages == 1:
+        return f"Q{original_q_num}"
+    return f"Q{original_q_num} ({page + 1}/{pages})"
+
+
+@_memoized
 def parse_meta_info(meta: str) -> tuple[str, str]:
     """
     Parse meta string into year and marks components.
@@ -233,58 +696,650 @@ def parse_meta_info(meta: str) -> tuple[str, str]:
     Returns:
         Tuple of (year_text, marks_text)
     """
-    parts = meta.split('|')
-    year = parts[0].strip() if len(parts) > 0 else ""
-    marks = parts[1].strip() if len(parts) > 1 else ""
-    return year, marks
-
+    return split_meta(meta)
 
-# =============================================================================
-# QUESTION DATA (imported from separate module)
-# =============================================================================
 
-from questions_data import QuestionData, questions_data
+def question_fields(question: QuestionData) -> Tuple[str, str, str]:
+    """
+    A question's year, marks and original question number.
+    
+    QuestionTable rows carry these precomputed; dicts are parsed (memoized).
+    """
+    if isinstance(question, QuestionRow):
+        return question.year, question.marks, question.number
+    year, marks = parse_meta_info(question['meta'])
+    return year, marks, get_original_question_number(question['q'])
 
 
 # =============================================================================
 # SLIDE CREATION
 # =============================================================================
 
+# How slides carry their styling: "inline" repeats every shape's position,
+# font and color on each slide; "master" moves them, the background and the
+# accent line onto the deck's blank layout, whose placeholders the slides fill
+SLIDE_STYLES = ("inline", "master")
+MASTER_LAYOUT_NAME = "Chemistry PYQ"
+# (name, idx) of the layout's body placeholders for the year, marks,
+# question and badge text, in _TEXT_SHAPE_INDICES order
+_PLACEHOLDERS = (("Year", 13), ("Marks", 14), ("Question", 15), ("Badge", 16))
+# Paragraph settings that make placeholder text lay out like a text box's:
+# the master's body style adds bullets, indents and spacing before
+_PLACEHOLDER_PARAGRAPH = (
+    '<a:lvl1pPr {} marL="0" indent="0"><a:lnSpc><a:spcPct val="100000"/></a:lnSpc>'
+    '<a:spcBef><a:spcPts val="0"/></a:spcBef><a:buNone/></a:lvl1pPr>'
+)
+
+_SVG_CONTENT_TYPE = "image/svg+xml"
+# Office 2016+ picture extension carrying an SVG next to its PNG fallback
+_SVG_BLIP_URI = "{96DAC541-7B7A-43D3-8B79-37D633B846F1}"
+_SVG_NS = "http://schemas.microsoft.com/office/drawing/2016/SVG/main"
+
+
+# Clark-notation paths into the slide and shape XML used by formula slides
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_SP_TREE = f"{_P}cSld/{_P}spTree"
+_NV_PR = f"*/{_P}cNvPr"
+_XFRM = f"{_P}spPr/{_A}xfrm"
+_TEXT_PARAGRAPH = f"{_P}txBody/{_A}p"
+_BLIP = f"{_P}blipFill/{_A}blip"
+
+
+def _set_shape_frame(shape, shape_id: int, name: str, x: int, y: int, cx: int, cy: int) -> None:
+    """Set a copied shape's id, name, position and size."""
+    c_nv_pr = shape.find(_NV_PR)
+    c_nv_pr.set("id", str(shape_id))
+    c_nv_pr.set("name", name)
+    off, ext = shape.find(_XFRM)
+    off.set("x", str(x))
+    off.set("y", str(y))
+    ext.set("cx", str(cx))
+    ext.set("cy", str(cy))
+
+
+def _add_svg_blip(blip, r_id: str) -> None:
+    """Point a picture's blip at an SVG image; the blip's own image is the fallback."""
+    ext = etree.SubElement(etree.SubElement(blip, qn("a:extLst")), qn("a:ext"), uri=_SVG_BLIP_URI)
+    svg_blip = etree.SubElement(ext, f"{{{_SVG_NS}}}svgBlip", nsmap={"asvg": _SVG_NS})
+    svg_blip.set(qn("r:embed"), r_id)
+
+
 class SlideBuilder:
     """Builder class for creating styled presentation slides."""
     
-    def __init__(self, presentation: Presentation):
+    # Shapes (in spTree order) whose first paragraph carries per-question text:
+    # year label, marks label, question text, question badge
+    _TEXT_SHAPE_INDICES = (0, 1, 3, 4)
+    # The same text shapes on a "master" style slide: just its placeholders
+    _PLACEHOLDER_SHAPE_INDICES = (0, 1, 2, 3)
+    
+    def __init__(
+        self,
+        presentation: Presentation,
+        use_prototype: bool = False,
+        slide_cache: Optional[BoundedCache] = None,
+        record_hashes: bool = False,
+        formulas: Optional[FormulaRenderer] = None,
+        slide_style: str = "inline"
+    ):
+        """
+        Args:
+            presentation: Presentation to add slides to
+            use_prototype: Clone a pre-styled prototype slide's XML for each
+                question instead of styling every shape property by property
+            slide_cache: Rendered slide XML keyed by slide_key(); slides whose
+                key is cached are reused instead of re-rendered
+            record_hashes: Track each slide's key so add_slide_hashes_part()
+                can store them in the deck for seeding a later rebuild
+            formulas: Render formulas the text cleaner can only approximate
+                as images (see formula_flow()); such slides bypass the slide
+                cache and aren't recorded in the slide hashes
+            slide_style: One of SLIDE_STYLES. "master" restyles the deck's
+                blank layout (see _install_layout()) and always builds from
+                the prototype
+        """
+        if slide_style not in SLIDE_STYLES:
+            raise ValueError(f"Unknown slide style {slide_style!r}; expected one of {SLIDE_STYLES}")
+        _import_pptx()
         self.prs = presentation
         self.slide_width = presentation.slide_width
         self.slide_height = presentation.slide_height
         self.content_height = int(self.slide_height * LAYOUT.content_ratio)
         self.margin = Inches(LAYOUT.margin)
         self.text_width = self.slide_width - (2 * self.margin)
+        self.question_height = self.content_height - Inches(LAYOUT.question_top) - Inches(0.3)
+        self.fitter = TextFitter(
+            FONTS.name,
+            self.text_width - 2 * _TEXT_INSET_X,
+            self.question_height - 2 * _TEXT_INSET_Y,
+            FONTS.question_size,
+            FONTS.min_question_size,
+            FONTS.line_spacing
+        )
+        self.slide_style = slide_style
+        self.use_prototype = use_prototype or slide_style == "master"
+        self._prototype = None  # styled p:sld element, built on first use
+        self._inline_prototype = None  # the "inline" one, in "master" style
+        self._text_shapes = (
+            self._TEXT_SHAPE_INDICES if slide_style == "inline" else self._PLACEHOLDER_SHAPE_INDICES
+        )
+        self._slide_count = -1
+        self._next_slide_id = 256
+        self.slide_cache = slide_cache
+        # (slide key, partname, SHA-256 of the slide XML, page) per slide, if recording
+        self.slide_hashes: Optional[List[Tuple[str, str, str, int]]] = [] if record_hashes else None
+        self._style_key: Optional[str] = None
+        self.formulas = formulas
+        self._media_parts: Dict[str, Part] = {}  # formula images already in the deck
+        self._flow_templates: Dict[int, Tuple[Any, Any]] = {}  # by font size, see _flow_shapes()
+        # Stage timings of the request being served, if metrics are on
+        self.timings = current_timings()
+        if slide_style == "master":
+            self._install_layout(presentation.slide_layouts[BLANK_LAYOUT_INDEX])
+    
+    def create_slide(self, question: QuestionData) -> int:
+        """
+        Create the styled slide for a question, plus continuation slides if
+        its text doesn't fit on one even at the minimum font size.
+        
+        Args:
+            question: Question data dictionary with 'q' and 'meta' keys
+            
+        Returns:
+            Number of slides added
+        """
+        if self.formulas is not None:
+            flow = self.formula_flow(question['q'])
+            if flow is not None:
+                return self._create_formula_slides(question, flow)
+        if self.slide_cache is not None or self.slide_hashes is not None:
+            key = self.slide_key(question)
+            return self.add_fragment(key, self.render_fragment(question, key))
+        if self.use_prototype:
+            return self._create_slides_from_prototype(question)
+        
+        # Original question number is kept for the badge
+        year, marks, original_q_num = question_fields(question)
+        fit = self.fit_question(question['q'])
+        for page, text in enumerate(fit.pages):
+            slide = self.prs.slides.add_slide(self.prs.slide_layouts[BLANK_LAYOUT_INDEX])
+            
+            self._set_background(slide)
+            self._add_year_label(slide, year)
+            self._add_marks_label(slide, marks)
+            self._add_accent_line(slide)
+            self._add_question_text(slide, text, fit.size)
+            self._add_question_badge(slide, badge_text(original_q_num, page, len(fit.pages)))
+        return len(fit.pages)
+    
+    def fit_question(self, q_text: str) -> TextFit:
+        """Clean a question's text and fit it to the question text box."""
+        cleaned = clean_chemistry_text(q_text)
+        if self.timings is None:
+            return self.fitter.fit(cleaned)
+        start = perf_counter()
+        fit = self.fitter.fit(cleaned)
+        self.timings["layout"] += perf_counter() - start
+        return fit
+    
+    def _create_slides_from_prototype(self, question: QuestionData) -> int:
+        """Add slides by copying the prototype's XML and filling in their text."""
+        slides = self.render_slides(question)
+        for sld in slides:
+            self._append_slide_part(sld)
+        return len(slides)
     
-    def create_slide(self, question: QuestionData) -> None:
+    def render_slides(self, question: QuestionData, fit: Optional[TextFit] = None) -> list:
         """
-        Create a single styled slide for a question.
+        Render a question onto copies of the prototype slide.
         
         Args:
             question: Question data dictionary with 'q' and 'meta' keys
+            fit: The question's fit_question() result, if already computed
+            
+        Returns:
+            Detached p:sld elements, one per page of question text, not yet
+            part of any presentation
         """
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        if self._prototype is None:
+            self._prototype = self._build_prototype()
+        
+        timings = self.timings
+        if timings is not None:
+            start = perf_counter()
+        year, marks, original_q_num = question_fields(question)
+        if timings is not None:
+            timings["clean"] += perf_counter() - start
+        if fit is None:
+            fit = self.fit_question(question['q'])
+        if timings is not None:
+            start = perf_counter()
+        
+        slides = []
+        for page, text in enumerate(fit.pages):
+            sld = deepcopy(self._prototype)
+            paragraphs = sld.xpath("./p:cSld/p:spTree/p:sp/p:txBody/a:p[1]")
+            paragraphs = [paragraphs[index] for index in self._text_shapes]
+            texts = (year, marks, text, badge_text(original_q_num, page, len(fit.pages)))
+            self._fill_paragraphs(paragraphs, texts)
+            if fit.size != FONTS.question_size:
+                self._set_question_size(paragraphs[2], fit.size)
+            slides.append(sld)
+        if timings is not None:
+            timings["build"] += perf_counter() - start
+        return slides
+    
+    def formula_flow(self, q_text: str) -> Optional[Flow]:
+        """
+        Split a question's text around its formula images.
+        
+        Only segments that formula_is_lossy() are rendered; the rest stay in
+        the text and are cleaned as usual, as are formulas mathtext can't
+        render.
+        
+        Returns:
+            Paragraphs of cleaned text pieces and formula boxes, or None if
+            no formula in the text was rendered
+        """
+        if "$" not in q_text:
+            return None
+        pieces: List[Union[str, InlineBox]] = []
+        position = 0  # end of the last formula rendered
+        for match in _MATH_SEGMENT_RE.finditer(q_text):
+            latex = match.group(1)
+            if not formula_is_lossy(latex):
+                continue
+            if self.timings is None:
+                image = self.formulas.get(latex)
+            else:
+                start = perf_counter()
+                image = self.formulas.get(latex)
+                self.timings["formulas"] += perf_counter() - start
+            if image is None:
+                continue
+            pieces.append(q_text[position:match.start()])
+            pieces.append(InlineBox(image.width, image.height, (latex, image)))
+            position = match.end()
+        if not pieces:
+            return None
+        pieces.append(q_text[position:])
+        
+        flow: List[List[Union[str, InlineBox]]] = [[]]
+        last = len(pieces) - 1
+        for index, piece in enumerate(pieces):
+            if isinstance(piece, InlineBox):
+                flow[-1].append(piece)
+                continue
+            # Keep the spaces and line breaks around formulas, which
+            # cleaning would strip, but not at either end of the question
+            lead = piece[:len(piece) - len(piece.lstrip())] if index else ""
+            trail = piece[len(piece.rstrip()):] if index < last else ""
+            first, *rest = (_collapse_spaces(lead) + clean_chemistry_text(piece) + _collapse_spaces(trail)).split("\n")
+            flow[-1].append(first)
+            flow.extend([paragraph] for paragraph in rest)
+        return flow
+    
+    def _create_formula_slides(self, question: QuestionData, flow: Flow) -> int:
+        """Add a question's slides with its formulas set as images."""
+        slides = self.render_formula_slides(question, flow)
+        for sld, media in slides:
+            self._append_slide_part(sld, media)
+        return len(slides)
+    
+    def render_formula_slides(self, question: QuestionData, flow: Flow) -> List[Tuple[Any, List[Tuple[str, str, bytes]]]]:
+        """
+        Render a question whose text has formula images onto prototype copies.
+        
+        The question text box is replaced by one unwrapped text box per run
+        of text and one picture per formula, placed as fit_flow() laid them
+        out, since PowerPoint can't wrap text around inline pictures.
+        
+        Args:
+            question: Question data dictionary with 'q' and 'meta' keys
+            flow: The question's formula_flow()
+            
+        Returns:
+            (p:sld element, media) per slide, media being the (partname,
+            content type, blob) of each image part the slide's rId2, rId3,
+            ... relationships point to, in order
+        """
+        if self._prototype is None:
+            self._prototype = self._build_prototype()
+        year, marks, original_q_num = question_fields(question)
+        
+        if self.timings is None:
+            fit = self.fitter.fit_flow(flow)
+        else:
+            start = perf_counter()
+            fit = self.fitter.fit_flow(flow)
+            self.timings["layout"] += perf_counter() - start
+            start = perf_counter()
+        
+        slides = []
+        for page, lines in enumerate(fit.pages):
+            sld = deepcopy(self._prototype)
+            shapes = sld.xpath("./p:cSld/p:spTree/p:sp")
+            texts = (year, marks, None, badge_text(original_q_num, page, len(fit.pages)))
+            self._fill_paragraphs([shapes[index].find(_TEXT_PARAGRAPH) for index in self._text_shapes], texts)
+            question_shape = shapes[self._text_shapes[2]]
+            question_shape.getparent().remove(question_shape)
+            if self.slide_style == "master":
+                # The runs sit outside any placeholder, so they carry the text style inline
+                question_shape = self._inline_question_shape()
+            slides.append((sld, self._place_flow(sld, question_shape, fit, lines)))
+        if self.timings is not None:
+            self.timings["build"] += perf_counter() - start
+        return slides
+    
+    def _place_flow(self, sld, text_shape, fit: FlowFit, lines) -> List[Tuple[str, str, bytes]]:
+        """Add the text runs and formula pictures of a page's lines to a slide."""
+        run_shape, pic_shape = self._flow_shapes(text_shape, fit.size)
+        sp_tree = sld.find(_SP_TREE)
+        next_id = max(int(shape_id) for shape_id in sp_tree.xpath(".//p:cNvPr/@id")) + 1
+        em = fit.size * EMU_PER_POINT
+        left = self.margin + _TEXT_INSET_X
+        top = Inches(LAYOUT.question_top) + _TEXT_INSET_Y
+        media: List[Tuple[str, str, bytes]] = []
+        r_ids: Dict[str, str] = {}  # media partname -> rId on this slide
+        
+        def relate(partname: str, content_type: str, blob: bytes) -> str:
+            if partname not in r_ids:
+                media.append((partname, content_type, blob))
+                r_ids[partname] = f"rId{len(media) + 1}"  # rId1 is the slide layout
+            return r_ids[partname]
+        
+        for line in lines:
+            height = round(line.height * em)
+            for offset, run in line.runs:
+                x = left + round(offset * em)
+                if isinstance(run, str):
+                    if not run.strip():
+                        continue
+                    shape = deepcopy(run_shape)
+                    _set_shape_frame(
+                        shape, next_id, f"TextBox {next_id}",
+                        x, top, round(self.fitter.measure(run) * em) + _TEXT_INSET_X, height
+                    )
+                    r = etree.SubElement(shape.find(_TEXT_PARAGRAPH), qn("a:r"))
+                    etree.SubElement(r, qn("a:t")).text = run
+                else:
+                    latex, image = run.content
+                    name = f"/ppt/media/formula-{image.digest[:16]}"
+                    cx, cy = round(run.width * em), round(run.height * em)
+                    shape = deepcopy(pic_shape)
+                    _set_shape_frame(shape, next_id, f"Formula {next_id}", x, top + (height - cy) // 2, cx, cy)
+                    shape.find(_NV_PR).set("descr", latex)
+                    blip = shape.find(_BLIP)
+                    blip.set(qn("r:embed"), relate(f"{name}.png", CT.PNG, image.png))
+                    if image.svg is not None:
+                        _add_svg_blip(blip, relate(f"{name}.svg", _SVG_CONTENT_TYPE, image.svg))
+                sp_tree.append(shape)
+                next_id += 1
+            top += height
+        return media
+    
+    def _flow_shapes(self, text_shape, size: int):
+        """
+        Templates for the shapes of a formula slide at a font size.
+        
+        Returns:
+            (unwrapped text box styled like the question text, picture)
+        """
+        shapes = self._flow_templates.get(size)
+        if shapes is None:
+            run_shape = deepcopy(text_shape)
+            body_pr = run_shape.txBody.bodyPr
+            body_pr.remove_all("a:spAutoFit")
+            body_pr.set("wrap", "none")
+            body_pr.set("anchor", "ctr")
+            for inset in ("lIns", "tIns", "rIns", "bIns"):
+                body_pr.set(inset, "0")
+            run_shape.txBody.p_lst[0].get_or_add_pPr().get_or_add_defRPr().set("sz", str(size * 100))
+            pic_shape = CT_Picture.new_pic(0, "", "", "", 0, 0, 0, 0)
+            shapes = self._flow_templates[size] = (run_shape, pic_shape)
+        return shapes
+    
+    def slide_key(self, question: QuestionData) -> str:
+        """
+        Hash everything a slide's XML depends on: its question text and meta,
+        the style settings and the slide size.
+        
+        Returns:
+            Hex SHA-256 digest
+        """
+        if self._style_key is None:
+            style = (SLIDE_FORMAT, COLORS, LAYOUT, FONTS, self.slide_width, self.slide_height)
+            if self.slide_style != "inline":
+                style += (self.slide_style,)
+            self._style_key = repr(style)
+        digest = hashlib.sha256(self._style_key.encode())
+        digest.update(json.dumps([question['q'], question['meta']], ensure_ascii=False).encode())
+        return digest.hexdigest()
+    
+    def render_fragment(self, question: QuestionData, key: Optional[str] = None) -> Fragment:
+        """
+        Render a question to serialized slide XML, via the slide cache if set.
+        
+        Args:
+            question: Question data dictionary with 'q' and 'meta' keys
+            key: The question's slide_key(), if already computed
+            
+        Returns:
+            The XML of each of the question's slides
+        """
+        def render() -> Fragment:
+            slides = self.render_slides(question)
+            if self.timings is None:
+                return tuple(map(serialize_part_xml, slides))
+            start = perf_counter()
+            blobs = tuple(map(serialize_part_xml, slides))
+            self.timings["serialize"] += perf_counter() - start
+            return blobs
+        
+        if self.slide_cache is None:
+            return render()
+        return self.slide_cache.get_or_compute(key or self.slide_key(question), render)
+    
+    def add_fragment(self, key: Optional[str], blobs: Fragment) -> int:
+        """
+        Append a question's rendered slides to the deck, recording their
+        hashes if enabled.
+        
+        Returns:
+            Number of slides added
+        """
+        for page, blob in enumerate(blobs, start=1):
+            partname = self._append_slide_part(blob)
+            if self.slide_hashes is not None:
+                self.slide_hashes.append((key, str(partname), hashlib.sha256(blob).hexdigest(), page))
+        return len(blobs)
+    
+    def add_slide_hashes_part(self) -> None:
+        """Store the recorded slide hashes as a custom XML part of the deck."""
+        part = Part(PackURI(SLIDE_HASHES_PARTNAME), CT.XML, self.prs.part.package, self._slide_hashes_xml())
+        self.prs.part.relate_to(part, RT.CUSTOM_XML)
+    
+    def _slide_hashes_xml(self) -> bytes:
+        return slide_hashes_xml(self.slide_hashes or [])
+    
+    def _fill_paragraphs(self, paragraphs, texts: Iterable[Optional[str]]) -> None:
+        """
+        Put each text into its shape's first paragraph; None leaves the shape as is.
+        
+        An empty placeholder ("master" style) is removed, as it would show
+        its prompt text while editing; an empty text box is kept.
+        """
+        for paragraph, text in zip(paragraphs, texts):
+            if text:
+                # Same run/line-break structure the paragraph text setter produces
+                paragraph.append_text(text)
+            elif text is not None and self.slide_style == "master":
+                shape = paragraph.getparent().getparent()
+                shape.getparent().remove(shape)
+    
+    def _set_question_size(self, paragraph, size: int) -> None:
+        """Set the font size of the question text to a fitted size."""
+        if self.slide_style == "inline":
+            paragraph.get_or_add_pPr().get_or_add_defRPr().set("sz", str(size * 100))
+            return
+        # Override the size the placeholder's list style inherits from the layout
+        lst_style = paragraph.getparent().find(f"{_A}lstStyle")
+        lvl1_p_pr = etree.SubElement(lst_style, qn("a:lvl1pPr"))
+        etree.SubElement(lvl1_p_pr, qn("a:defRPr"), sz=str(size * 100))
+    
+    def _build_prototype(self):
+        """
+        Build the empty slide every question's slides are copied from.
+        
+        Returns:
+            The slide's p:sld element
+        """
+        if self.slide_style == "master":
+            return self._build_master_prototype()
+        return self._build_inline_prototype()
+    
+    def _build_master_prototype(self):
+        """
+        An empty slide on the layout _install_layout() made: just its text
+        placeholders, which take their position and style from the layout.
+        """
+        sld = CT_Slide.new()
+        for shape_id, (name, idx) in enumerate(_PLACEHOLDERS, start=2):
+            sld.cSld.spTree.add_placeholder(shape_id, name, PP_PLACEHOLDER.BODY, "horz", "quarter", idx)
+        return sld
+    
+    def _inline_question_shape(self):
+        """The fully styled question text box of an "inline" style slide."""
+        if self._inline_prototype is None:
+            self._inline_prototype = self._build_inline_prototype()
+        return self._inline_prototype.xpath("./p:cSld/p:spTree/p:sp")[self._TEXT_SHAPE_INDICES[2]]
+    
+    def _install_layout(self, layout) -> None:
+        """
+        Turn a slide layout into the one "master" style slides are based on.
+        
+        The inline prototype's background and accent line move onto the
+        layout as they are, and each of its text boxes becomes a body
+        placeholder in the same place whose list style holds the text box's
+        paragraph formatting. A layout already converted is left alone.
+        """
+        sld_layout = layout._element
+        c_sld = sld_layout.cSld
+        if c_sld.get("name") == MASTER_LAYOUT_NAME:
+            return
+        if self._inline_prototype is None:
+            self._inline_prototype = self._build_inline_prototype()
+        prototype = self._inline_prototype.cSld
+        
+        c_sld.set("name", MASTER_LAYOUT_NAME)
+        sld_layout.attrib.pop("type", None)  # no longer a blank layout
+        c_sld.insert(0, deepcopy(prototype.find(f"{_P}bg")))
+        sp_tree = c_sld.spTree
+        next_id = max(int(shape_id) for shape_id in sp_tree.xpath(".//p:cNvPr/@id")) + 1
+        placeholders = dict(zip(self._TEXT_SHAPE_INDICES, _PLACEHOLDERS))
+        for index, shape in enumerate(prototype.spTree.iterchildren(f"{_P}sp")):
+            if index in placeholders:
+                name, idx = placeholders[index]
+                shape = self._layout_placeholder(shape, next_id + index, name, idx)
+            else:
+                shape = deepcopy(shape)
+                shape.find(_NV_PR).set("id", str(next_id + index))
+            sp_tree.insert_element_before(shape, "p:extLst")
+    
+    @staticmethod
+    def _layout_placeholder(text_box, shape_id: int, name: str, idx: int):
+        """A layout body placeholder styled and placed like a text box."""
+        placeholder = CT_Shape.new_placeholder_sp(shape_id, name, PP_PLACEHOLDER.BODY, "horz", "quarter", idx)
+        placeholder.replace(placeholder.spPr, deepcopy(text_box.spPr))
+        tx_body = deepcopy(text_box.txBody)
+        placeholder.replace(placeholder.txBody, tx_body)
+        
+        p_pr = tx_body.p_lst[0].pPr
+        lvl1_p_pr = parse_xml(_PLACEHOLDER_PARAGRAPH.format(nsdecls("a")))
+        for attribute, value in p_pr.attrib.items():
+            lvl1_p_pr.set(attribute, value)
+        lvl1_p_pr.extend(p_pr)  # moves its a:defRPr
+        tx_body.p_lst[0].remove(p_pr)
+        tx_body.find(f"{_A}lstStyle").append(lvl1_p_pr)
+        return placeholder
+    
+    def _build_inline_prototype(self):
+        """
+        Render one fully styled slide with empty text on a scratch deck.
+        
+        Returns:
+            The slide's p:sld element
+        """
+        scratch = template_cache.presentation()
+        scratch.slide_width = self.slide_width
+        scratch.slide_height = self.slide_height
+        slide = scratch.slides.add_slide(scratch.slide_layouts[BLANK_LAYOUT_INDEX])
         
         self._set_background(slide)
-        year, marks = parse_meta_info(question['meta'])
-        self._add_year_label(slide, year)
-        self._add_marks_label(slide, marks)
+        self._add_year_label(slide, "")
+        self._add_marks_label(slide, "")
         self._add_accent_line(slide)
-        self._add_question_text(slide, question['q'])
-        # Extract original question number for the badge
-        original_q_num = get_original_question_number(question['q'])
-        self._add_question_badge(slide, original_q_num)
+        self._add_question_text(slide, "", FONTS.question_size)
+        self._add_question_badge(slide, "")
+        
+        for index in self._TEXT_SHAPE_INDICES:
+            slide.shapes[index].text_frame.paragraphs[0].clear()
+        return slide._element
+    
+    def _append_slide_part(self, sld, media: Iterable[Tuple[str, str, bytes]] = ()) -> PackURI:
+        """
+        Wrap a p:sld element (or its serialized XML) in a new slide part at
+        the end of the deck.
+        
+        Equivalent to prs.slides.add_slide(), which rescans every existing
+        relationship and slide id per call and so turns quadratic on large decks.
+        
+        Args:
+            sld: The slide
+            media: (partname, content type, blob) of the images the slide
+                relates to as rId2, rId3, ...; each distinct partname becomes
+                one part of the deck however many slides use it
+        
+        Returns:
+            The new slide's partname
+        """
+        if self.timings is not None:
+            start = perf_counter()
+        if isinstance(sld, bytes):
+            sld = parse_xml(sld)
+        prs_part = self.prs.part
+        sld_id_lst = prs_part._element.get_or_add_sldIdLst()
+        slide_count = len(sld_id_lst)
+        if slide_count != self._slide_count:
+            # Slides were added behind our back; resync the id counter once
+            self._next_slide_id = max([255] + [sld_id.id for sld_id in sld_id_lst]) + 1
+        
+        partname = PackURI(f"/ppt/slides/slide{slide_count + 1}.xml")
+        slide_part = SlidePart(partname, CT.PML_SLIDE, prs_part.package, sld)
+        slide_part.relate_to(self.prs.slide_layouts[BLANK_LAYOUT_INDEX].part, RT.SLIDE_LAYOUT)
+        for media_partname, content_type, blob in media:
+            part = self._media_parts.get(media_partname)
+            if part is None:
+                part = self._media_parts[media_partname] = Part(
+                    PackURI(media_partname), content_type, prs_part.package, blob
+                )
+            slide_part.rels._add_relationship(RT.IMAGE, part)
+        # A brand-new part can't already be related, so skip get_or_add's scan
+        r_id = prs_part.rels._add_relationship(RT.SLIDE, slide_part)
+        sld_id_lst._add_sldId(id=self._next_slide_id, rId=r_id)
+        
+        self._next_slide_id += 1
+        self._slide_count = slide_count + 1
+        if self.timings is not None:
+            self.timings["build"] += perf_counter() - start
+        return partname
     
     def _set_background(self, slide) -> None:
         """Set slide background color."""
         fill = slide.background.fill
         fill.solid()
-        fill.fore_color.rgb = COLORS.background
+        fill.fore_color.rgb = RGBColor(*COLORS.background)
     
     def _add_year_label(self, slide, year_text: str) -> None:
         """Add year label to top-left of slide."""
@@ -298,7 +1353,7 @@ class SlideBuilder:
         para.text = f"{year_text}"
         para.font.name = FONTS.name
         para.font.size = Pt(FONTS.meta_size)
-        para.font.color.rgb = COLORS.year
+        para.font.color.rgb = RGBColor(*COLORS.year)
         para.font.bold = True
     
     def _add_marks_label(self, slide, marks_text: str) -> None:
@@ -313,7 +1368,7 @@ class SlideBuilder:
         para.text = f"{marks_text}"
         para.font.name = FONTS.name
         para.font.size = Pt(FONTS.meta_size)
-        para.font.color.rgb = COLORS.marks
+        para.font.color.rgb = RGBColor(*COLORS.marks)
         para.font.bold = True
         para.alignment = PP_ALIGN.RIGHT
     
@@ -327,30 +1382,26 @@ class SlideBuilder:
             Inches(LAYOUT.accent_line_height)
         )
         line.fill.solid()
-        line.fill.fore_color.rgb = COLORS.accent_line
+        line.fill.fore_color.rgb = RGBColor(*COLORS.accent_line)
         line.line.fill.background()
     
-    def _add_question_text(self, slide, question_text: str) -> None:
-        """Add question text with original number preserved."""
-        question_top = Inches(LAYOUT.question_top)
-        question_height = self.content_height - question_top - Inches(0.3)
-        
+    def _add_question_text(self, slide, cleaned_text: str, font_size: int) -> None:
+        """Add cleaned question text with original number preserved."""
         box = slide.shapes.add_textbox(
             self.margin, 
-            question_top, 
+            Inches(LAYOUT.question_top), 
             self.text_width, 
-            question_height
+            self.question_height
         )
         box.text_frame.word_wrap = True
         
         para = box.text_frame.paragraphs[0]
-        cleaned_text = clean_chemistry_text(question_text)
         para.text = cleaned_text  # Keep original question numbers as-is
         para.font.name = FONTS.name
-        para.font.size = Pt(FONTS.question_size)
-        para.font.color.rgb = COLORS.text
+        para.font.size = Pt(font_size)
+        para.font.color.rgb = RGBColor(*COLORS.text)
     
-    def _add_question_badge(self, slide, original_q_num: str) -> None:
+    def _add_question_badge(self, slide, label: str) -> None:
         """Add small question number badge at bottom-left."""
         box = slide.shapes.add_textbox(
             self.margin,
@@ -359,49 +1410,945 @@ class SlideBuilder:
             Inches(0.4)
         )
         para = box.text_frame.paragraphs[0]
-        para.text = f"Q{original_q_num}"
+        para.text = label
         para.font.name = FONTS.name
         para.font.size = Pt(FONTS.badge_size)
-        para.font.color.rgb = COLORS.question_badge
+        para.font.color.rgb = RGBColor(*COLORS.question_badge)
         para.font.bold = True
 
 
+class StreamingSlideBuilder(SlideBuilder):
+    """
+    SlideBuilder backend that writes each slide straight into a zip stream.
+    
+    Slides are rendered from the prototype and serialized immediately, so
+    memory stays flat regardless of deck size. Call close() to finish the file.
+    """
+    
+    def __init__(
+        self,
+        output: Union[str, IO[bytes]],
+        template: Optional[Presentation] = None,
+        slide_cache: Optional[BoundedCache] = None,
+        record_hashes: bool = False,
+        formulas: Optional[FormulaRenderer] = None,
+        slide_style: str = "inline",
+        compression: Optional[Compression] = None
+    ):
+        """
+        Args:
+            output: Path or writable binary stream for the .pptx package
+            template: Slide-less base presentation, e.g. from template_cache
+                (a copy of the default template if omitted)
+            slide_cache: Rendered slide XML cache (see SlideBuilder)
+            record_hashes: Store per-slide hashes in the deck on close()
+            formulas: Formula image renderer (see SlideBuilder)
+            slide_style: One of SLIDE_STYLES (see SlideBuilder)
+            compression: How the package is compressed (default: as prs.save())
+        """
+        _import_pptx()
+        template = template if template is not None else template_cache.presentation()
+        # The layout is restyled here, before the writer copies the template's parts
+        super().__init__(
+            template, use_prototype=True, slide_cache=slide_cache,
+            record_hashes=record_hashes, formulas=formulas, slide_style=slide_style
+        )
+        compression = compression or Compression()
+        self.writer = StreamingPresentationWriter(output, template, compression.level, compression.threads)
+        self._layout_partname = template.slide_layouts[BLANK_LAYOUT_INDEX].part.partname
+    
+    def close(self) -> None:
+        """Write the presentation part and content types, and close the zip."""
+        with stage("serialize"):
+            if self.slide_hashes is not None:
+                self.add_slide_hashes_part()
+            self.writer.close()
+    
+    def add_slide_hashes_part(self) -> None:
+        """Write the recorded slide hashes into the package as custom XML."""
+        self.writer.add_part(PackURI(SLIDE_HASHES_PARTNAME), CT.XML, self._slide_hashes_xml(), RT.CUSTOM_XML)
+    
+    def _append_slide_part(self, sld, media: Iterable[Tuple[str, str, bytes]] = ()) -> PackURI:
+        """Serialize the slide into the package instead of the object model."""
+        if self.timings is None:
+            return self.writer.add_slide(sld, self._layout_partname, media)
+        start = perf_counter()
+        partname = self.writer.add_slide(sld, self._layout_partname, media)
+        self.timings["serialize"] += perf_counter() - start
+        return partname
+
+
+# =============================================================================
+# SLIDE FRAGMENT CACHE
+# =============================================================================
+
+# Bump when slide rendering changes so stale fragments are never reused
+SLIDE_FORMAT = "slide-v2"
+SLIDE_HASHES_PARTNAME = "/customXml/slideHashes.xml"
+_SLIDE_HASHES_NS = "urn:pptgenerator:slide-hashes"
+# Fragments larger than this in a seeding deck are ignored, not read
+_MAX_FRAGMENT_SIZE = 1024 * 1024
+_HEX_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+# A question's rendered slides: one serialized p:sld per page of its text
+Fragment = Tuple[bytes, ...]
+
+
+def slide_hashes_xml(entries: Iterable[Tuple[str, str, str, int]]) -> bytes:
+    """
+    Serialize (slide key, partname, XML digest, page) entries for the custom
+    XML part.
+    
+    The digest lets a seeding rebuild skip slides edited after generation;
+    the page (from 1) groups a question's continuation slides under its key.
+    """
+    lines = [f'<slideHashes xmlns="{_SLIDE_HASHES_NS}" format="{SLIDE_FORMAT}">']
+    for key, partname, digest, page in entries:
+        lines.append(f'<slide key="{key}" part="{partname}" sha256="{digest}" page="{page}"/>')
+    lines.append("</slideHashes>")
+    return ("<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n" + "".join(lines)).encode()
+
+
+def seed_slide_cache(deck: Union[str, IO[bytes]], cache: BoundedCache) -> int:
+    """
+    Load the slides of a previously generated deck into a slide cache.
+    
+    Only decks written with recorded hashes can seed; a question is skipped
+    if any of its slides no longer matches its recorded digest (e.g. edited
+    in PowerPoint) or is missing. The digests are the deck's own, so seed
+    an uploaded deck into a SlideCacheOverlay, never a shared cache.
+    
+    Args:
+        deck: Path or seekable binary stream of the .pptx
+        cache: Slide cache to fill
+        
+    Returns:
+        Number of questions whose slides were added to the cache
+        
+    Raises:
+        ValueError: If the file isn't a readable .pptx package
+    """
+    import zipfile
+    
+    _import_pptx()
+    try:
+        with zipfile.ZipFile(deck) as package:
+            try:
+                root = parse_xml(package.read(SLIDE_HASHES_PARTNAME[1:]))
+            except KeyError:
+                return 0  # generated without hashes, or not by this tool
+            if root.tag != f"{{{_SLIDE_HASHES_NS}}}slideHashes" or root.get("format") != SLIDE_FORMAT:
+                return 0
+            
+            seeded = 0
+            key, blobs = None, [None]  # the question being collected
+            for entry in root:
+                page = entry.get("page", "1")
+                if page == "1":
+                    if None not in blobs:
+                        cache.put(key, tuple(blobs))
+                        seeded += 1
+                    key, blobs = entry.get("key"), []
+                elif entry.get("key") != key or page != str(len(blobs) + 1):
+                    blobs.append(None)  # out of sequence; drop the question
+                    continue
+                blobs.append(_read_verified_slide(package, entry))
+            if None not in blobs:
+                cache.put(key, tuple(blobs))
+                seeded += 1
+            return seeded
+    except (zipfile.BadZipFile, etree.XMLSyntaxError) as exc:
+        raise ValueError(f"Not a readable .pptx file: {exc}") from None
+
+
+class SlideCacheOverlay:
+    """
+    Slides seeded from an uploaded deck, layered over the shared slide
+    cache for a single build.
+    
+    An uploaded deck's digests are written by whoever uploads it, so they
+    only show the slides weren't edited by accident, not that they're what
+    this tool would render. Seeded slides are therefore used for the
+    uploader's own rebuild only: lookups try them first, but the shared
+    cache only ever receives slides rendered here.
+    """
+    
+    def __init__(self, shared: Optional[BoundedCache], maxsize: int = DEFAULT_TEXT_CACHE_SIZE):
+        """
+        Args:
+            shared: Process-wide slide cache (or None)
+            maxsize: Most questions kept from the uploaded deck
+        """
+        self.seeded = BoundedCache(maxsize)
+        self.shared = shared
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.seeded.get(key)
+        if value is not None:
+            return value
+        return self.shared.get(key, default) if self.shared is not None else default
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.shared is not None:
+            self.shared.put(key, value)
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = self.seeded.get(key)
+        if value is not None:
+            return value
+        return self.shared.get_or_compute(key, compute) if self.shared is not None else compute()
+
+
+def _read_verified_slide(package, entry) -> Optional[bytes]:
+    """A slide-hashes entry's slide XML, or None if absent or altered."""
+    key, partname, digest = entry.get("key"), entry.get("part"), entry.get("sha256")
+    if not (key and digest and _HEX_DIGEST.match(key) and _HEX_DIGEST.match(digest)):
+        return None
+    if not (partname or "").startswith("/ppt/slides/"):
+        return None
+    try:
+        info = package.getinfo(partname[1:])
+    except KeyError:
+        return None
+    if info.file_size > _MAX_FRAGMENT_SIZE:
+        return None
+    blob = package.read(info)
+    return blob if hashlib.sha256(blob).hexdigest() == digest else None
+
+
+# =============================================================================
+# PARALLEL RENDERING
+# =============================================================================
+
+# Questions per task sent to a worker process: large enough to amortize
+# pickling, small enough to balance load and bound in-flight memory
+SHARD_SIZE = 200
+
+# Per worker process, by slide style and template digest
+_shard_builders: Dict[Tuple[str, Optional[str]], SlideBuilder] = {}
+
+
+def render_shard(
+    questions: List[QuestionData],
+    slide_style: str = "inline",
+    template: Optional[str] = None
+) -> List[Fragment]:
+    """
+    Render a shard of questions to serialized slide XML in a worker process.
+    
+    Only the slide parts are produced here; the parent assigns part names,
+    relationship ids and slide ids in input order as it merges them.
+    
+    Args:
+        questions: Consecutive question dictionaries
+        slide_style: One of SLIDE_STYLES
+        template: Path of the deck's .pptx template, if not the default
+        
+    Returns:
+        Each question's slide part blobs, in order
+    """
+    _import_pptx()
+    key = (slide_style, template_cache.digest(template))
+    builder = _shard_builders.get(key)
+    if builder is None:
+        builder = _shard_builders[key] = SlideBuilder(
+            template_cache.presentation(template), use_prototype=True, slide_style=slide_style
+        )
+    # Fit the shard's text in one batch, so repeated texts are laid out once
+    fits = builder.fitter.fit_many(clean_chemistry_text(q['q']) for q in questions)
+    return [
+        tuple(map(serialize_part_xml, builder.render_slides(q, fit)))
+        for q, fit in zip(questions, fits)
+    ]
+
+
+# Marks a question _write_parallel() builds itself rather than on a worker
+_BUILD_HERE = object()
+
+
+def _iter_shards(questions: Iterable[QuestionData], size: int) -> Iterator[List[QuestionData]]:
+    """Split questions into consecutive lists of at most size items."""
+    questions = iter(questions)
+    while True:
+        shard = list(islice(questions, size))
+        if not shard:
+            return
+        yield shard
+
+
+def _write_parallel(
+    questions: Iterable[QuestionData],
+    output: Union[str, IO[bytes]],
+    workers: int,
+    executor: Optional[Executor],
+    slide_cache: Optional[BoundedCache] = None,
+    record_hashes: bool = False,
+    formulas: Optional[FormulaRenderer] = None,
+    slide_style: str = "inline",
+    compression: Optional[Compression] = None,
+    template: Optional[str] = None
+) -> int:
+    """
+    Render shards on a process pool and merge them into one streamed deck.
+    
+    Cached slides are taken from slide_cache in this process; only the rest
+    are sent to workers. Questions with formulas to render as images are
+    built in this process as they are merged. At most two shards per worker
+    are in flight, so memory stays bounded however long the question stream is.
+    """
+    own_executor = executor is None
+    if own_executor:
+        from concurrent.futures import ProcessPoolExecutor
+        # Forked workers start with the template already parsed
+        template_cache.warm(template)
+        executor = ProcessPoolExecutor(max_workers=workers)
+    builder = StreamingSlideBuilder(
+        output, template_cache.presentation(template), slide_cache=slide_cache,
+        record_hashes=record_hashes, formulas=formulas, slide_style=slide_style,
+        compression=compression
+    )
+    keyed = slide_cache is not None or record_hashes
+    pending = deque()
+    
+    def merge(shard, keys, fragments, future) -> None:
+        with stage("render_wait"):
+            rendered = iter(future.result() if future is not None else ())
+        for question, key, fragment in zip(shard, keys, fragments):
+            if fragment is _BUILD_HERE:
+                builder.create_slide(question)
+                continue
+            if fragment is None:
+                fragment = next(rendered)
+                if slide_cache is not None:
+                    slide_cache.put(key, fragment)
+            builder.add_fragment(key, fragment)
+    
+    try:
+        for shard in _iter_shards(questions, SHARD_SIZE):
+            keys = [builder.slide_key(q) for q in shard] if keyed else [None] * len(shard)
+            if slide_cache is not None:
+                fragments = [slide_cache.get(key) for key in keys]
+            else:
+                fragments = [None] * len(shard)
+            if formulas is not None:
+                fragments = [
+                    _BUILD_HERE if lossy_formulas(q['q']) else fragment
+                    for q, fragment in zip(shard, fragments)
+                ]
+            misses = [q for q, fragment in zip(shard, fragments) if fragment is None]
+            future = executor.submit(render_shard, misses, slide_style, template) if misses else None
+            pending.append((shard, keys, fragments, future))
+            if len(pending) >= 2 * workers:
+                merge(*pending.popleft())
+        while pending:
+            merge(*pending.popleft())
+    finally:
+        for _, _, _, future in pending:
+            if future is not None:
+                future.cancel()
+        builder.close()
+        if own_executor:
+            executor.shutdown()
+    return builder.writer.slide_count
+
+
 # =============================================================================
 # PRESENTATION GENERATOR
 # =============================================================================
 
+# Rendering backends: the python-pptx object model, or direct OOXML streaming
+BACKENDS = ("pptx", "stream")
+
+
+@dataclass(frozen=True)
+class Compression:
+    """How a deck's zip package is compressed (see ooxml_writer.PackageZip)."""
+    level: int = 6    # deflate level 1-9 (6 is zlib's default), or 0 to store parts
+    threads: int = 1  # parts deflated on this many threads; 1 deflates them as written
+
+
+# Questions read ahead of the one being built, so their formulas render meanwhile
+FORMULA_LOOKAHEAD = 64
+
+
+def _prefetch_formulas(
+    questions: Iterable[QuestionData], formulas: FormulaRenderer
+) -> Iterator[QuestionData]:
+    """Pass questions through, queueing each one's formulas FORMULA_LOOKAHEAD questions early."""
+    window = deque()
+    for question in questions:
+        formulas.prefetch(lossy_formulas(question['q']))
+        window.append(question)
+        if len(window) > FORMULA_LOOKAHEAD:
+            yield window.popleft()
+    yield from window
+
+
+def write_presentation(
+    questions: Iterable[QuestionData],
+    output: Union[str, IO[bytes]],
+    backend: str = "pptx",
+    use_prototype: bool = False,
+    workers: int = 1,
+    executor: Optional[Executor] = None,
+    slide_cache: Optional[BoundedCache] = None,
+    record_hashes: bool = False,
+    formulas: Optional[FormulaRenderer] = None,
+    slide_style: str = "inline",
+    compression: Optional[Compression] = None,
+    template: Optional[str] = None
+) -> int:
+    """
+    Build a deck from question data and write it to a path or stream.
+    
+    Args:
+        questions: Question dictionaries with 'q' and 'meta' keys, or the
+            rows of a QuestionTable
+        output: Path or writable binary stream for the .pptx package
+        backend: One of BACKENDS
+        use_prototype: Clone a styled prototype slide ("pptx" backend only;
+            the "stream" backend always does)
+        workers: Worker processes rendering slides in parallel. Above 1,
+            every backend merges through the streaming writer, whose output
+            is identical to a saved python-pptx deck
+        executor: Process pool to render on (one is started per call if omitted)
+        slide_cache: Rendered slide XML to reuse for unchanged slides
+        record_hashes: Store per-slide hashes in the deck so it can later
+            seed a slide cache (see seed_slide_cache())
+        formulas: Render formulas the text cleaner can only approximate as
+            images; they render on its pool while earlier slides are built
+        slide_style: One of SLIDE_STYLES; "master" puts the styling on a
+            slide layout once, so each slide carries only its text
+        compression: Deflate level and threads of the package (default:
+            level 6 in the writing thread, as prs.save())
+        template: Path of a slide-less .pptx whose masters, layouts, theme
+            and slide size the deck is built on (default: python-pptx's);
+            parsed once per process, see TemplateCache
+        
+    Returns:
+        Number of slides written
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+    if slide_style not in SLIDE_STYLES:
+        raise ValueError(f"Unknown slide style {slide_style!r}; expected one of {SLIDE_STYLES}")
+    if formulas is not None:
+        questions = _prefetch_formulas(questions, formulas)
+    
+    if workers > 1:
+        return _write_parallel(
+            questions, output, workers, executor, slide_cache, record_hashes,
+            formulas, slide_style, compression, template
+        )
+    
+    slide_count = 0
+    if backend == "stream":
+        builder = StreamingSlideBuilder(
+            output, template_cache.presentation(template), slide_cache=slide_cache,
+            record_hashes=record_hashes, formulas=formulas, slide_style=slide_style,
+            compression=compression
+        )
+        try:
+            for question in questions:
+                slide_count += builder.create_slide(question)
+        finally:
+            builder.close()
+        return slide_count
+    
+    prs = template_cache.presentation(template)
+    builder = SlideBuilder(prs, use_prototype, slide_cache, record_hashes, formulas, slide_style)
+    for question in questions:
+        slide_count += builder.create_slide(question)
+    if record_hashes:
+        builder.add_slide_hashes_part()
+    with stage("serialize"):
+        if compression is None:
+            prs.save(output)
+        else:
+            save_presentation(prs, output, compression.level, compression.threads)
+    return slide_count
+
+
 def create_presentation(
-    questions: List[QuestionData],
-    output_filename: str = "Chemistry_PYQ_Presentation.pptx"
+    questions: Union[List[QuestionData], QuestionTable, QuestionBank],
+    output_filename: str = "Chemistry_PYQ_Presentation.pptx",
+    use_prototype: bool = False,
+    backend: str = "pptx",
+    workers: int = 1,
+    record_hashes: bool = False,
+    formulas: Optional[FormulaRenderer] = None,
+    slide_style: str = "inline",
+    compression: Optional[Compression] = None,
+    template: Optional[str] = None
 ) -> None:
     """
     Generate a PowerPoint presentation from question data.
     
     Args:
-        questions: List of question dictionaries
+        questions: List of question dictionaries, a QuestionTable, or a
+            memory-mapped QuestionBank (built straight from the file)
         output_filename: Name of output PPTX file
+        use_prototype: Build slides by cloning a styled prototype slide
+        backend: "pptx" (python-pptx object model) or "stream" (direct OOXML)
+        workers: Worker processes rendering slides in parallel
+        record_hashes: Store per-slide hashes so the deck can seed a rebuild
+        formulas: Render complex formulas as images with this renderer
+        slide_style: "inline" (styled shapes on every slide) or "master"
+            (styled layout placeholders)
+        compression: Deflate level and threads of the package
+        template: Path of a slide-less .pptx template to build on
     """
-    prs = Presentation()
-    builder = SlideBuilder(prs)
+    slide_count = write_presentation(
+        questions, output_filename, backend, use_prototype, workers=workers,
+        record_hashes=record_hashes, formulas=formulas, slide_style=slide_style,
+        compression=compression, template=template
+    )
+    print(f"✅ Presentation saved as {output_filename} with {slide_count} slides.")
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+# Content keys of the decks last built into an output directory
+MANIFEST_NAME = ".pptgen-manifest.json"
+_GLOB_CHARS = frozenset("*?[")
+
+
+@dataclass(frozen=True)
+class BuildTarget:
+    """One JSON input file and the deck it builds."""
+    source: str
+    output: str
+
+
+@dataclass
+class BuildSummary:
+    """Counts and timing of one build run."""
+    built: int = 0
+    skipped: int = 0
+    failed: int = 0
+    slides: int = 0
+    seconds: float = 0.0
     
-    for question in questions:
-        builder.create_slide(question)
+    def report(self) -> str:
+        """One-line throughput summary."""
+        seconds = max(self.seconds, 1e-9)
+        return (
+            f"Built {self.built} file(s), {self.slides} slides in {self.seconds:.2f}s "
+            f"({self.built / seconds:.1f} files/s, {self.slides / seconds:.0f} slides/s); "
+            f"{self.skipped} up to date, {self.failed} failed"
+        )
+
+
+def expand_inputs(inputs: Iterable[str], output_dir: str) -> List[BuildTarget]:
+    """
+    Resolve files, glob patterns and directories to build targets.
+    
+    Directories are searched recursively for *.json files, which keep their
+    sub-folder layout under output_dir; files and glob matches are written
+    straight into output_dir.
+    
+    Args:
+        inputs: Paths, glob patterns (``**`` allowed) or directories
+        output_dir: Directory the decks are written to
+        
+    Returns:
+        Targets in input order, each source listed once
+        
+    Raises:
+        ValueError: If two inputs would write the same deck
+    """
+    targets: Dict[str, BuildTarget] = {}
+    outputs: Dict[str, str] = {}
     
-    prs.save(output_filename)
-    print(f"✅ Presentation saved as {output_filename} with {len(questions)} slides.")
+    def add(source: str, relative: str) -> None:
+        source = os.path.abspath(source)
+        if source in targets:
+            return
+        output = os.path.join(output_dir, os.path.splitext(relative)[0] + ".pptx")
+        if output in outputs:
+            raise ValueError(f"{outputs[output]} and {source} would both write {output}")
+        outputs[output] = source
+        targets[source] = BuildTarget(source, output)
+    
+    for item in inputs:
+        if os.path.isdir(item):
+            for path in sorted(glob.glob(os.path.join(item, "**", "*.json"), recursive=True)):
+                add(path, os.path.relpath(path, item))
+        elif _GLOB_CHARS.intersection(item):
+            for path in sorted(glob.glob(item, recursive=True)):
+                if os.path.isfile(path):
+                    add(path, os.path.basename(path))
+        else:
+            add(item, os.path.basename(item))
+    return list(targets.values())
+
+
+@contextmanager
+def _open_questions(source: str) -> Iterator[Union[QuestionTable, QuestionBank]]:
+    """
+    Load and validate one JSON question file, or map a compiled bank
+    (which stays on disk, read question by question).
+    """
+    from ingest import iter_questions
+    
+    if source.endswith(BANK_SUFFIX):
+        questions = QuestionBank(source)
+    else:
+        with open(source, "rb") as f:
+            questions = QuestionTable(iter_questions(f))
+    try:
+        if not len(questions):
+            raise ValueError("JSON array is empty")
+        yield questions
+    finally:
+        if isinstance(questions, QuestionBank):
+            questions.close()
+
+
+@dataclass(frozen=True)
+class FormulaOptions:
+    """Formula image rendering for CLI builds; picklable for build processes."""
+    format: str      # "png" or "svg"
+    cache_dir: str
+    workers: Optional[int] = None  # render processes; None: one per CPU
+
+
+# One renderer per process and options, so --watch rebuilds reuse its pool
+_formula_renderers: Dict[FormulaOptions, FormulaRenderer] = {}
+
+
+def _formula_renderer(options: Optional[FormulaOptions]) -> Optional[FormulaRenderer]:
+    if options is None:
+        return None
+    renderer = _formula_renderers.get(options)
+    if renderer is None:
+        from formula_images import FormulaRenderer, FormulaSettings
+        
+        renderer = _formula_renderers[options] = FormulaRenderer(
+            options.cache_dir, FormulaSettings(options.format, COLORS.text), options.workers
+        )
+    return renderer
+
+
+def _content_key(
+    questions: Iterable[QuestionData],
+    formulas: Optional[FormulaOptions] = None,
+    slide_style: str = "inline",
+    template: Optional[str] = None
+) -> str:
+    from result_cache import content_key
+    
+    renderer = _formula_renderer(formulas)
+    extra = (renderer.settings,) if renderer is not None else ()
+    if slide_style != "inline":
+        extra += (slide_style,)
+    if template is not None:
+        extra += (template_cache.digest(template),)
+    return content_key(questions, COLORS, LAYOUT, FONTS, *extra)
+
+
+def build_file(
+    source: str,
+    output: str,
+    backend: str = "stream",
+    formulas: Optional[FormulaOptions] = None,
+    slide_style: str = "inline",
+    compression: Optional[Compression] = None,
+    template: Optional[str] = None
+) -> Tuple[int, str]:
+    """
+    Build one JSON file's deck, replacing the output only once it's complete.
+    
+    Returns:
+        (slide count, content key of the questions and style)
+    """
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    temp_path = f"{output}.tmp"
+    with _open_questions(source) as questions:
+        try:
+            slide_count = write_presentation(
+                questions, temp_path, backend=backend, formulas=_formula_renderer(formulas),
+                slide_style=slide_style, compression=compression, template=template
+            )
+            os.replace(temp_path, output)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return slide_count, _content_key(questions, formulas, slide_style, template)
+
+
+def _is_up_to_date(
+    target: BuildTarget,
+    check: str,
+    manifest: Dict[str, str],
+    formulas: Optional[FormulaOptions] = None,
+    slide_style: str = "inline",
+    template: Optional[str] = None
+) -> bool:
+    """
+    Whether a target's deck can be skipped.
+    
+    "mtime" trusts a deck newer than its source; "hash" requires the deck's
+    recorded content key to match the source's questions and current style.
+    """
+    try:
+        output_mtime = os.stat(target.output).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    if check == "mtime":
+        return output_mtime >= os.stat(target.source).st_mtime_ns
+    try:
+        with _open_questions(target.source) as questions:
+            return manifest.get(target.output) == _content_key(questions, formulas, slide_style, template)
+    except (OSError, ValueError):
+        return False  # let the build report it
+
+
+def _load_manifest(output_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {os.path.join(output_dir, name): key for name, key in entries.items()}
+
+
+def _save_manifest(output_dir: str, manifest: Dict[str, str]) -> None:
+    entries = {os.path.relpath(path, output_dir): key for path, key in sorted(manifest.items())}
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def build_targets(
+    targets: List[BuildTarget],
+    output_dir: str,
+    jobs: int = 1,
+    backend: str = "stream",
+    check: str = "mtime",
+    force: bool = False,
+    formulas: Optional[FormulaOptions] = None,
+    slide_style: str = "inline",
+    compression: Optional[Compression] = None,
+    template: Optional[str] = None
+) -> BuildSummary:
+    """
+    Build every target that isn't up to date, jobs files at a time.
+    
+    Args:
+        targets: From expand_inputs()
+        output_dir: Directory holding the decks and their manifest
+        jobs: Files built in parallel (worker processes when above 1)
+        backend: Rendering backend for every deck
+        check: Up-to-date test, "mtime" or "hash"
+        force: Rebuild even up-to-date decks
+        formulas: Render complex formulas as images (see write_presentation())
+        slide_style: One of SLIDE_STYLES for every deck
+        compression: Deflate level and threads of every deck
+        template: Path of the .pptx template every deck is built on
+        
+    Returns:
+        Counts and timing of the run; failures are printed as they happen
+    """
+    start = perf_counter()
+    summary = BuildSummary()
+    manifest = _load_manifest(output_dir)
+    pending = []
+    for target in targets:
+        if not force and _is_up_to_date(target, check, manifest, formulas, slide_style, template):
+            summary.skipped += 1
+        else:
+            pending.append(target)
+    
+    def finished(target: BuildTarget, outcome: Callable[[], Tuple[int, str]]) -> None:
+        try:
+            slide_count, key = outcome()
+        except Exception as exc:
+            summary.failed += 1
+            print(f"❌ {target.source}: {exc}")
+            return
+        summary.built += 1
+        summary.slides += slide_count
+        manifest[target.output] = key
+        print(f"✅ {target.output} ({slide_count} slides)")
+    
+    if jobs > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        
+        if formulas is not None:
+            # Files already build in parallel; each renders its own formulas
+            formulas = FormulaOptions(formulas.format, formulas.cache_dir, workers=0)
+        # Parsed once here rather than in every forked build process
+        template_cache.warm(template)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            futures = {
+                executor.submit(
+                    build_file, target.source, target.output, backend, formulas, slide_style,
+                    compression, template
+                ): target
+                for target in pending
+            }
+            for future in as_completed(futures):
+                finished(futures[future], future.result)
+    else:
+        for target in pending:
+            finished(target, lambda: build_file(
+                target.source, target.output, backend, formulas, slide_style, compression, template
+            ))
+    
+    if summary.built:
+        _save_manifest(output_dir, manifest)
+    summary.seconds = perf_counter() - start
+    return summary
+
+
+def watch(
+    inputs: List[str],
+    output_dir: str,
+    interval: float = 1.0,
+    **options
+) -> None:
+    """
+    Build the inputs, then keep polling them and rebuild only the files
+    whose modification time or size changes (including new files).
+    Runs until interrupted.
+    
+    Args:
+        inputs: Paths, glob patterns or directories, re-expanded every poll
+        output_dir: Directory the decks are written to
+        interval: Seconds between polls
+        options: Passed to build_targets()
+    """
+    seen: Dict[str, Tuple[int, int]] = {}  # source -> (mtime_ns, size) when last built
+    first = True
+    while True:
+        try:
+            targets = expand_inputs(inputs, output_dir)
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            targets = []
+        changed = []
+        for target in targets:
+            try:
+                stat = os.stat(target.source)
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if seen.get(target.source) != signature:
+                seen[target.source] = signature
+                changed.append(target)
+        if changed:
+            # After the first pass, a changed signature is reason enough to rebuild
+            summary = build_targets(changed, output_dir, **{**options, "force": options.get("force") or not first})
+            print(summary.report())
+        first = False
+        time.sleep(interval)
 
 
 # =============================================================================
 # MAIN ENTRY POINT
 # =============================================================================
 
-def main() -> None:
-    """Main entry point for generating the chemistry presentation."""
-    print("\n📚 Chemistry PYQ Presentation Generator")
-    print("=" * 45)
-    create_presentation(questions_data)
-    print("=" * 45)
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+    
+    With no inputs, builds the bundled sample questions into
+    Chemistry_PYQ_Presentation.pptx as before; otherwise builds one deck per
+    JSON file. Run with --help for the options.
+    
+    Returns:
+        Exit status: 1 if any file failed, else 0
+    """
+    parser = argparse.ArgumentParser(
+        description="Build chemistry PYQ slide decks from JSON question files."
+    )
+    parser.add_argument("inputs", nargs="*",
+                        help="JSON files or compiled .pqb banks, glob patterns, or directories of JSON files")
+    parser.add_argument("-o", "--output-dir", default=".", help="where decks are written (default: .)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="files built in parallel (0: one per CPU)")
+    parser.add_argument("--backend", choices=BACKENDS, default="stream")
+    parser.add_argument("--check", choices=("mtime", "hash"), default="mtime",
+                        help="skip decks newer than their source (mtime) or built from "
+                             "identical questions and style (hash)")
+    parser.add_argument("-f", "--force", action="store_true", help="rebuild up-to-date decks too")
+    parser.add_argument("-w", "--watch", action="store_true", help="keep rebuilding files as they change")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between --watch polls")
+    parser.add_argument("--formulas", choices=("png", "svg"),
+                        help="render fractions, roots and other formulas the text can only "
+                             "approximate as images (needs matplotlib)")
+    parser.add_argument("--formula-cache", default=None,
+                        help="rendered formula cache directory (default: a pptgen-formulas temp dir)")
+    parser.add_argument("--slide-style", choices=SLIDE_STYLES, default="inline",
+                        help="style every slide's shapes inline, or once on a slide layout "
+                             "whose placeholders the slides fill (master: smaller, faster to save)")
+    parser.add_argument("--compress-level", type=int, choices=range(10), default=6, metavar="0-9",
+                        help="deflate level of the decks (0 stores them uncompressed; default: 6)")
+    parser.add_argument("--compress-threads", type=int, default=1,
+                        help="threads deflating each deck's parts while it's built (default: 1)")
+    parser.add_argument("--template", default=None,
+                        help="slide-less .pptx whose masters, layouts, theme and slide size "
+                             "the decks are built on (default: python-pptx's)")
+    args = parser.parse_args(argv)
+    
+    compression = Compression(args.compress_level, max(1, args.compress_threads))
+    if args.template is not None:
+        try:
+            template_cache.warm(args.template)
+        except (OSError, ValueError) as exc:
+            parser.error(f"--template: {exc}")
+    formulas = None
+    if args.formulas:
+        import tempfile
+        from formula_images import formulas_available
+        
+        if not formulas_available():
+            parser.error("--formulas needs matplotlib (pip install matplotlib)")
+        cache_dir = args.formula_cache or os.path.join(tempfile.gettempdir(), "pptgen-formulas")
+        formulas = FormulaOptions(args.formulas, cache_dir)
+    
+    if not args.inputs:
+        print("\n📚 Chemistry PYQ Presentation Generator")
+        print("=" * 45)
+        # The sample bank is only needed here, not by importers of this module
+        from questions_data import questions_data
+        create_presentation(
+            questions_data, os.path.join(args.output_dir, "Chemistry_PYQ_Presentation.pptx"),
+            formulas=_formula_renderer(formulas), slide_style=args.slide_style,
+            compression=compression, template=args.template
+        )
+        print("=" * 45)
+        return 0
+    
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    options = dict(
+        jobs=jobs, backend=args.backend, check=args.check, force=args.force,
+        formulas=formulas, slide_style=args.slide_style, compression=compression,
+        template=args.template
+    )
+    if args.watch:
+        print(f"👀 Watching {len(args.inputs)} input(s); Ctrl+C to stop")
+        try:
+            watch(args.inputs, args.output_dir, args.interval, **options)
+        except KeyboardInterrupt:
+            return 0
+    
+    try:
+        targets = expand_inputs(args.inputs, args.output_dir)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if not targets:
+        parser.error("no JSON files found")
+    summary = build_targets(targets, args.output_dir, **options)
+    print(summary.report())
+    return 1 if summary.failed else 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
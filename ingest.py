@@ -0,0 +1,218 @@
+"""
+Streaming Question Ingestion
+Parses an uploaded JSON array of questions one item at a time, validating
+each item as it arrives, so the whole upload never has to be held in memory
+as bytes, text and object tree at once.
+"""
+
+import codecs
+import json
+from typing import IO, Any, Iterator
+
+from question_types import QuestionData
+
+CHUNK_SIZE = 64 * 1024
+# Longest token prefix (number, literal, escape) a parse error can sit behind
+_TRUNCATION_MARGIN = 64
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+class QuestionValidationError(ValueError):
+    """Raised when the upload is valid JSON but not a valid question list."""
+
+
+class _TextBuffer:
+    """Sliding window of decoded text over a binary stream."""
+
+    def __init__(self, stream: IO[bytes], chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        # Line/column bookkeeping for text already dropped from the window
+        self.offset = 0
+        self.lines = 0
+        self.tail_columns = 0
+
+    def fill(self, size: int = 0) -> bool:
+        """
+        Read and decode another chunk, or as many as it takes to add at
+        least `size` characters. Returns False once the stream is exhausted.
+        """
+        if self.eof:
+            return False
+        parts = [self.text]
+        added = 0
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+                parts.append(self.decoder.decode(b"", final=True))
+                break
+            part = self.decoder.decode(chunk)
+            parts.append(part)
+            added += len(part)
+            if added >= size:
+                break
+        self.text = "".join(parts)
+        return added > 0 or not self.eof
+
+    def compact(self) -> None:
+        """Drop consumed text once it outgrows a chunk."""
+        if self.pos < self.chunk_size:
+            return
+        dropped = self.text[:self.pos]
+        newlines = dropped.count("\n")
+        if newlines:
+            self.lines += newlines
+            self.tail_columns = len(dropped) - dropped.rfind("\n") - 1
+        else:
+            self.tail_columns += len(dropped)
+        self.offset += self.pos
+        self.text = self.text[self.pos:]
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of input)."""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                return ""
+
+    def decode_value(self) -> Any:
+        """
+        Decode the JSON value at the cursor, reading more input as needed.
+
+        While the value stays cut off, the unread window is at least doubled
+        before decoding again, so a value spanning many chunks is decoded a
+        logarithmic number of times rather than once per chunk.
+        """
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as exc:
+                # Only an error at the window's edge can be cured by more input
+                truncated = (
+                    len(self.text) - exc.pos <= _TRUNCATION_MARGIN
+                    or exc.msg.startswith("Unterminated string")
+                )
+                if truncated and self.fill(len(self.text) - self.pos):
+                    continue
+                raise self.error(exc.msg, exc.pos) from None
+            # A number or literal near the window's edge may continue past it
+            if len(self.text) - end < _TRUNCATION_MARGIN and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def error(self, msg: str, pos: int) -> json.JSONDecodeError:
+        """Build a JSONDecodeError whose position refers to the whole document."""
+        err = json.JSONDecodeError(msg, self.text, pos)
+        if err.lineno == 1:
+            err.colno += self.tail_columns
+        err.lineno += self.lines
+        err.pos += self.offset
+        err.args = (f"{msg}: line {err.lineno} column {err.colno} (char {err.pos})",)
+        return err
+
+
+def iter_json_array(stream: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array as they are parsed.
+
+    Args:
+        stream: Binary stream containing UTF-8 JSON
+        chunk_size: Bytes read per chunk
+
+    Raises:
+        json.JSONDecodeError: On malformed JSON, at the first bad token
+        UnicodeDecodeError: If the stream is not valid UTF-8
+        QuestionValidationError: If the document is valid JSON but not an array
+    """
+    buf = _TextBuffer(stream, chunk_size)
+
+    if buf.peek() != "[":
+        # Not an array: parse the rest only to tell bad JSON from a wrong shape
+        while buf.fill():
+            pass
+        buf.decode_value()
+        if buf.peek():
+            raise buf.error("Extra data", buf.pos)
+        raise QuestionValidationError("JSON must be an array of question objects")
+    buf.pos += 1
+
+    if buf.peek() == "]":
+        buf.pos += 1
+    else:
+        while True:
+            yield buf.decode_value()
+            delimiter = buf.peek()
+            if delimiter == ",":
+                buf.pos += 1
+                buf.peek()
+                buf.compact()
+            elif delimiter == "]":
+                buf.pos += 1
+                break
+            else:
+                raise buf.error("Expecting ',' delimiter", buf.pos)
+
+    if buf.peek():
+        raise buf.error("Extra data", buf.pos)
+
+
+def iter_questions(stream: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[QuestionData]:
+    """
+    Yield validated questions from an uploaded JSON array, one at a time.
+
+    Each item must be an object with a string "q"; "meta" is optional and
+    defaults to "". Validation fails on the first bad item, before the rest
+    of the upload is read.
+
+    Args:
+        stream: Binary stream containing a UTF-8 JSON array
+        chunk_size: Bytes read per chunk
+
+    Raises:
+        QuestionValidationError: On the first item that is not a valid question
+        json.JSONDecodeError: On malformed JSON
+        UnicodeDecodeError: If the stream is not valid UTF-8
+    """
+    for i, item in enumerate(iter_json_array(stream, chunk_size), start=1):
+        yield validate_question(item, i)
+
+
+def validate_question(item: Any, i: int) -> QuestionData:
+    """
+    Check one decoded item of a question list, defaulting a missing "meta".
+
+    Args:
+        item: The decoded JSON value
+        i: Its 1-based position, for error messages
+
+    Returns:
+        The item itself
+
+    Raises:
+        QuestionValidationError: If it is not a valid question
+    """
+    if not isinstance(item, dict):
+        raise QuestionValidationError(f'Item {i} is not a valid object')
+    if 'q' not in item:
+        raise QuestionValidationError(f'Item {i} is missing required "q" field')
+    if not isinstance(item['q'], str):
+        raise QuestionValidationError(f'Item {i} has a non-string "q" field')
+    meta = item.get('meta')
+    if meta is None:
+        item['meta'] = ''
+    elif not isinstance(meta, str):
+        raise QuestionValidationError(f'Item {i} has a non-string "meta" field')
+    return item
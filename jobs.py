@@ -0,0 +1,264 @@
+"""
+Background Deck Jobs
+Runs large deck builds on a local process pool instead of the request
+thread. Job state lives in one directory per job, so any web worker can
+report status or serve the result, and nothing beyond the standard library
+is needed to coordinate them.
+
+Job directory layout:
+    upload.json   the validated upload, as received
+    meta.json     total question count, backend, slide style, creation time
+    progress      slides built so far (rewritten as the build advances)
+    result.pptx   the finished deck
+    error         failure message, if the build failed
+
+A job that never recorded an outcome and has made no progress for the TTL
+is taken to have died with its worker, and is swept like a finished one.
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import IO, TYPE_CHECKING, Dict, Iterable, Iterator, Optional
+
+from question_types import QuestionData
+
+if TYPE_CHECKING:
+    from formula_images import FormulaSettings
+    from generate_ppt import Compression
+
+PROGRESS_EVERY = 25  # slides between progress updates
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Replace a file's contents so readers never see a partial write."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _report_progress(
+    questions: Iterable[QuestionData], progress_path: str
+) -> Iterator[QuestionData]:
+    """Pass questions through, recording how many have been consumed."""
+    done = 0
+    for question in questions:
+        yield question
+        done += 1
+        if done % PROGRESS_EVERY == 0:
+            _write_atomic(progress_path, str(done).encode())
+    _write_atomic(progress_path, str(done).encode())
+
+
+def _build_job(
+    job_dir: str,
+    backend: str,
+    slide_style: str = "inline",
+    compression: Optional["Compression"] = None,
+    template: Optional[str] = None,
+    formula_settings: Optional["FormulaSettings"] = None,
+    formula_cache_dir: Optional[str] = None
+) -> None:
+    """
+    Build a job's deck inside a pool worker process.
+
+    The result is published by rename once complete; any failure is
+    recorded in the job's error file instead of being raised.
+    """
+    # Imported here so the parent process doesn't need them to submit jobs
+    from formula_images import process_renderer
+    from generate_ppt import write_presentation
+    from ingest import iter_questions
+
+    result_path = os.path.join(job_dir, "result.pptx")
+    formulas = None
+    if formula_settings is not None:
+        formulas = process_renderer(formula_cache_dir, formula_settings)
+    try:
+        with open(os.path.join(job_dir, "upload.json"), "rb") as upload:
+            questions = _report_progress(
+                iter_questions(upload), os.path.join(job_dir, "progress")
+            )
+            write_presentation(
+                questions, f"{result_path}.tmp", backend=backend,
+                slide_style=slide_style, compression=compression, template=template,
+                formulas=formulas
+            )
+        os.replace(f"{result_path}.tmp", result_path)
+    except Exception as exc:
+        _write_atomic(os.path.join(job_dir, "error"), str(exc).encode())
+
+
+def _last_activity(job_dir: str) -> float:
+    """
+    When a job finished, or else when it last made progress (was created,
+    or reported slides built); infinite if the directory is gone.
+    """
+    for name in ("result.pptx", "error"):
+        try:
+            return os.stat(os.path.join(job_dir, name)).st_mtime
+        except FileNotFoundError:
+            continue
+    latest = None
+    for path in (os.path.join(job_dir, "progress"), os.path.join(job_dir, "meta.json"), job_dir):
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue
+        latest = mtime if latest is None else max(latest, mtime)
+    return latest if latest is not None else float("inf")
+
+
+class JobManager:
+    """Submits deck builds to a process pool and tracks them on disk."""
+
+    def __init__(self, directory: str, max_workers: Optional[int] = None, ttl: float = 3600):
+        """
+        Args:
+            directory: Root directory for job state and results
+            max_workers: Pool size (defaults to the CPU count)
+            ttl: Seconds a finished job's state and result are kept
+        """
+        self.directory = directory
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def submit(
+        self,
+        upload: IO[bytes],
+        total: int,
+        backend: str = "pptx",
+        slide_style: str = "inline",
+        compression: Optional["Compression"] = None,
+        template: Optional[str] = None,
+        formula_settings: Optional["FormulaSettings"] = None,
+        formula_cache_dir: Optional[str] = None
+    ) -> str:
+        """
+        Queue a build of an already validated upload.
+
+        Args:
+            upload: Binary stream of the JSON upload, positioned at the start
+            total: Number of questions in the upload
+            backend: Rendering backend for write_presentation()
+            slide_style: Slide style for write_presentation()
+            compression: Package compression for write_presentation()
+            template: Path of the .pptx template for write_presentation()
+            formula_settings: Render complex formulas as images with these
+                settings (None: as text), caching them in formula_cache_dir
+            formula_cache_dir: Formula image cache shared with the workers
+
+        Returns:
+            The new job's id
+        """
+        self.sweep()
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, "upload.json"), "wb") as f:
+            shutil.copyfileobj(upload, f)
+        meta = {"total": total, "backend": backend, "slide_style": slide_style, "created": time.time()}
+        _write_atomic(os.path.join(job_dir, "meta.json"), json.dumps(meta).encode())
+
+        future = self._pool().submit(
+            _build_job, job_dir, backend, slide_style, compression, template,
+            formula_settings, formula_cache_dir
+        )
+        future.add_done_callback(lambda f: self._record_crash(f, job_dir))
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """
+        Describe a job.
+
+        Returns:
+            Dict with id, status (queued/running/done/failed), slides_done,
+            total and error; None for unknown or expired jobs
+        """
+        self.sweep()
+        job_dir = self._job_dir(job_id)
+        if job_dir is None or not os.path.isdir(job_dir):
+            return None
+        try:
+            with open(os.path.join(job_dir, "meta.json"), "rb") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None  # still being created, or swept meanwhile
+
+        info = {"id": job_id, "total": meta["total"], "slides_done": 0, "error": None}
+        try:
+            with open(os.path.join(job_dir, "progress"), "rb") as f:
+                info["slides_done"] = int(f.read() or 0)
+            info["status"] = "running"
+        except FileNotFoundError:
+            info["status"] = "queued"
+
+        if os.path.exists(os.path.join(job_dir, "result.pptx")):
+            info["status"] = "done"
+        elif os.path.exists(os.path.join(job_dir, "error")):
+            with open(os.path.join(job_dir, "error"), "rb") as f:
+                info["error"] = f.read().decode("utf-8", "replace")
+            info["status"] = "failed"
+        return info
+
+    def result_path(self, job_id: str) -> Optional[str]:
+        """Path of a finished job's deck, or None if not (yet) available."""
+        job_dir = self._job_dir(job_id)
+        if job_dir is None:
+            return None
+        path = os.path.join(job_dir, "result.pptx")
+        return path if os.path.exists(path) else None
+
+    def sweep(self) -> None:
+        """
+        Delete finished jobs older than the TTL, and jobs that never
+        finished and have shown no progress for as long (their worker or
+        server died with them queued or running).
+        """
+        expire_before = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            if _last_activity(entry.path) < expire_before:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running builds."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _record_crash(self, future, job_dir: str) -> None:
+        """Mark a job failed if its worker died before recording an outcome."""
+        exc = None if future.cancelled() else future.exception()
+        if exc is None or not os.path.isdir(job_dir):
+            return
+        _write_atomic(os.path.join(job_dir, "error"), f"Worker failed: {exc}".encode())
+        if isinstance(exc, BrokenProcessPool):
+            with self._lock:
+                self._executor = None  # replaced on the next submit
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use, not at import."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _job_dir(self, job_id: str) -> Optional[str]:
+        """Directory for a well-formed job id (None rejects path tricks)."""
+        if not _JOB_ID.match(job_id):
+            return None
+        return os.path.join(self.directory, job_id)
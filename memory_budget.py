@@ -0,0 +1,441 @@
+"""
+Memory Budget
+Admission control for in-process deck builds by their estimated memory
+cost rather than their upload size.
+
+A build's cost is estimated from its question count and total text length
+with a linear CostModel per backend and slide style: the python-pptx
+backend holds every slide's XML tree until the deck is saved, the stream
+backend only one slide at a time. A parallel build streams its deck while
+up to two shards per worker are rendered and held, each shard on its own
+presentation, and a custom template adds its parsed size to every
+presentation the build holds. A process-wide MemoryBudget reserves each
+build's estimate before it starts; a build that doesn't fit waits, in
+arrival order, for running builds to release theirs, and is turned away if
+it waits too long or could never fit.
+
+The default models were measured on the sample bank. Re-calibrate for a
+different deployment with the measurement mode, which builds decks of
+several sizes in fresh processes and records each one's tracemalloc peak
+and resident-memory growth (lxml trees live outside the Python heap, so
+tracemalloc alone undercounts the pptx backend):
+
+    python -m memory_budget --output cost_model.json
+    MEMORY_COST_FILE=cost_model.json python app.py
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import math
+import os
+import sys
+import threading
+import time
+import zipfile
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from question_types import QuestionTable
+
+# Estimates are scaled up by this much when fitted, for allocator slack
+# and the spread between measurements
+DEFAULT_MARGIN = 1.25
+# Questions built before measuring, so imports and the template are counted out
+_WARMUP_QUESTIONS = 20
+# Resident bytes a parsed template part takes per byte of it unzipped: about
+# 840 KB for python-pptx's default template's 94 KB of XML. Media parts are
+# held as their bytes.
+XML_PART_EXPANSION = 9
+
+
+@dataclass(frozen=True)
+class CostModel:
+    """Linear estimate of a build's peak memory, in bytes."""
+    base: int = 0
+    per_item: float = 0.0
+    per_char: float = 0.0
+
+    def estimate(self, items: int, chars: int) -> int:
+        """Bytes a build of `items` questions with `chars` characters of text needs."""
+        return int(self.base + self.per_item * items + self.per_char * chars)
+
+
+# Fitted on the sample bank by the measurement mode, with DEFAULT_MARGIN:
+# about 54 KB per question with the python-pptx backend (22 KB in master
+# style, whose slides carry only their text), 5 KB streamed.
+# Models of another slide style than "inline" are keyed "backend/style".
+DEFAULT_COST_MODELS: Dict[str, CostModel] = {
+    "pptx": CostModel(base=0, per_item=53_685.7, per_char=16.88),
+    "stream": CostModel(base=557_810, per_item=4_833.3, per_char=1.09),
+    "pptx/master": CostModel(base=0, per_item=22_377.5, per_char=13.09),
+    "stream/master": CostModel(base=596_399, per_item=4_194.5, per_char=1.22),
+}
+
+
+def model_key(backend: str, slide_style: str = "inline") -> str:
+    """Key of a backend and slide style's model in a cost model dict."""
+    return backend if slide_style == "inline" else f"{backend}/{slide_style}"
+
+
+def estimate_cost(
+    questions: QuestionTable,
+    backend: str,
+    models: Optional[Dict[str, CostModel]] = None,
+    slide_style: str = "inline",
+    workers: int = 1,
+    template_overhead: int = 0
+) -> int:
+    """
+    Estimate the peak memory of building a deck from parsed questions.
+
+    Args:
+        questions: Parsed questions
+        backend: "pptx" or "stream"
+        models: Cost model per backend and slide style (default:
+            DEFAULT_COST_MODELS); a style without its own model is
+            estimated with its backend's
+        slide_style: Slide style of the deck
+        workers: Worker processes rendering it (see write_presentation())
+        template_overhead: Bytes each presentation built on the deck's
+            template takes beyond the default one (see template_overhead())
+
+    Returns:
+        Estimated bytes
+    """
+    models = models or DEFAULT_COST_MODELS
+    items, chars = len(questions), questions.text_length()
+    if workers <= 1 or not items:
+        model = models.get(model_key(backend, slide_style)) or models[backend]
+        return model.estimate(items, chars) + template_overhead
+
+    from generate_ppt import SHARD_SIZE
+
+    # A parallel build streams the deck, whatever the backend, while up to
+    # two shards per worker are rendered on presentations of their own
+    model = models.get(model_key("stream", slide_style)) or models["stream"]
+    shards = min(math.ceil(items / SHARD_SIZE), 2 * workers)
+    shard_items = min(items, SHARD_SIZE)
+    shard_cost = model.estimate(shard_items, chars * shard_items // items) + template_overhead
+    return model.estimate(items, chars) + template_overhead + shards * shard_cost
+
+
+def template_overhead(template: Optional[str]) -> int:
+    """
+    Estimated bytes a presentation built on a .pptx template takes beyond
+    one built on python-pptx's default template (0 for None or a smaller
+    template), from the sizes of its parts.
+    """
+    if template is None:
+        return 0
+    import pptx  # only loaded when a template is configured
+
+    default = os.path.join(os.path.dirname(pptx.__file__), "templates", "default.pptx")
+    return max(0, _parsed_size(template) - _parsed_size(default))
+
+
+def _parsed_size(path: str) -> int:
+    """Estimated resident bytes of a parsed .pptx package."""
+    with zipfile.ZipFile(path) as package:
+        return sum(
+            info.file_size * (XML_PART_EXPANSION if info.filename.endswith((".xml", ".rels")) else 1)
+            for info in package.infolist()
+        )
+
+
+def load_cost_models(path: str) -> Dict[str, CostModel]:
+    """
+    Read cost models written by the measurement mode, over the defaults.
+
+    Raises:
+        ValueError: If the file isn't a JSON object of model key -> model fields
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a JSON object of model key -> cost model")
+    models = dict(DEFAULT_COST_MODELS)
+    for key, fields in data.items():
+        try:
+            models[key] = CostModel(**fields)
+        except TypeError as exc:
+            raise ValueError(f"{path}: invalid cost model for {key!r}: {exc}") from None
+    return models
+
+
+# =============================================================================
+# BUDGET
+# =============================================================================
+
+class OverBudget(Exception):
+    """A build was turned away by the memory budget."""
+
+    def __init__(self, cost: int, limit: int, retry_after: Optional[int] = None):
+        """
+        Args:
+            cost: The build's estimated bytes
+            limit: The budget, in bytes
+            retry_after: Seconds to wait before retrying, or None if the
+                build is larger than the whole budget
+        """
+        if retry_after is None:
+            message = (f"Deck too large to build: needs about {_mb(cost)} MB "
+                       f"of a {_mb(limit)} MB memory budget")
+        else:
+            message = f"Server busy; retry in {retry_after}s"
+        super().__init__(message)
+        self.cost = cost
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class MemoryBudgetStats:
+    """Snapshot of a memory budget, in bytes and builds."""
+    limit: int
+    reserved: int
+    peak_reserved: int
+    running: int
+    waiting: int
+    admitted: int
+    rejected: int
+
+    @property
+    def utilization(self) -> float:
+        return self.reserved / self.limit if self.limit else 0.0
+
+
+class MemoryBudget:
+    """
+    Process-wide budget of estimated build memory, shared by request threads.
+
+    Builds are admitted in arrival order: one that doesn't fit holds back
+    smaller ones behind it, so large decks aren't starved.
+    """
+
+    def __init__(self, limit: int, wait: float = 30.0):
+        """
+        Args:
+            limit: Bytes reservable at once; 0 admits everything
+            wait: Seconds a build may wait for room before it's turned away
+        """
+        self.limit = limit
+        self.wait = wait
+        self._reserved = 0
+        self._peak = 0
+        self._running = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._queue: deque = deque()
+        self._changed = threading.Condition()
+
+    @contextmanager
+    def reserve(self, cost: int) -> Iterator[None]:
+        """
+        Hold `cost` bytes of the budget for the body of the with block.
+
+        Raises:
+            OverBudget: If the cost exceeds the whole budget, or no room
+                was freed within the wait
+        """
+        self._acquire(cost)
+        try:
+            yield
+        finally:
+            with self._changed:
+                self._reserved -= cost
+                self._running -= 1
+                self._changed.notify_all()
+
+    def stats(self) -> MemoryBudgetStats:
+        """Current reservation and admission counters."""
+        with self._changed:
+            return MemoryBudgetStats(
+                self.limit, self._reserved, self._peak, self._running,
+                len(self._queue), self._admitted, self._rejected
+            )
+
+    def _acquire(self, cost: int) -> None:
+        with self._changed:
+            if self.limit and cost > self.limit:
+                self._rejected += 1
+                raise OverBudget(cost, self.limit)
+            ticket = object()
+            self._queue.append(ticket)
+            admitted = self._changed.wait_for(
+                lambda: self._queue[0] is ticket
+                and (not self.limit or self._reserved + cost <= self.limit),
+                self.wait
+            )
+            self._queue.remove(ticket)
+            # The next build in line may fit now, or may be first in line
+            self._changed.notify_all()
+            if not admitted:
+                self._rejected += 1
+                raise OverBudget(cost, self.limit, max(1, math.ceil(self.wait)))
+            self._reserved += cost
+            self._peak = max(self._peak, self._reserved)
+            self._running += 1
+            self._admitted += 1
+
+
+def _mb(size: int) -> int:
+    return math.ceil(size / (1 << 20))
+
+
+# =============================================================================
+# MEASUREMENT MODE
+# =============================================================================
+
+@dataclass(frozen=True)
+class Measurement:
+    """Peak memory of one measured build."""
+    backend: str
+    items: int
+    chars: int
+    traced_peak: int  # tracemalloc peak: Python allocations only
+    rss_growth: int  # growth of the process's resident high-water mark (0 if unknown)
+
+    @property
+    def cost(self) -> int:
+        return max(self.traced_peak, self.rss_growth)
+
+
+def sample_questions(items: int, repeat: int = 1) -> QuestionTable:
+    """
+    The sample bank cycled up to `items` questions, each text repeated
+    `repeat` times so text length varies independently of the count.
+    """
+    from questions_data import questions_data
+
+    return QuestionTable(
+        {"q": "\n".join([question["q"]] * repeat), "meta": question["meta"]}
+        for question in itertools.islice(itertools.cycle(questions_data), items)
+    )
+
+
+def _measure_in_child(backend: str, items: int, repeat: int, traced: bool, slide_style: str = "inline") -> int:
+    """Build one deck in this (fresh) process and return its peak bytes."""
+    import io
+    import tracemalloc
+
+    from generate_ppt import write_presentation
+
+    write_presentation(
+        sample_questions(_WARMUP_QUESTIONS), io.BytesIO(), backend=backend, slide_style=slide_style
+    )
+    questions = sample_questions(items, repeat)
+    gc.collect()
+    if traced:
+        tracemalloc.start()
+        write_presentation(questions, io.BytesIO(), backend=backend, slide_style=slide_style)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+    try:
+        import resource
+    except ImportError:  # no resident-memory high-water mark on this platform
+        return 0
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    write_presentation(questions, io.BytesIO(), backend=backend, slide_style=slide_style)
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * unit
+
+
+def measure_build(backend: str, items: int, repeat: int = 1, slide_style: str = "inline") -> Measurement:
+    """
+    Measure building a sample deck, each reading in a fresh process so
+    earlier builds' high-water marks and tracemalloc's own overhead don't
+    leak into it.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    readings = []
+    for traced in (True, False):
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            readings.append(pool.submit(
+                _measure_in_child, backend, items, repeat, traced, slide_style
+            ).result())
+    questions = sample_questions(items, repeat)
+    return Measurement(backend, items, questions.text_length(), readings[0], readings[1])
+
+
+def fit_cost_model(measurements: Sequence[Measurement], margin: float = DEFAULT_MARGIN) -> CostModel:
+    """
+    Least-squares fit of cost = base + per_item * items + per_char * chars,
+    without negative terms, scaled up by `margin`.
+    """
+    rows = [(1.0, float(m.items), float(m.chars)) for m in measurements]
+    costs = [float(m.cost) for m in measurements]
+    terms = [0, 1, 2]
+    while True:
+        coefficients = _least_squares([[row[t] for t in terms] for row in rows], costs)
+        negative = [t for t, c in zip(terms, coefficients) if c < 0]
+        if not negative or len(terms) == 1:
+            break
+        terms.remove(negative[0])
+    fitted = [0.0, 0.0, 0.0]
+    for term, coefficient in zip(terms, coefficients):
+        fitted[term] = max(0.0, coefficient) * margin
+    return CostModel(int(fitted[0]), round(fitted[1], 1), round(fitted[2], 2))
+
+
+def _least_squares(rows: List[List[float]], targets: List[float]) -> List[float]:
+    """Solve the normal equations by Gaussian elimination."""
+    n = len(rows[0])
+    matrix = [
+        [sum(row[i] * row[j] for row in rows) for j in range(n)]
+        + [sum(row[i] * target for row, target in zip(rows, targets))]
+        for i in range(n)
+    ]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(matrix[r][col]))
+        matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+        if matrix[col][col] == 0:
+            continue
+        for r in range(n):
+            if r != col:
+                factor = matrix[r][col] / matrix[col][col]
+                matrix[r] = [a - factor * b for a, b in zip(matrix[r], matrix[col])]
+    return [matrix[i][n] / matrix[i][i] if matrix[i][i] else 0.0 for i in range(n)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure deck builds and fit memory cost models")
+    parser.add_argument("--backends", nargs="+", default=["pptx", "stream"])
+    parser.add_argument("--slide-styles", nargs="+", default=["inline", "master"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1000, 2500])
+    parser.add_argument("--repeats", type=int, nargs="+", default=[1, 4],
+                        help="times each question's text is repeated, to vary text length")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN)
+    parser.add_argument("--output", "-o", help="write the fitted models here as JSON")
+    args = parser.parse_args()
+
+    models = {}
+    print(f"{'model':>13} {'items':>6} {'chars':>9} {'traced MB':>10} {'rss MB':>8}")
+    for backend, slide_style in itertools.product(args.backends, args.slide_styles):
+        key = model_key(backend, slide_style)
+        measurements = []
+        for items, repeat in itertools.product(args.sizes, args.repeats):
+            start = time.perf_counter()
+            m = measure_build(backend, items, repeat, slide_style)
+            measurements.append(m)
+            print(f"{key:>13} {m.items:>6} {m.chars:>9} {m.traced_peak / 2**20:>10.1f} "
+                  f"{m.rss_growth / 2**20:>8.1f}   ({time.perf_counter() - start:.1f}s)")
+        models[key] = fit_cost_model(measurements, args.margin)
+        print(f"{key:>13} fitted: {models[key]}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({key: asdict(model) for key, model in models.items()}, f, indent=2)
+        print(f"✅ Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
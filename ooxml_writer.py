@@ -0,0 +1,388 @@
+"""
+Streaming OOXML Writer
+Writes a .pptx package straight into a zip stream, one slide at a time,
+without holding the slides in a python-pptx object graph.
+
+Parts are compressed at a chosen deflate level, or stored uncompressed,
+optionally deflating them on a thread pool while later parts are built.
+"""
+
+import io
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from functools import lru_cache
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Union
+
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import CT_Relationships, CT_Types, serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.serialized import PackageWriter
+from pptx.opc.spec import default_content_types
+
+# zlib's default level, which zipfile and so prs.save() use
+DEFAULT_COMPRESS_LEVEL = 6
+# Parts are handed to deflate threads in batches of about this many bytes,
+# spreading the pool's per-task overhead over many small slide parts
+_BATCH_BYTES = 256 * 1024
+# Batches queued per deflate thread before the writer waits for the oldest
+_PENDING_BATCHES_PER_THREAD = 2
+
+
+def _deflate(blobs: List[bytes], level: int) -> List[bytes]:
+    """Raw-deflate each blob the way zipfile does (runs on a deflate thread)."""
+    deflated = []
+    for blob in blobs:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        deflated.append(compressor.compress(blob) + compressor.flush())
+    return deflated
+
+
+class _Deflated:
+    """
+    Stand-in for the compressor zipfile gives a member, handing it data
+    already deflated elsewhere; zipfile still takes the CRC and sizes from
+    the original data written through it.
+    """
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def compress(self, data: bytes) -> bytes:
+        deflated, self._data = self._data, b""
+        return deflated
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _write_deflated(archive: zipfile.ZipFile, name: str, blob: bytes, deflated: bytes) -> None:
+    """As ZipFile.writestr() would, but with the data deflated already."""
+    info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.file_size = len(blob)  # lets zipfile decide on ZIP64 up front
+    with archive.open(info, "w") as member:
+        member._compressor = _Deflated(deflated)
+        member.write(blob)
+
+
+@lru_cache(maxsize=None)
+def can_write_deflated() -> bool:
+    """
+    Whether this Python's zipfile takes pre-deflated data the way
+    _write_deflated() hands it over. It relies on a private attribute of
+    zipfile's member writer, so it is tried once on a scratch archive: a
+    zipfile that no longer works that way makes PackageZip deflate parts
+    as it writes them instead.
+    """
+    blob = b"<probe>" * 64
+    buffer = io.BytesIO()
+    try:
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open("probe", "w") as member:
+                if not hasattr(member, "_compressor"):
+                    return False
+            _write_deflated(archive, "probe.xml", blob, _deflate([blob], DEFAULT_COMPRESS_LEVEL)[0])
+        with zipfile.ZipFile(buffer) as archive:
+            return archive.testzip() is None and archive.read("probe.xml") == blob
+    except Exception:
+        return False
+
+
+class PackageZip:
+    """
+    Zip archive the parts of a package are written to, in order.
+
+    Level 0 stores parts uncompressed; 1-9 deflate them at that level. With
+    more than one thread, parts are deflated in batches on a thread pool
+    (zlib releases the GIL) while the caller builds the next ones, and are
+    written out in the order they were added (on a zipfile that can't take
+    pre-deflated members, see can_write_deflated(), parts are deflated as
+    they're written). write() has the signature of python-pptx's physical
+    package writer, so PackageWriter can use it.
+    """
+
+    def __init__(
+        self,
+        output: Union[str, IO[bytes]],
+        level: int = DEFAULT_COMPRESS_LEVEL,
+        threads: int = 1
+    ):
+        """
+        Args:
+            output: Path or writable binary stream (need not be seekable)
+            level: Deflate level 1-9, or 0 to store parts uncompressed
+            threads: Deflate threads; 1 deflates each part as it's written
+        """
+        if not 0 <= level <= 9:
+            raise ValueError(f"Compression level must be 0-9, not {level}")
+        self.level = level
+        self._zip = zipfile.ZipFile(
+            output, "w",
+            compression=zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED,
+            compresslevel=level or None,
+            strict_timestamps=False
+        )
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if level and threads > 1 and can_write_deflated():
+            self._pool = ThreadPoolExecutor(threads, thread_name_prefix="deflate")
+        self._max_pending = threads * _PENDING_BATCHES_PER_THREAD
+        self._batch: List[Tuple[str, bytes]] = []
+        self._batch_bytes = 0
+        self._pending = deque()  # (members, future of their deflated data)
+
+    def write(self, pack_uri: PackURI, blob: bytes) -> None:
+        """Add a part (or a relationships item) to the archive."""
+        if self._pool is None:
+            self._zip.writestr(pack_uri.membername, blob)
+            return
+        self._batch.append((pack_uri.membername, blob))
+        self._batch_bytes += len(blob)
+        if self._batch_bytes >= _BATCH_BYTES:
+            self._submit_batch()
+
+    def close(self) -> None:
+        """Write the parts still queued and finish the archive."""
+        if self._pool is not None:
+            try:
+                self._submit_batch()
+                while self._pending:
+                    self._write_batch()
+            finally:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+        self._zip.close()
+
+    def __enter__(self) -> "PackageZip":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _submit_batch(self) -> None:
+        if not self._batch:
+            return
+        members = self._batch
+        future = self._pool.submit(_deflate, [blob for _, blob in members], self.level)
+        self._pending.append((members, future))
+        self._batch = []
+        self._batch_bytes = 0
+        if len(self._pending) > self._max_pending:
+            self._write_batch()
+
+    def _write_batch(self) -> None:
+        """Write the oldest queued batch once its parts are deflated."""
+        members, future = self._pending.popleft()
+        for (name, blob), deflated in zip(members, future.result()):
+            _write_deflated(self._zip, name, blob, deflated)
+
+
+def save_presentation(
+    prs,
+    output: Union[str, IO[bytes]],
+    level: int = DEFAULT_COMPRESS_LEVEL,
+    threads: int = 1
+) -> None:
+    """
+    prs.save() with a choice of compression: the same parts, written in
+    the same order by python-pptx's own package writer.
+
+    The parts are handed straight to the archive through PackageWriter's
+    private steps when this python-pptx has them; otherwise the deck is
+    saved with prs.save() and its members are copied over, recompressed.
+    """
+    package = prs.part.package
+    writer = PackageWriter(output, package._rels, tuple(package.iter_parts()))
+    if not all(hasattr(writer, step) for step in _PACKAGE_WRITER_STEPS):
+        _repack_presentation(prs, output, level, threads)
+        return
+    with PackageZip(output, level, threads) as phys_writer:
+        # PackageWriter._write(), into this archive rather than its own
+        writer._write_content_types_stream(phys_writer)
+        writer._write_pkg_rels(phys_writer)
+        writer._write_parts(phys_writer)
+
+
+# The steps of PackageWriter._write() that save_presentation() calls in turn
+_PACKAGE_WRITER_STEPS = ("_write_content_types_stream", "_write_pkg_rels", "_write_parts")
+
+
+def _repack_presentation(prs, output: Union[str, IO[bytes]], level: int, threads: int) -> None:
+    """save_presentation() through public APIs only: prs.save(), then re-zip."""
+    saved = io.BytesIO()
+    prs.save(saved)
+    with zipfile.ZipFile(saved) as source, PackageZip(output, level, threads) as target:
+        for info in source.infolist():
+            target.write(PackURI("/" + info.filename), source.read(info))
+
+
+class StreamingPresentationWriter:
+    """
+    Incremental writer for a presentation package.
+
+    Every part of the template except the presentation part is copied into
+    the zip up front. Slides are then serialized and written as they arrive,
+    and the parts that list them (presentation.xml, its relationships and
+    [Content_Types].xml) are written on close. Peak memory is one slide,
+    whatever the deck size.
+    """
+
+    def __init__(
+        self,
+        output: Union[str, IO[bytes]],
+        template,
+        level: int = DEFAULT_COMPRESS_LEVEL,
+        threads: int = 1
+    ):
+        """
+        Args:
+            output: Path or writable binary stream (need not be seekable)
+            template: Slide-less Presentation supplying masters, layouts and theme
+            level: Deflate level 1-9, or 0 to store parts uncompressed
+            threads: Deflate threads (see PackageZip)
+        """
+        self._zip = PackageZip(output, level, threads)
+        self._package = template.part.package
+        self._prs_part = template.part
+        self._content_types: Dict[PackURI, str] = {}
+        self._slide_partnames: List[PackURI] = []
+        self._extra_rels: List[Tuple[str, PackURI]] = []
+        self._closed = False
+        self._write_template_parts()
+
+    @property
+    def slide_count(self) -> int:
+        """Number of slides written so far."""
+        return len(self._slide_partnames)
+
+    def add_slide(
+        self, sld, layout_partname: PackURI, media: Iterable[Tuple[str, str, bytes]] = ()
+    ) -> PackURI:
+        """
+        Serialize a slide and write it, with its relationships, to the zip.
+
+        Args:
+            sld: p:sld element of the slide, or its already serialized XML
+                (e.g. rendered in another process)
+            layout_partname: Partname of the slide layout the slide is based on
+            media: (partname, content type, blob) of the images the slide
+                relates to as rId2, rId3, ...; a partname already in the
+                package is related to again, not written twice
+
+        Returns:
+            The slide's partname
+        """
+        partname = PackURI(f"/ppt/slides/slide{self.slide_count + 1}.xml")
+        blob = sld if isinstance(sld, bytes) else serialize_part_xml(sld)
+        self._write_part(partname, CT.PML_SLIDE, blob)
+
+        rels = CT_Relationships.new()
+        rels.add_rel("rId1", RT.SLIDE_LAYOUT, layout_partname.relative_ref(partname.baseURI))
+        for number, (media_partname, content_type, media_blob) in enumerate(media, start=2):
+            media_partname = PackURI(media_partname)
+            if media_partname not in self._content_types:
+                self._write_part(media_partname, content_type, media_blob)
+            rels.add_rel(f"rId{number}", RT.IMAGE, media_partname.relative_ref(partname.baseURI))
+        self._zip.write(partname.rels_uri, rels.xml_file_bytes)
+        self._slide_partnames.append(partname)
+        return partname
+
+    def add_part(self, partname: PackURI, content_type: str, blob: bytes, reltype: str) -> None:
+        """
+        Write an extra part related from the presentation part (e.g. custom XML).
+
+        Its relationship is numbered after the slides', as python-pptx would
+        number a part related once every slide has been added.
+        """
+        self._write_part(partname, content_type, blob)
+        self._extra_rels.append((reltype, partname))
+
+    def close(self) -> None:
+        """Write the parts that reference every slide and finish the zip."""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_presentation_part()
+        self._zip.write(PACKAGE_URI.rels_uri, self._package._rels.xml)
+        self._zip.write(CONTENT_TYPES_URI, self._content_types_xml())
+        self._zip.close()
+
+    def __enter__(self) -> "StreamingPresentationWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write_part(self, partname: PackURI, content_type: str, blob: bytes) -> None:
+        """Write one part and record its content type."""
+        self._zip.write(partname, blob)
+        self._content_types[partname] = content_type
+
+    def _write_template_parts(self) -> None:
+        """Copy every template part except presentation.xml into the zip."""
+        for part in self._package.iter_parts():
+            if part is self._prs_part:
+                continue
+            self._write_part(part.partname, part.content_type, part.blob)
+            if len(part.rels):
+                self._zip.write(part.partname.rels_uri, part.rels.xml)
+
+    def _write_presentation_part(self) -> None:
+        """Write presentation.xml and its relationships, listing every slide."""
+        prs_elm = deepcopy(self._prs_part._element)
+        sld_id_lst = prs_elm.get_or_add_sldIdLst()
+        partname = self._prs_part.partname
+
+        rels = CT_Relationships.new()
+        template_rels = sorted(
+            self._prs_part.rels.values(), key=lambda rel: _rel_number(rel.rId)
+        )
+        for rel in template_rels:
+            rels.add_rel(rel.rId, rel.reltype, rel.target_ref, rel.is_external)
+
+        # Slide ids start at 256, rIds follow the template's as python-pptx numbers them
+        used_rids = {rel.rId for rel in template_rels}
+        number = len(used_rids)
+
+        def next_rid() -> str:
+            nonlocal number
+            number += 1
+            while f"rId{number}" in used_rids:
+                number += 1
+            return f"rId{number}"
+
+        for slide_id, slide_partname in enumerate(self._slide_partnames, start=256):
+            r_id = next_rid()
+            rels.add_rel(r_id, RT.SLIDE, slide_partname.relative_ref(partname.baseURI))
+            sld_id_lst._add_sldId(id=slide_id, rId=r_id)
+        for reltype, target in self._extra_rels:
+            rels.add_rel(next_rid(), reltype, target.relative_ref(partname.baseURI))
+
+        self._write_part(partname, self._prs_part.content_type, serialize_part_xml(prs_elm))
+        self._zip.write(partname.rels_uri, rels.xml_file_bytes)
+
+    def _content_types_xml(self) -> bytes:
+        """Build [Content_Types].xml the way python-pptx does for its parts."""
+        defaults = {"rels": CT.OPC_RELATIONSHIPS, "xml": CT.XML}
+        overrides: Dict[PackURI, str] = {}
+        for partname, content_type in self._content_types.items():
+            ext = partname.ext
+            if (ext.lower(), content_type) in default_content_types:
+                defaults[ext] = content_type
+            else:
+                overrides[partname] = content_type
+
+        types = CT_Types.new()
+        for ext, content_type in sorted(defaults.items()):
+            types.add_default(ext, content_type)
+        for partname, content_type in sorted(overrides.items()):
+            types.add_override(partname, content_type)
+        return serialize_part_xml(types)
+
+
+def _rel_number(r_id: str) -> int:
+    """Numeric suffix of an rId, used to order relationships like python-pptx."""
+    return int(r_id[3:]) if r_id.startswith("rId") and r_id[3:].isdigit() else 0
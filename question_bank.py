@@ -0,0 +1,319 @@
+"""
+Compiled Question Banks
+Compiles a JSON or Python question bank into a single indexed file that is
+memory-mapped on load, so any question can be fetched by position or by
+original question number without parsing the rest of the bank.
+
+File layout (integers little-endian):
+    header    magic b"PQBK", format version, question count, and the byte
+              offsets of the offset table and the number index
+    records   one JSON object {"q": ..., "meta": ...} per line (JSONL)
+    offsets   count + 1 unsigned 64-bit record start offsets, the last one
+              marking the end of the records
+    numbers   entry count, then (key offset, key length, position) entries
+              sorted by normalized question number, then the UTF-8 keys;
+              looked up by binary search in place
+
+Usage:
+    python question_bank.py compile SOURCE.json|SOURCE.py BANK.pqb
+    python question_bank.py show BANK.pqb [NUMBER ...]
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from question_types import QuestionData, question_number
+
+BANK_SUFFIX = ".pqb"
+_MAGIC = b"PQBK"
+_VERSION = 1
+# magic, version, reserved, question count, offsets position, numbers position
+_HEADER = struct.Struct("<4sHHQQQ")
+_OFFSET = struct.Struct("<Q")
+# absolute offset of the normalized number's bytes, their length, question position
+_NUMBER_ENTRY = struct.Struct("<QHQ")
+_NUMBER_NOISE = re.compile(r"[.\s]")
+
+
+class BankFormatError(ValueError):
+    """Raised when a file is not a compiled question bank this code can read."""
+
+
+def _number_key(number: str) -> str:
+    """Normalize a question number for lookup: "12. (ii)" and "12(ii)" match."""
+    return _NUMBER_NOISE.sub("", number)
+
+
+# =============================================================================
+# SOURCES
+# =============================================================================
+
+def iter_source(path: str, variable: str = "questions_data") -> Iterator[QuestionData]:
+    """
+    Yield validated questions from a bank in any supported format.
+
+    Args:
+        path: A JSON array file, a Python module assigning the bank as a
+            list literal, or a compiled bank
+        variable: Name of the list assigned in a Python module
+
+    Raises:
+        ingest.QuestionValidationError: On the first invalid question
+        ValueError: If a Python module has no such list literal
+    """
+    from ingest import iter_questions, validate_question
+
+    if path.endswith(BANK_SUFFIX):
+        with QuestionBank(path) as bank:
+            yield from bank
+    elif path.endswith(".py"):
+        for i, item in enumerate(_python_literal(path, variable), start=1):
+            yield validate_question(item, i)
+    else:
+        with open(path, "rb") as f:
+            yield from iter_questions(f)
+
+
+def _python_literal(path: str, variable: str) -> List[Any]:
+    """Evaluate the list literal assigned to variable, without running the module."""
+    import ast
+
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == variable for t in targets):
+            value = ast.literal_eval(node.value)
+            if not isinstance(value, list):
+                raise ValueError(f"{variable} in {path} is not a list")
+            return value
+    raise ValueError(f"No {variable} list literal in {path}")
+
+
+# =============================================================================
+# COMPILER
+# =============================================================================
+
+def compile_bank(source: str, output: str, variable: str = "questions_data") -> int:
+    """
+    Compile a question bank into an indexed, memory-mappable file.
+
+    Args:
+        source: Bank path (see iter_source())
+        output: Path of the compiled bank to write
+        variable: Name of the list assigned in a Python source module
+
+    Returns:
+        Number of questions compiled
+    """
+    return write_bank(iter_source(source, variable), output)
+
+
+def write_bank(questions: Iterable[QuestionData], output: str) -> int:
+    """
+    Write validated questions as a compiled bank.
+
+    The questions are streamed and the output replaced only once complete,
+    so a failure part-way leaves any previous bank at that path intact.
+
+    Returns:
+        Number of questions written
+    """
+    numbers: Dict[str, List[int]] = {}
+    offsets = []
+    temp_path = f"{output}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            position = _HEADER.size
+            for index, question in enumerate(questions):
+                record = json.dumps(
+                    {"q": question['q'], "meta": question['meta']}, ensure_ascii=False
+                ).encode() + b"\n"
+                offsets.append(position)
+                f.write(record)
+                position += len(record)
+                numbers.setdefault(_number_key(question_number(question['q'])), []).append(index)
+            offsets.append(position)
+
+            offsets_at = position
+            f.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+            numbers_at = f.tell()
+            f.write(_number_index(numbers, numbers_at))
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(offsets) - 1, offsets_at, numbers_at))
+        os.replace(temp_path, output)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return len(offsets) - 1
+
+
+def _number_index(numbers: Dict[str, List[int]], at: int) -> bytes:
+    """Serialize the number index for a file position, keys sorted bytewise."""
+    keys = sorted((key.encode(), positions) for key, positions in numbers.items())
+    entry_count = sum(len(positions) for _, positions in keys)
+    key_at = at + _OFFSET.size + entry_count * _NUMBER_ENTRY.size
+    entries, blob = [], []
+    for key, positions in keys:
+        for position in positions:
+            entries.append(_NUMBER_ENTRY.pack(key_at, len(key), position))
+        blob.append(key)
+        key_at += len(key)
+    return _OFFSET.pack(entry_count) + b"".join(entries) + b"".join(blob)
+
+
+# =============================================================================
+# LOADER
+# =============================================================================
+
+class QuestionBank:
+    """
+    Read-only view of a compiled bank, memory-mapped rather than loaded.
+
+    Indexing and iteration decode only the records they return, and lookups
+    by number binary-search the index inside the mapping. Accepted anywhere
+    a list of question dictionaries is, e.g. write_presentation().
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Compiled bank written by compile_bank()
+
+        Raises:
+            BankFormatError: If the file is not a compiled bank
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise BankFormatError(f"{path} is not a compiled question bank")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, offsets_at, numbers_at = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise BankFormatError(f"{path} is not a version {_VERSION} compiled question bank")
+        if numbers_at != offsets_at + (count + 1) * _OFFSET.size or numbers_at > size:
+            self.close()
+            raise BankFormatError(f"{path} is truncated or corrupt")
+        self._count = count
+        self._offsets_at = offsets_at
+        self._entries_at = numbers_at + _OFFSET.size
+        self._entry_count, = _OFFSET.unpack_from(self._map, numbers_at)
+
+    def __enter__(self) -> "QuestionBank":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._map.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[QuestionData, List[QuestionData]]:
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("question index out of range")
+        return self._record(index)
+
+    def __iter__(self) -> Iterator[QuestionData]:
+        for index in range(self._count):
+            yield self._record(index)
+
+    def by_number(self, number: str) -> List[QuestionData]:
+        """
+        Questions whose original number matches, in bank order.
+
+        Args:
+            number: e.g. "12", "12." or "12. (ii)"; dots and spaces are ignored
+        """
+        return [self._record(index) for index in self.positions(number)]
+
+    def positions(self, number: str) -> List[int]:
+        """Bank positions of the questions with this original number."""
+        target = _number_key(number).encode()
+        low, high = 0, self._entry_count
+        while low < high:  # leftmost entry whose key is >= target
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        positions = []
+        while low < self._entry_count:
+            key, position = self._entry(low)
+            if key != target:
+                break
+            positions.append(position)
+            low += 1
+        return positions
+
+    def _entry(self, index: int):
+        key_at, key_length, position = _NUMBER_ENTRY.unpack_from(
+            self._map, self._entries_at + index * _NUMBER_ENTRY.size
+        )
+        return self._map[key_at:key_at + key_length], position
+
+    def _record(self, index: int) -> QuestionData:
+        start, = _OFFSET.unpack_from(self._map, self._offsets_at + index * _OFFSET.size)
+        end, = _OFFSET.unpack_from(self._map, self._offsets_at + (index + 1) * _OFFSET.size)
+        return json.loads(self._map[start:end])
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile and inspect indexed question banks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_cmd = commands.add_parser("compile", help="compile a JSON or Python bank")
+    compile_cmd.add_argument("source")
+    compile_cmd.add_argument("output")
+    compile_cmd.add_argument("--variable", default="questions_data",
+                             help="list assigned in a Python source (default: questions_data)")
+    show_cmd = commands.add_parser("show", help="summarize a bank or print questions by number")
+    show_cmd.add_argument("bank")
+    show_cmd.add_argument("numbers", nargs="*")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        count = compile_bank(args.source, args.output, args.variable)
+        print(f"✅ Compiled {count} questions into {args.output} ({os.path.getsize(args.output)} bytes)")
+        return 0
+
+    with QuestionBank(args.bank) as bank:
+        if not args.numbers:
+            print(f"{args.bank}: {len(bank)} questions")
+        for number in args.numbers:
+            matches = bank.by_number(number)
+            if not matches:
+                print(f"Q{number}: not found", file=sys.stderr)
+            for question in matches:
+                print(json.dumps(question, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
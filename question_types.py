@@ -0,0 +1,135 @@
+"""
+Question Types
+Shared type definitions for question data, kept apart from the sample
+question bank so that importing them stays cheap.
+
+Besides the plain QuestionData dictionaries, large banks can be held in a
+QuestionTable: column storage with each distinct meta string kept and
+parsed once, several times smaller than a list of dicts.
+"""
+
+import re
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Type alias for question structure
+QuestionData = Dict[str, str]
+
+# Original question number at the start of the text, e.g. "12. (ii)"
+QUESTION_NUMBER_RE = re.compile(r'^(SQ)?\d+\.?\s*(\([ivx]+\))?')
+
+
+def split_meta(meta: str) -> Tuple[str, str]:
+    """Split a "YEAR | MARKS" meta string into (year, marks)."""
+    parts = meta.split('|')
+    year = parts[0].strip() if len(parts) > 0 else ""
+    marks = parts[1].strip() if len(parts) > 1 else ""
+    return year, marks
+
+
+def question_number(q_text: str) -> str:
+    """Original question number at the start of q_text, or "?"."""
+    match = QUESTION_NUMBER_RE.match(q_text)
+    return match.group(0).strip() if match else "?"
+
+
+class QuestionRow(NamedTuple):
+    """
+    One question from a QuestionTable, with its meta and number already
+    parsed. Reads like a QuestionData dict: row['q'], row['meta'].
+    """
+    q: str
+    meta: str
+    year: str
+    marks: str
+    number: str
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return getattr(self, key) if key in self._fields else default
+
+
+class QuestionTable:
+    """
+    Compact, append-only column store of questions.
+
+    Question texts sit in one list; each question's meta is a 32-bit index
+    into a table of distinct meta strings, which are parsed into year and
+    marks once each; question numbers are interned. Iterating yields
+    QuestionRow tuples built on the fly, so anything that accepts a list of
+    QuestionData dicts accepts a table.
+    """
+
+    __slots__ = ("_texts", "_numbers", "_meta_ids", "_metas", "_meta_fields", "_meta_index")
+
+    def __init__(self, questions: Iterable[QuestionData] = ()):
+        """
+        Args:
+            questions: Question dictionaries with 'q' and (optionally) 'meta'
+        """
+        self._texts: List[str] = []
+        self._numbers: List[str] = []
+        self._meta_ids = array("I")
+        self._metas: List[str] = []
+        self._meta_fields: List[Tuple[str, str]] = []
+        self._meta_index: Dict[str, int] = {}
+        self.extend(questions)
+
+    def append(self, q: str, meta: str = "") -> None:
+        """Add one question."""
+        self.extend([{"q": q, "meta": meta}])
+
+    def extend(self, questions: Iterable[QuestionData]) -> None:
+        """Add questions in a single pass, parsing each new meta string once."""
+        texts, numbers, meta_ids = self._texts, self._numbers, self._meta_ids
+        meta_index = self._meta_index
+        match_number = QUESTION_NUMBER_RE.match
+        intern = sys.intern
+        for question in questions:
+            q = question['q']
+            meta = question.get('meta') or ""
+            meta_id = meta_index.get(meta)
+            if meta_id is None:
+                meta_id = meta_index[meta] = len(self._metas)
+                self._metas.append(meta)
+                self._meta_fields.append(split_meta(meta))
+            match = match_number(q)
+            texts.append(q)
+            numbers.append(intern(match.group(0).strip()) if match else "?")
+            meta_ids.append(meta_id)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __iter__(self) -> Iterator[QuestionRow]:
+        metas, fields = self._metas, self._meta_fields
+        for q, number, meta_id in zip(self._texts, self._numbers, self._meta_ids):
+            year, marks = fields[meta_id]
+            yield QuestionRow(q, metas[meta_id], year, marks, number)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[QuestionRow, "QuestionTable"]:
+        if isinstance(index, slice):
+            return QuestionTable(self[i] for i in range(*index.indices(len(self))))
+        meta_id = self._meta_ids[index]
+        year, marks = self._meta_fields[meta_id]
+        return QuestionRow(self._texts[index], self._metas[meta_id], year, marks, self._numbers[index])
+
+    def distinct_metas(self) -> int:
+        """Number of distinct meta strings stored."""
+        return len(self._metas)
+
+    def text_length(self) -> int:
+        """Total characters of question and meta text."""
+        meta_lengths = [len(meta) for meta in self._metas]
+        return sum(map(len, self._texts)) + sum(meta_lengths[meta_id] for meta_id in self._meta_ids)
+
+    def to_dicts(self) -> List[QuestionData]:
+        """The questions as plain QuestionData dictionaries."""
+        return [{"q": row.q, "meta": row.meta} for row in self]
@@ -6,10 +6,9 @@ Author: Chemistry Teacher Assistant
 Date: 2025
 """
 
-from typing import List, Dict
+from typing import List
 
-# Type alias for question structure
-QuestionData = Dict[str, str]
+from question_types import QuestionData
 
 questions_data: List[QuestionData] = [
   {
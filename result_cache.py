@@ -0,0 +1,187 @@
+"""
+Generated Deck Cache
+Content-addressed on-disk cache of finished .pptx files, keyed by a hash of
+the normalized question list and the active style settings, with size-based
+LRU eviction.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import IO, Iterable, Optional
+
+from question_types import QuestionData
+
+# Bump when slide rendering changes so stale decks are never served
+CACHE_FORMAT = "deck-v3"
+_SUFFIX = ".pptx"
+# Temp files this old can't belong to a write still in progress
+_STALE_TEMP_SECONDS = 3600
+
+
+def content_key(questions: Iterable[QuestionData], *settings) -> str:
+    """
+    Hash a question list and style settings into a cache key.
+
+    Only the "q" and "meta" values of each question are hashed, so key
+    order, whitespace and extra fields in the upload don't matter.
+
+    Args:
+        questions: Validated question dictionaries
+        settings: Style objects (e.g. SlideColors, SlideLayout, FontSettings)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256(CACHE_FORMAT.encode())
+    for setting in settings:
+        digest.update(repr(setting).encode())
+        digest.update(b"\0")
+    for question in questions:
+        item = json.dumps([question['q'], question['meta']], ensure_ascii=False)
+        digest.update(item.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ResultCacheStats:
+    """Snapshot of the deck cache's counters."""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    Directory of decks named by content key, evicted least recently used
+    first once their total size exceeds a byte budget.
+
+    Worker processes may share a directory: each keeps its own index and
+    adopts decks written by the others when it first serves them, so the
+    budget is enforced per process over the decks it knows about.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Total size budget; 0 disables the cache
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if max_bytes > 0:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    def open(self, key: str) -> Optional[IO[bytes]]:
+        """
+        Open the cached deck for key, marking it most recently used.
+
+        Returns:
+            Binary file positioned at the start, or None on a miss
+        """
+        if self.max_bytes <= 0:
+            return None
+        with self._lock:
+            try:
+                deck = open(self._path(key), "rb")
+            except FileNotFoundError:
+                # Evicted, possibly by another worker sharing the directory
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            # Adopt decks written by other workers into this process's index
+            self._entries[key] = os.fstat(deck.fileno()).st_size
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._evict()
+        # Persist recency across restarts; a failure here only costs ordering
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return deck
+
+    def put(self, key: str, deck: IO[bytes]) -> None:
+        """
+        Store a finished deck, copied from the stream's current position.
+
+        The stream position is left at the end of the copied data.
+        """
+        if self.max_bytes <= 0:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(deck, out)
+                size = out.tell()
+            # Atomic publish: readers see the whole deck or none of it
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        with self._lock:
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def stats(self) -> ResultCacheStats:
+        """Return a consistent snapshot of the counters."""
+        with self._lock:
+            return ResultCacheStats(
+                self.hits, self.misses, self.evictions,
+                len(self._entries), sum(self._entries.values()), self.max_bytes
+            )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _evict(self) -> None:
+        """Drop oldest decks until within budget (caller holds the lock)."""
+        total = sum(self._entries.values())
+        while total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            total -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _load_index(self) -> None:
+        """Rebuild the in-memory index from the directory, oldest first."""
+        found = []
+        stale_before = time.time() - _STALE_TEMP_SECONDS
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-len(_SUFFIX)], stat.st_size))
+            elif entry.name.endswith(".tmp") and entry.stat().st_mtime < stale_before:
+                # Left over from an interrupted write
+                os.unlink(entry.path)
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+        self._evict()
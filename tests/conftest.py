@@ -0,0 +1,60 @@
+"""
+Shared test setup: the repo root on sys.path, and the app's on-disk state
+(result cache, jobs, banks, formula images) kept in a scratch directory
+rather than the system temp dir.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_STATE_DIR = tempfile.mkdtemp(prefix="pptgen-tests-")
+for _name in ("RESULT_CACHE_DIR", "JOBS_DIR", "BANKS_DIR", "FORMULA_CACHE_DIR"):
+    os.environ.setdefault(_name, os.path.join(_STATE_DIR, _name.lower()))
+
+SAMPLE = [
+    {"q": "1. What is the SI unit of electric current?", "meta": "2024 | 1 Mark"},
+    {"q": "2. Balance $H_{2} + O_{2} \\rightarrow H_{2}O$.", "meta": "2023 | 2 Marks"},
+    {"q": "3. Define the term \"corrosion\".", "meta": "Delhi 2019 | 3 Marks"},
+]
+
+
+def upload(questions, name: str = "questions.json", **fields):
+    """Form data for a jsonFile upload, plus any extra form fields."""
+    return {"jsonFile": (io.BytesIO(json.dumps(questions).encode()), name), **fields}
+
+
+def run_job(client, questions=SAMPLE) -> bytes:
+    """Submit a /jobs build, wait for it to finish and return its deck."""
+    response = client.post("/jobs", data=upload(questions))
+    assert response.status_code == 202
+    status_url = response.get_json()["status_url"]
+    deadline = time.monotonic() + 60
+    while True:
+        info = client.get(status_url).get_json()
+        if info["status"] in ("done", "failed") or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert info["status"] == "done", info
+    return client.get(response.get_json()["result_url"]).data
+
+
+@pytest.fixture(scope="session")
+def flask_app():
+    from app import app
+
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
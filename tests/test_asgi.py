@@ -0,0 +1,147 @@
+"""Build admission in the ASGI entry point: queue places and build slots."""
+
+import asyncio
+import threading
+import uuid
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+from conftest import SAMPLE, upload
+
+asgi = pytest.importorskip("asgi")
+
+
+def _request(questions, headers=()):
+    """ASGI scope plus body of a /generate upload."""
+    environ = EnvironBuilder(method="POST", data=upload(questions)).get_environ()
+    body = environ["wsgi.input"].read()
+    scope = {
+        "type": "http", "method": "POST", "path": "/generate", "query_string": b"",
+        "headers": [
+            (b"content-type", environ["CONTENT_TYPE"].encode()),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    }
+    return scope, body
+
+
+class Client:
+    """One ASGI request whose body is sent only when the test says so."""
+
+    def __init__(self, app, scope, body):
+        self.messages = []
+        self.reads = 0
+        self._body = body
+        self._go = asyncio.Event()
+        self._disconnect = False
+        self.task = asyncio.ensure_future(app(scope, self._receive, self._send))
+
+    def send_body(self):
+        self._go.set()
+
+    def disconnect(self):
+        self._disconnect = True
+        self._go.set()
+
+    @property
+    def status(self):
+        return self.messages[0]["status"] if self.messages else None
+
+    async def _receive(self):
+        self.reads += 1
+        await self._go.wait()
+        if self._disconnect:
+            return {"type": "http.disconnect"}
+        return {"type": "http.request", "body": self._body, "more_body": False}
+
+    async def _send(self, message):
+        self.messages.append(message)
+
+
+async def _until(condition, timeout=30):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def blocked_builds(flask_app, monkeypatch):
+    """Make every deck build wait until the returned event is set."""
+    import app
+
+    release = threading.Event()
+    build_deck = app.build_deck
+
+    def blocked(*args, **kwargs):
+        release.wait(30)
+        return build_deck(*args, **kwargs)
+
+    monkeypatch.setattr(app, "build_deck", blocked)
+    yield release
+    release.set()
+
+
+def _fresh():
+    return [{"q": f"1. {uuid.uuid4().hex}?", "meta": "2024 | 1 Mark"}] + SAMPLE[1:]
+
+
+def test_queue_place_is_taken_before_the_body(flask_app, blocked_builds):
+    async def scenario():
+        app = asgi.AsgiApp(flask_app, concurrency=1, queue_size=1)
+        limiter = app.limiter
+        building = Client(app, *_request(_fresh()))
+        building.send_body()
+        await _until(lambda: limiter.running == 1)
+
+        uploading = Client(app, *_request(_fresh()))  # body not sent yet
+        await _until(lambda: uploading.reads == 1)
+        assert limiter.waiting == 1
+
+        turned_away = Client(app, *_request(_fresh()))
+        await asyncio.wait_for(turned_away.task, 5)
+        assert turned_away.status == 429
+        assert turned_away.reads == 0  # its upload was never read
+
+        uploading.disconnect()
+        await asyncio.wait_for(uploading.task, 5)
+        assert limiter.waiting == 0
+
+        blocked_builds.set()
+        await asyncio.wait_for(building.task, 30)
+        assert building.status == 200
+        assert (limiter.running, limiter.waiting) == (0, 0)
+        app.close()
+
+    asyncio.run(scenario())
+
+
+def test_cached_decks_skip_the_build_slot(flask_app, client, blocked_builds):
+    cached = _fresh()
+    blocked_builds.set()
+    etag = client.post("/generate", data=upload(cached)).headers["ETag"].strip('"')
+    blocked_builds.clear()
+
+    async def scenario():
+        app = asgi.AsgiApp(flask_app, concurrency=1, queue_size=2)
+        building = Client(app, *_request(_fresh()))
+        building.send_body()
+        await _until(lambda: app.limiter.running == 1)
+
+        hit = Client(app, *_request(cached))
+        not_modified = Client(app, *_request(cached, [(b"if-none-match", f'"{etag}"'.encode())]))
+        hit.send_body()
+        not_modified.send_body()
+        await asyncio.wait_for(asyncio.gather(hit.task, not_modified.task), 10)
+        assert (hit.status, not_modified.status) == (200, 304)
+        assert not building.task.done()
+        assert app.limiter.waiting == 0
+
+        blocked_builds.set()
+        await asyncio.wait_for(building.task, 30)
+        assert building.status == 200
+        app.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+"""Bank queries whose text has no indexable words match nothing."""
+
+import pytest
+
+from conftest import SAMPLE, upload
+
+
+@pytest.fixture
+def bank(client):
+    response = client.put("/banks/stopwords", data=upload(SAMPLE))
+    assert response.status_code == 200
+    yield "stopwords"
+    client.delete("/banks/stopwords")
+
+
+def test_index_query_of_stopwords_is_empty(flask_app, bank):
+    from app import bank_registry
+
+    index = bank_registry.get(bank)
+    assert list(index.query(text="the of and")) == []
+    assert list(index.query(text="?!")) == []
+    assert list(index.query()) == list(range(len(SAMPLE)))
+    assert list(index.query(text="the corrosion")) == [2]
+
+
+@pytest.mark.parametrize("route", ["questions", "generate"])
+def test_stopword_query_is_rejected(client, bank, route):
+    response = client.get(f"/banks/{bank}/{route}", query_string={"q": "what is the"})
+    assert response.status_code == 400
+    assert "searchable" in response.get_json()["error"]
@@ -0,0 +1,71 @@
+"""Loading one bank's index doesn't hold up requests for the others."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bank_registry
+from bank_registry import BankRegistry
+from conftest import SAMPLE
+
+
+def test_slow_load_does_not_block_other_banks(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    writer = BankRegistry(directory)
+    for name in ("slow", "fast", "other"):
+        writer.put(name, SAMPLE)
+
+    registry = BankRegistry(directory)
+    fast = registry.get("fast")
+
+    release = threading.Event()
+    started = threading.Event()
+    builds = []
+    build_index = bank_registry.BankIndex
+
+    def slow_index(bank, *args):
+        builds.append(bank)
+        if "slow" in bank.path:
+            started.set()
+            assert release.wait(10)
+        return build_index(bank, *args)
+
+    monkeypatch.setattr(bank_registry, "BankIndex", slow_index)
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(registry.get, "slow")
+        assert started.wait(10)
+        second = pool.submit(registry.get, "slow")
+
+        # Meanwhile the registry serves, and changes, every other bank
+        assert registry.get("fast") is fast
+        assert registry.delete("other")
+        assert registry.get("other") is None
+        assert not first.done()
+
+        release.set()
+        index = first.result(10)
+        assert second.result(10) is index
+    assert len(builds) == 1
+    assert registry.get("slow") is index
+    assert list(index.query(text="corrosion")) == [2]
+
+
+def test_delete_while_loading_is_not_undone(tmp_path, monkeypatch):
+    BankRegistry(str(tmp_path)).put("bank", SAMPLE)
+    registry = BankRegistry(str(tmp_path))
+    release = threading.Event()
+    started = threading.Event()
+    build_index = bank_registry.BankIndex
+
+    def slow_index(bank, *args):
+        started.set()
+        assert release.wait(10)
+        return build_index(bank, *args)
+
+    monkeypatch.setattr(bank_registry, "BankIndex", slow_index)
+    with ThreadPoolExecutor(1) as pool:
+        loading = pool.submit(registry.get, "bank")
+        assert started.wait(10)
+        assert registry.delete("bank")
+        release.set()
+        loading.result(10)
+    assert registry.get("bank") is None
@@ -0,0 +1,30 @@
+"""/generate/batch keeps every deck inside the returned archive."""
+
+import io
+import json
+import zipfile
+
+from conftest import SAMPLE
+
+
+def _zip(names) -> io.BytesIO:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        for name in names:
+            archive.writestr(name, json.dumps(SAMPLE))
+    data.seek(0)
+    return data
+
+
+def test_member_paths_cannot_escape_the_archive(client):
+    names = ["../../etc/evil.json", "C:\\x\\..\\..\\y.json", "/abs/z.json", "ok/../../w.json"]
+    response = client.post("/generate/batch", data={"jsonFile": (_zip(names), "decks.zip")})
+    assert response.status_code == 200
+
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        decks = [name for name in archive.namelist() if name != "report.json"]
+        report = json.loads(archive.read("report.json"))
+    assert [entry["status"] for entry in report] == ["ok"] * 4
+    assert sorted(decks) == ["abs/z.pptx", "etc/evil.pptx", "w.pptx", "y.pptx"]
+    for name in decks:
+        assert ".." not in name.split("/") and ":" not in name and "\\" not in name
@@ -0,0 +1,115 @@
+"""
+Formula images: which formulas are rendered, how rendered images are
+shared and laid out, and the fall back to text when rendering fails.
+"""
+
+import glob
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from formula_images import FormulaRenderer
+from generate_ppt import FONTS, formula_is_lossy, write_presentation
+from text_layout import EMU_PER_POINT, InlineBox, TextFitter
+
+
+class BrokenPool(Executor):
+    """An executor whose every task fails as a dead process pool's would."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+def test_get_returns_none_when_pool_raises(tmp_path):
+    pool = BrokenPool()
+    renderer = FormulaRenderer(str(tmp_path), executor=pool)
+
+    assert renderer.get(r"\frac{a}{b}") is None
+    assert renderer._pending == {}
+    assert renderer.renders == 0
+
+    # Not remembered as unrenderable: the next call submits again.
+    assert renderer.get(r"\frac{a}{b}") is None
+    assert pool.submitted == 2
+
+
+def test_prefetched_failure_is_cleared(tmp_path):
+    pool = BrokenPool()
+    renderer = FormulaRenderer(str(tmp_path), executor=pool)
+
+    renderer.prefetch([r"x^{2}", r"y_{1}"])
+    assert len(renderer._pending) == 2
+    assert renderer.get(r"x^{2}") is None
+    assert list(renderer._pending) == [renderer.key(r"y_{1}")]
+
+
+def test_only_lossy_formulas_are_rendered():
+    assert not formula_is_lossy("R_{1}")  # Unicode subscript one
+    assert not formula_is_lossy("H_{2}O \\rightarrow")
+    assert formula_is_lossy("\\frac{a}{b}")
+    assert formula_is_lossy("\\sqrt{2}")
+
+
+def _deck(questions, renderer, backend):
+    deck = io.BytesIO()
+    write_presentation(questions, deck, backend=backend, formulas=renderer)
+    return zipfile.ZipFile(io.BytesIO(deck.getvalue()))
+
+
+@pytest.mark.parametrize("backend", ["pptx", "stream"])
+def test_identical_formulas_share_one_media_part(tmp_path, backend):
+    renderer = FormulaRenderer(str(tmp_path), workers=0)
+    questions = [
+        {"q": "1. Evaluate $\\frac{a}{b}$ for a = 2b.", "meta": "2024 | 1 Mark"},
+        {"q": "2. Show that $\\frac{a}{b}$ is rational.", "meta": "2023 | 2 Marks"},
+    ]
+    with _deck(questions, renderer, backend) as deck:
+        media = [name for name in deck.namelist() if name.startswith("ppt/media/formula-")]
+        rels = [deck.read(f"ppt/slides/_rels/slide{n}.xml.rels").decode() for n in (1, 2)]
+    assert len(media) == 1
+    target = "../media/" + media[0].rsplit("/", 1)[1]
+    assert all(target in slide_rels for slide_rels in rels)
+    assert renderer.renders == 1
+
+
+@pytest.mark.parametrize("backend", ["pptx", "stream"])
+def test_unrenderable_formula_falls_back_to_text(tmp_path, backend):
+    renderer = FormulaRenderer(str(tmp_path), workers=0)
+    questions = [{"q": "1. Expand $\\foo{x}$ here.", "meta": "2024 | 1 Mark"}]
+    with _deck(questions, renderer, backend) as deck:
+        assert not [name for name in deck.namelist() if name.startswith("ppt/media/")]
+        slide = deck.read("ppt/slides/slide1.xml").decode()
+    text = "".join(re.findall(r"<a:t>([^<]*)</a:t>", slide))
+    assert "Expand" in text and "here." in text
+    assert len(glob.glob(os.path.join(str(tmp_path), "*", "*.none"))) == 1
+    # Known to be unrenderable: not tried again
+    assert FormulaRenderer(str(tmp_path), workers=0).get("\\foo{x}") is None
+
+
+def test_fit_flow_paginates_an_overflowing_flow():
+    fitter = TextFitter(FONTS.name, width=8_000_000, height=2_000_000, max_size=28, min_size=20)
+    box = InlineBox(3.0, 2.0, content="formula")
+    flow = [["Paragraph", " ", "with", " ", box, " ", "text."] for _ in range(40)]
+
+    fit = fitter.fit_flow(flow)
+
+    assert fit.size == 20
+    assert len(fit.pages) > 1
+    lines = [line for page in fit.pages for line in page]
+    assert sum(isinstance(item, InlineBox) for line in lines for _, item in line.runs) == 40
+    height = 2_000_000 / (20 * EMU_PER_POINT)
+    assert all(sum(line.height for line in page) <= height for page in fit.pages if len(page) > 1)
+
+    short = fitter.fit_flow([["Short", " ", box]])
+    assert (short.size, len(short.pages)) == (28, 1)
@@ -0,0 +1,53 @@
+"""/generate answers from a spooled buffer and leaves no temp files behind."""
+
+import io
+import os
+import tempfile
+
+from conftest import SAMPLE, upload
+
+
+def _temp_entries():
+    return set(os.listdir(tempfile.gettempdir()))
+
+
+def _baseline(questions, backend):
+    """The deck built straight into memory with the app's options."""
+    from generate_ppt import Compression, write_presentation
+
+    deck = io.BytesIO()
+    write_presentation(questions, deck, backend=backend, record_hashes=True, compression=Compression())
+    return deck.getvalue()
+
+
+def test_deck_matches_direct_build(client):
+    for backend in ("pptx", "stream"):
+        # Distinct per backend: the result cache would answer the second one
+        questions = [dict(q, meta=f"{q['meta']} ({backend})") for q in SAMPLE]
+        response = client.post("/generate", data=upload(questions, backend=backend))
+        assert response.status_code == 200
+        assert response.headers["Content-Length"] == str(len(response.data))
+        assert response.data == _baseline(questions, backend)
+
+
+def test_spilled_deck_matches_direct_build(client, flask_app, monkeypatch):
+    monkeypatch.setitem(flask_app.config, "SPOOL_MAX_SIZE", 1024)
+    questions = [dict(q, meta="2001") for q in SAMPLE]  # not in the result cache yet
+    response = client.post("/generate", data=upload(questions))
+    assert response.status_code == 200
+    assert response.headers["Content-Length"] == str(len(response.data))
+    assert response.data == _baseline(questions, "pptx")
+
+
+def test_no_temp_files_left_behind(client, flask_app, monkeypatch):
+    monkeypatch.setitem(flask_app.config, "SPOOL_MAX_SIZE", 1024)  # every deck spills to disk
+    before = _temp_entries()
+    for index in range(40):
+        questions = [dict(q, meta=f"{1950 + index}") for q in SAMPLE]
+        backend = ("pptx", "stream")[index % 2]
+        response = client.post("/generate", data=upload(questions, backend=backend))
+        assert response.status_code == 200
+        response.close()
+        bad = client.post("/generate", data=upload([{"meta": "2020"}]))
+        assert bad.status_code == 400
+    assert _temp_entries() == before
@@ -0,0 +1,63 @@
+"""
+Import-time budget: the generator and web app import cold within their
+budgets (``python -X importtime`` in fresh interpreters), without loading
+python-pptx, lxml or the sample question bank until a deck is built.
+"""
+
+import json
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+from conftest import ROOT
+
+# Milliseconds of cumulative import time, best of RUNS
+BUDGETS_MS = {
+    "generate_ppt": 60,
+    "app": 200,
+}
+RUNS = 5
+# Modules that must stay unloaded until a deck is actually built
+FORBIDDEN = {
+    "generate_ppt": ["pptx", "lxml", "questions_data", "multiprocessing"],
+    "app": ["pptx", "lxml", "questions_data"],
+}
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of module in a fresh interpreter, in ms."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    )
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def loaded_modules(module: str) -> List[str]:
+    """Names in sys.modules after importing module in a fresh interpreter."""
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", list(BUDGETS_MS))
+def test_import_time_within_budget(module):
+    best = min(import_time_ms(module) for _ in range(RUNS))
+    assert best <= BUDGETS_MS[module], f"{module} imports in {best:.1f} ms (budget {BUDGETS_MS[module]} ms)"
+
+
+@pytest.mark.parametrize("module", list(FORBIDDEN))
+def test_heavy_modules_stay_unloaded(module):
+    loaded = loaded_modules(module)
+    for heavy in FORBIDDEN[module]:
+        assert not any(name == heavy or name.startswith(heavy + ".") for name in loaded), \
+            f"importing {module} loads {heavy}"
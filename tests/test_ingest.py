@@ -0,0 +1,37 @@
+"""Streaming ingestion of uploads with very large items."""
+
+import io
+import json
+
+import ingest
+from ingest import iter_questions
+
+
+class CountingDecoder(json.JSONDecoder):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def raw_decode(self, s, idx=0):
+        self.calls += 1
+        return super().raw_decode(s, idx)
+
+
+def test_large_item_is_decoded_a_logarithmic_number_of_times(monkeypatch):
+    decoder = CountingDecoder()
+    monkeypatch.setattr(ingest, "_DECODER", decoder)
+    big = "x" * (8 << 20)
+    upload = json.dumps([{"q": "1. small", "meta": ""}, {"q": big, "meta": "2024 | 1 Mark"}, {"q": "3. end"}])
+
+    questions = list(iter_questions(io.BytesIO(upload.encode())))
+
+    assert [len(q["q"]) for q in questions] == [8, len(big), 6]
+    assert questions[1]["meta"] == "2024 | 1 Mark"
+    # 8 MB in 64 KB chunks is 128 chunks; re-decoding after each would be O(n^2)
+    assert decoder.calls < 30
+
+
+def test_multibyte_text_split_across_chunks():
+    text = "é→₂" * 50_000
+    upload = json.dumps([{"q": text}], ensure_ascii=False).encode()
+    assert [q["q"] for q in iter_questions(io.BytesIO(upload), chunk_size=1000)] == [text]
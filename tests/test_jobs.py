@@ -0,0 +1,113 @@
+"""Background jobs and batches: the deck settings they build with, and job expiry."""
+
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+
+from conftest import SAMPLE, run_job, upload
+from generate_ppt import write_presentation
+from jobs import JobManager
+
+
+def _slide_xml(deck: bytes) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(deck)) as archive:
+        return archive.read("ppt/slides/slide1.xml")
+
+
+def _direct(slide_style: str) -> bytes:
+    deck = io.BytesIO()
+    write_presentation(SAMPLE, deck, slide_style=slide_style)
+    return _slide_xml(deck.getvalue())
+
+
+def test_job_uses_master_slide_style(flask_app, client, monkeypatch):
+    monkeypatch.setitem(flask_app.config, "SLIDE_STYLE", "master")
+    master, inline = _direct("master"), _direct("inline")
+    assert master != inline
+
+    assert _slide_xml(run_job(client)) == master
+
+
+def test_job_and_batch_use_the_template(flask_app, client, monkeypatch, tmp_path):
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    template = os.path.join(tmp_path, "wide.pptx")
+    prs = Presentation()
+    prs.slide_width, prs.slide_height = Inches(16), Inches(9)
+    prs.save(template)
+    monkeypatch.setitem(flask_app.config, "PPT_TEMPLATE", template)
+
+    def slide_width(deck: bytes) -> int:
+        return Presentation(io.BytesIO(deck)).slide_width
+
+    assert slide_width(run_job(client)) == Inches(16)
+
+    response = client.post("/generate/batch", data=upload(SAMPLE))
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert slide_width(archive.read("questions.pptx")) == Inches(16)
+
+
+def _abandoned_job(manager, age: float, progress: bool = False) -> str:
+    """A job dir as left by a worker that died before recording an outcome."""
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(manager.directory, job_id)
+    os.makedirs(job_dir)
+    paths = [os.path.join(job_dir, "meta.json"), job_dir]
+    with open(paths[0], "w") as f:
+        json.dump({"total": 3, "backend": "pptx", "created": time.time() - age}, f)
+    if progress:
+        with open(os.path.join(job_dir, "progress"), "w") as f:
+            f.write("1")
+    for path in paths:
+        os.utime(path, (time.time() - age,) * 2)
+    return job_id
+
+
+def test_jobs_without_an_outcome_expire(tmp_path):
+    manager = JobManager(str(tmp_path), ttl=60)
+    dead = _abandoned_job(manager, age=120)
+    queued = _abandoned_job(manager, age=5)
+    progressing = _abandoned_job(manager, age=120, progress=True)  # progress just now
+
+    assert manager.status(dead) is None
+    assert not os.path.exists(os.path.join(str(tmp_path), dead))
+    assert manager.status(queued)["status"] == "queued"
+    assert manager.status(progressing)["status"] == "running"
+
+
+FORMULA_QUESTIONS = [
+    {"q": "1. Simplify $\\frac{a}{b}$ when a is twice b.", "meta": "2024 | 2 Marks"},
+]
+
+
+def _formula_media(deck: bytes):
+    with zipfile.ZipFile(io.BytesIO(deck)) as archive:
+        return [name for name in archive.namelist() if name.startswith("ppt/media/formula-")]
+
+
+def test_job_and_batch_render_formula_images(flask_app, client, monkeypatch):
+    import app
+    from formula_images import FormulaRenderer, FormulaSettings
+
+    settings = FormulaSettings("png", (1, 2, 3))
+    renderer = FormulaRenderer(flask_app.config["FORMULA_CACHE_DIR"], settings, workers=0)
+    monkeypatch.setattr(app, "formula_renderer", renderer)
+
+    assert len(_formula_media(run_job(client, FORMULA_QUESTIONS))) == 1
+
+    response = client.post("/generate/batch", data=upload(FORMULA_QUESTIONS))
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert len(_formula_media(archive.read("questions.pptx"))) == 1
+
+    # Both rendered into the app's shared cache, under the app's settings
+    assert renderer.get("\\frac{a}{b}") is not None
+    assert renderer.renders == 0
+
+
+def test_formulas_stay_text_when_disabled(client):
+    assert _formula_media(run_job(client, FORMULA_QUESTIONS)) == []
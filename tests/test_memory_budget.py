@@ -0,0 +1,56 @@
+"""Memory estimates of parallel, master-style and custom-template builds."""
+
+import os
+import zipfile
+
+from pptx import Presentation
+
+from memory_budget import DEFAULT_COST_MODELS, estimate_cost, sample_questions, template_overhead
+
+
+def test_parallel_build_counts_every_shard_in_flight():
+    questions = sample_questions(2000)
+    streamed = estimate_cost(questions, "stream")
+    two = estimate_cost(questions, "pptx", workers=2)
+    four = estimate_cost(questions, "pptx", workers=4)
+    assert streamed < two < four
+    # 10 shards of 200: no more than that are ever held, however many workers
+    assert estimate_cost(questions, "pptx", workers=5) == estimate_cost(questions, "pptx", workers=64)
+    # Each shard holds a presentation of its own
+    assert four - streamed >= 8 * DEFAULT_COST_MODELS["stream"].base
+
+
+def test_master_style_has_its_own_rate():
+    questions = sample_questions(500)
+    assert estimate_cost(questions, "pptx", slide_style="master") == \
+        DEFAULT_COST_MODELS["pptx/master"].estimate(len(questions), questions.text_length())
+    # A cost file without master models falls back to the backend's
+    models = {"pptx": DEFAULT_COST_MODELS["pptx"]}
+    assert estimate_cost(questions, "pptx", models, "master") == estimate_cost(questions, "pptx", models)
+
+
+def test_template_overhead_is_charged_per_presentation(tmp_path):
+    template = os.path.join(tmp_path, "heavy.pptx")
+    Presentation().save(template)
+    with zipfile.ZipFile(template, "a") as package:
+        package.writestr("ppt/media/image1.png", b"\0" * 3_000_000)
+    overhead = template_overhead(template)
+    assert overhead > 2_900_000  # the image, give or take the resaved XML
+    assert template_overhead(None) == 0
+
+    questions = sample_questions(1000)
+    assert estimate_cost(questions, "stream", template_overhead=overhead) == \
+        estimate_cost(questions, "stream") + overhead
+    parallel = estimate_cost(questions, "stream", workers=2, template_overhead=overhead)
+    assert parallel - estimate_cost(questions, "stream", workers=2) == 5 * overhead
+
+
+def test_app_estimates_with_its_build_settings(flask_app, monkeypatch):
+    import app
+
+    questions = sample_questions(1000)
+    single = app.build_cost(questions, "pptx")
+    monkeypatch.setitem(flask_app.config, "BUILD_WORKERS", 4)
+    monkeypatch.setitem(flask_app.config, "SLIDE_STYLE", "master")
+    assert app.build_cost(questions, "pptx") == estimate_cost(questions, "pptx", slide_style="master", workers=4)
+    assert app.build_cost(questions, "pptx") != single
@@ -0,0 +1,57 @@
+"""The zip writers' fallbacks for zipfile and python-pptx internals."""
+
+import io
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+import ooxml_writer
+from conftest import SAMPLE, run_job
+from generate_ppt import Compression, write_presentation
+
+
+def _members(deck: bytes):
+    with zipfile.ZipFile(io.BytesIO(deck)) as archive:
+        assert archive.testzip() is None
+        return [(info.filename, info.compress_type, archive.read(info)) for info in archive.infolist()]
+
+
+def _save(prs, level=6, threads=1) -> bytes:
+    output = io.BytesIO()
+    ooxml_writer.save_presentation(prs, output, level, threads)
+    return output.getvalue()
+
+
+@pytest.fixture(scope="module")
+def prs():
+    deck = io.BytesIO()
+    write_presentation(SAMPLE, deck)
+    return Presentation(deck)
+
+
+def test_zipfile_takes_predeflated_members():
+    assert ooxml_writer.can_write_deflated()
+
+
+def test_threaded_deflate_without_zipfile_support(prs, monkeypatch):
+    expected = _members(_save(prs, threads=4))
+    monkeypatch.setattr(ooxml_writer, "can_write_deflated", lambda: False)
+    with ooxml_writer.PackageZip(io.BytesIO(), 6, 4) as package:
+        assert package._pool is None
+    assert _members(_save(prs, threads=4)) == expected
+
+
+@pytest.mark.parametrize("level", [0, 6])
+def test_save_without_package_writer_steps(prs, monkeypatch, level):
+    expected = _members(_save(prs, level))
+    monkeypatch.setattr(ooxml_writer, "_PACKAGE_WRITER_STEPS", ("_no_such_step",))
+    repacked = _members(_save(prs, level))
+    assert repacked == expected
+    Presentation(io.BytesIO(_save(prs, level)))
+
+
+def test_job_uses_configured_compression(flask_app, client, monkeypatch):
+    monkeypatch.setattr("app.deck_compression", Compression(level=0))
+    deck = run_job(client)
+    assert {compress_type for _, compress_type, _ in _members(deck)} == {zipfile.ZIP_STORED}
@@ -0,0 +1,66 @@
+"""An uploaded previousDeck can only shape its uploader's own rebuild."""
+
+import io
+import re
+import zipfile
+
+from conftest import upload
+
+SLIDE_HASHES = "customXml/slideHashes.xml"
+
+
+def _deck(questions) -> bytes:
+    from generate_ppt import write_presentation
+
+    deck = io.BytesIO()
+    write_presentation(questions, deck, record_hashes=True)
+    return deck.getvalue()
+
+
+def _slide_key(deck: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(deck)) as package:
+        return re.search(rb'key="([0-9a-f]+)"', package.read(SLIDE_HASHES)).group(1).decode()
+
+
+def _forge(deck: bytes, key: str) -> bytes:
+    """The deck with its slide's recorded key swapped for another question's."""
+    forged = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(deck)) as source, zipfile.ZipFile(forged, "w") as target:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename == SLIDE_HASHES:
+                data = re.sub(rb'key="[0-9a-f]+"', f'key="{key}"'.encode(), data)
+            target.writestr(info, data)
+    return forged.getvalue()
+
+
+def _slide_text(deck: bytes) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(deck)) as package:
+        return package.read("ppt/slides/slide1.xml")
+
+
+def test_forged_previous_deck_does_not_reach_other_clients(client):
+    victim = [{"q": "1. State Hess's law of constant heat summation.", "meta": "2011 | 2 Marks"}]
+    attacker = [{"q": "1. FORGED SLIDE TEXT", "meta": "2011 | 2 Marks"}]
+    forged = _forge(_deck(attacker), _slide_key(_deck(victim)))
+
+    data = upload(victim)
+    data["previousDeck"] = (io.BytesIO(forged), "previous.pptx")
+    seeded = client.post("/generate", data=data)
+    assert seeded.status_code == 200
+    assert b"FORGED" in _slide_text(seeded.data)  # the uploader's own rebuild
+    assert "ETag" not in seeded.headers
+
+    clean = client.post("/generate", data=upload(victim))
+    assert clean.status_code == 200
+    assert b"FORGED" not in _slide_text(clean.data)
+    assert b"Hess" in _slide_text(clean.data)
+
+
+def test_genuine_previous_deck_is_reused(client):
+    questions = [{"q": "1. Name the gas evolved at the anode.", "meta": "2012 | 1 Mark"}]
+    data = upload(questions)
+    data["previousDeck"] = (io.BytesIO(_deck(questions)), "previous.pptx")
+    response = client.post("/generate", data=data)
+    assert response.status_code == 200
+    assert b"anode" in _slide_text(response.data)
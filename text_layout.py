@@ -0,0 +1,386 @@
+"""
+Text Layout
+Predicts how question text wraps in a slide's text box from per-glyph
+advance widths of the slide font, so the largest font size that fits can be
+chosen (and text too long even at the minimum size split across
+continuation slides) without a font renderer.
+
+Widths for printable ASCII come from the font's metrics tables; other
+characters (sub/superscripts, Greek letters, arrows, operators) use
+per-category estimates. Words are measured once per fitter and every
+candidate size is tried against the same measurements, so fitting a deck
+costs about one dictionary lookup per word.
+
+Text with inline objects (formula images) is laid out by fit_flow(), which
+places every text run and object itself instead of leaving wrapping to
+PowerPoint.
+"""
+
+import math
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+EMU_PER_POINT = 12700
+
+# Advance widths of " " through "~" (code points 32-126) in font units
+_ASCII_METRICS = {
+    "Calibri": (2048, """
+        463 544 745 1014 1031 1466 1423 452 621 621 1019 1019 511 627 517 791
+        1038 1038 1038 1038 1038 1038 1038 1038 1038 1038
+        548 548 1019 1019 1019 969 1833
+        1185 1114 1092 1260 1000 941 1292 1276 516 653 1064 861 1751
+        1322 1356 1058 1378 1112 941 998 1314 1162 1822 1063 998 959
+        628 791 628 1019 1019 588
+        981 1076 866 1076 1019 625 964 1076 470 490 931 470 1636
+        1076 1080 1076 1076 714 801 686 1076 925 1464 887 927 809
+        643 941 643 1019
+    """),
+    "Arial": (1000, """
+        278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278
+        556 556 556 556 556 556 556 556 556 556
+        278 278 584 584 584 556 1015
+        667 667 722 722 667 611 778 722 278 500 667 556 833
+        722 778 667 778 722 667 611 722 667 944 667 667 611
+        278 278 278 469 556 333
+        556 556 500 556 556 278 556 556 222 222 500 222 833
+        556 556 556 556 333 500 278 556 500 722 500 500 500
+        334 260 334 584
+    """),
+}
+# Fonts without a table are measured as Arial, wider than most body fonts
+_FALLBACK_FONT = "Arial"
+
+# Estimated widths (in ems) of characters outside the ASCII tables
+_SCRIPT_CHARS = frozenset("₀₁₂₃₄₅₆₇₈₉₍₎₊₋₌ₓₙ⁰¹²³⁴⁵⁶⁷⁸⁹⁽⁾⁺⁻⁼ˣʸᶻⁿ")
+_SCRIPT_EM = 0.4
+_ARROW_EM = 1.0
+_WIDE_EM = 1.0
+_DEFAULT_EM = 0.6
+
+
+class _GlyphTable(dict):
+    """Advance widths in ems by character, estimating unlisted ones on demand."""
+
+    def __missing__(self, char: str) -> float:
+        width = _estimate_width(char)
+        self[char] = width
+        return width
+
+
+def _estimate_width(char: str) -> float:
+    if char in _SCRIPT_CHARS:
+        return _SCRIPT_EM
+    if "←" <= char <= "⇿":
+        return _ARROW_EM
+    if unicodedata.combining(char):
+        return 0.0
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return _WIDE_EM
+    return _DEFAULT_EM
+
+
+@lru_cache(maxsize=None)
+def glyph_widths(font_name: str) -> Dict[str, float]:
+    """
+    Advance widths of a font's glyphs in ems, built once per font.
+
+    Sizes share the table: a width in points is the em width times the size.
+
+    Args:
+        font_name: Typeface name as set on the slide text
+    """
+    units_per_em, widths = _ASCII_METRICS.get(font_name, _ASCII_METRICS[_FALLBACK_FONT])
+    table = _GlyphTable()
+    for code, units in enumerate(widths.split(), start=32):
+        table[chr(code)] = int(units) / units_per_em
+    table["\t"] = 4 * table[" "]
+    return table
+
+
+@dataclass(frozen=True)
+class TextFit:
+    """Font size chosen for a text, and the text of each slide it fills."""
+    size: int
+    pages: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class InlineBox:
+    """An object set inline with text, e.g. a formula image, sized in ems."""
+    width: float
+    height: float
+    content: object = None
+
+    def scaled(self, width: float) -> "InlineBox":
+        """This box shrunk in proportion to the given width."""
+        return InlineBox(width, self.height * width / self.width, self.content)
+
+
+@dataclass(frozen=True)
+class FlowLine:
+    """
+    One laid-out line: its height, and each text run or box with its
+    horizontal offset, all in ems.
+    """
+    height: float
+    runs: Tuple[Tuple[float, Union[str, InlineBox]], ...]
+
+
+@dataclass(frozen=True)
+class FlowFit:
+    """Font size chosen for a flow, and the lines of each slide it fills."""
+    size: int
+    pages: Tuple[Tuple[FlowLine, ...], ...]
+
+
+# Paragraphs, each a sequence of text pieces and inline boxes
+Flow = Sequence[Sequence[Union[str, InlineBox]]]
+# A word of a flow: the text and boxes between two spaces
+_FlowWord = List[Union[str, InlineBox]]
+
+# Line height around an inline box, as a multiple of its height
+_BOX_LINE_HEIGHT = 1.15
+
+
+class TextFitter:
+    """Fits text into a fixed text area by shrinking the font, then splitting."""
+
+    # Distinct words remembered before the measurement cache starts over
+    MAX_CACHED_WORDS = 100_000
+
+    def __init__(
+        self,
+        font_name: str,
+        width: int,
+        height: int,
+        max_size: int,
+        min_size: int,
+        line_spacing: float = 1.2
+    ):
+        """
+        Args:
+            font_name: Typeface the text is set in
+            width: Usable line width in EMU (box width less its insets)
+            height: Usable height in EMU (box height less its insets)
+            max_size: Preferred font size in points
+            min_size: Smallest font size before text is split across slides
+            line_spacing: Line height as a multiple of the font size
+        """
+        self._glyphs = glyph_widths(font_name)
+        self._space = self._glyphs[" "]
+        self._words: Dict[str, float] = {}
+        self._height = height
+        self._line_spacing = line_spacing
+        # (size, line width in ems, lines per slide), largest size first
+        self._sizes = [
+            (size, width / (size * EMU_PER_POINT),
+             max(1, int(height // (size * line_spacing * EMU_PER_POINT))))
+            for size in range(max_size, min(min_size, max_size) - 1, -1)
+        ]
+
+    def fit(self, text: str) -> TextFit:
+        """
+        Choose the largest size at which text fits on one slide.
+
+        Returns:
+            The fit; text that overflows even at the minimum size is split
+            at line boundaries into as many pages as it needs
+        """
+        paragraphs = [
+            [self._word_width(word) for word in paragraph.split(" ")]
+            for paragraph in text.split("\n")
+        ]
+        for size, line_width, max_lines in self._sizes:
+            if self._count_lines(paragraphs, line_width, max_lines) <= max_lines:
+                return TextFit(size, (text,))
+        size, line_width, max_lines = self._sizes[-1]
+        return TextFit(size, self._paginate(text, line_width, max_lines))
+
+    def fit_many(self, texts: Iterable[str]) -> List[TextFit]:
+        """Fit a batch of texts, laying out repeated texts only once."""
+        fits: Dict[str, TextFit] = {}
+        results = []
+        for text in texts:
+            fit = fits.get(text)
+            if fit is None:
+                fit = fits[text] = self.fit(text)
+            results.append(fit)
+        return results
+
+    def fit_flow(self, flow: Flow) -> FlowFit:
+        """
+        Lay out text with inline boxes at the largest size that fits one slide.
+
+        Lines break at spaces only; a box wider than a line is shrunk to
+        the line width, and a line is as tall as its tallest box needs.
+
+        Args:
+            flow: Paragraphs of text pieces and boxes, boxes sized in ems
+
+        Returns:
+            The fit; a flow that overflows even at the minimum size is split
+            between lines into as many pages as it needs
+        """
+        paragraphs = [self._flow_words(paragraph) for paragraph in flow]
+        for size, line_width, _ in self._sizes:
+            lines = self._flow_lines(paragraphs, line_width)
+            if sum(line.height for line in lines) <= self._height_ems(size):
+                return FlowFit(size, (tuple(lines),))
+        size, line_width, _ = self._sizes[-1]
+        height = self._height_ems(size)
+        pages: List[Tuple[FlowLine, ...]] = []
+        page: List[FlowLine] = []
+        used = 0.0
+        for line in lines:
+            if page and used + line.height > height:
+                pages.append(tuple(page))
+                page, used = [], 0.0
+            page.append(line)
+            used += line.height
+        pages.append(tuple(page))
+        return FlowFit(size, tuple(pages))
+
+    def measure(self, text: str) -> float:
+        """Width of a single line of text in ems."""
+        return sum(map(self._word_width, text.split(" "))) + self._space * text.count(" ")
+
+    def _height_ems(self, size: int) -> float:
+        return self._height / (size * EMU_PER_POINT)
+
+    @staticmethod
+    def _flow_words(paragraph: Sequence[Union[str, InlineBox]]) -> List[_FlowWord]:
+        """Split a paragraph into words; text and boxes not separated by a space stay together."""
+        words: List[_FlowWord] = [[]]
+        for piece in paragraph:
+            if isinstance(piece, InlineBox):
+                words[-1].append(piece)
+                continue
+            first, *rest = piece.split(" ")
+            if first:
+                words[-1].append(first)
+            words.extend([chunk] if chunk else [] for chunk in rest)
+        return words
+
+    def _flow_lines(self, paragraphs: List[List[_FlowWord]], line_width: float) -> List[FlowLine]:
+        """Greedy line breaking of flow words, merging adjacent text into runs."""
+        space = self._space
+        lines = []
+        for words in paragraphs:
+            runs: List[list] = []  # [offset, text or box]
+            used = None  # width of the current line, None while it's empty
+            height = self._line_spacing
+            for word in words:
+                parts = [
+                    part.scaled(line_width) if isinstance(part, InlineBox) and part.width > line_width
+                    else part
+                    for part in word
+                ]
+                width = sum(
+                    part.width if isinstance(part, InlineBox) else self._word_width(part)
+                    for part in parts
+                )
+                if used is not None and used + space + width > line_width:
+                    lines.append(FlowLine(height, tuple(map(tuple, runs))))
+                    runs, used, height = [], None, self._line_spacing
+                offset = 0.0 if used is None else used
+                if used is not None:
+                    parts.insert(0, " ")
+                for part in parts:
+                    if isinstance(part, InlineBox):
+                        runs.append([offset, part])
+                        offset += part.width
+                        height = max(height, part.height * _BOX_LINE_HEIGHT)
+                        continue
+                    if runs and isinstance(runs[-1][1], str):
+                        runs[-1][1] += part
+                    else:
+                        runs.append([offset, part])
+                    offset += space if part == " " else self._word_width(part)
+                used = offset
+            lines.append(FlowLine(height, tuple(map(tuple, runs))))
+        return lines
+
+    def _word_width(self, word: str) -> float:
+        width = self._words.get(word)
+        if width is None:
+            if len(self._words) >= self.MAX_CACHED_WORDS:
+                self._words.clear()
+            width = self._words[word] = sum(map(self._glyphs.__getitem__, word))
+        return width
+
+    def _count_lines(self, paragraphs: List[List[float]], line_width: float, max_lines: int) -> int:
+        """Lines needed by greedy wrapping, stopping early once past max_lines."""
+        space = self._space
+        lines = 0
+        for words in paragraphs:
+            lines += 1
+            used = None  # width of the current line, None while it's empty
+            for width in words:
+                if used is not None and used + space + width > line_width:
+                    lines += 1
+                    used = None
+                if width > line_width:
+                    # An overlong word is broken across lines at characters
+                    extra = math.ceil(width / line_width) - 1
+                    lines += extra
+                    width -= extra * line_width
+                used = width if used is None else used + space + width
+            if lines > max_lines:
+                break
+        return lines
+
+    def _paginate(self, text: str, line_width: float, max_lines: int) -> Tuple[str, ...]:
+        """Split text into pages of at most max_lines wrapped lines."""
+        lines = self._wrap(text, line_width)
+        pages = []
+        for start in range(0, len(lines), max_lines):
+            chunk = lines[start:start + max_lines]
+            # Keep each break's original separator, except at the page end
+            page = "".join(line + sep for line, sep in chunk[:-1]) + chunk[-1][0]
+            if page.strip():  # e.g. just the blank line after a trailing newline
+                pages.append(page)
+        return tuple(pages) or (text,)
+
+    def _wrap(self, text: str, line_width: float) -> List[Tuple[str, str]]:
+        """
+        Greedy line breaks, matching _count_lines().
+
+        Returns:
+            (line text, separator it was broken at) per line: "\\n" for a
+            paragraph end, " " for a wrap at a space, "" inside a word
+        """
+        space = self._space
+        lines: List[Tuple[str, str]] = []
+        for paragraph in text.split("\n"):
+            words: List[str] = []
+            used = 0.0
+            for word in paragraph.split(" "):
+                width = self._word_width(word)
+                if words and used + space + width > line_width:
+                    lines.append((" ".join(words), " "))
+                    words = []
+                if width > line_width:
+                    *pieces, word = self._break_word(word, line_width)
+                    lines.extend((piece, "") for piece in pieces)
+                    width = self._word_width(word)
+                used = width if not words else used + space + width
+                words.append(word)
+            lines.append((" ".join(words), "\n"))
+        return lines
+
+    def _break_word(self, word: str, line_width: float) -> List[str]:
+        """Split a word too long for a line into line-sized pieces."""
+        pieces = []
+        start = 0
+        used = 0.0
+        for index, char in enumerate(word):
+            width = self._glyphs[char]
+            if used + width > line_width and index > start:
+                pieces.append(word[start:index])
+                start = index
+                used = 0.0
+            used += width
+        pieces.append(word[start:])
+        return pieces